@@ -3,18 +3,21 @@ Admin-only API: list all users, view any user's chats, view any chat's messages,
 and update user roles (promote/demote).
 Requires role=admin (stored in the users.role column).
 """
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.core.database import get_db
 from app.core.auth import get_current_admin
+from app.core.pagination import decode_cursors, set_cursor_headers
 from app.repositories.auth_repository import UserRepository
 from app.repositories.chat_repository import ChatRepository
 from app.repositories.message_repository import MessageRepository
 from app.models.schemas.auth import UserResponse, UserRoleUpdateRequest
 from app.models.schemas import ChatResponse, ChatListResponse, MessageResponse
 from app.core.exceptions import UserNotFoundError, ChatNotFoundError
+from app.providers.cache import completion_cache
+from app.providers.similarity_cache import near_duplicate_index
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -41,14 +44,21 @@ def bootstrap_make_admin(
 
 @router.get("/users", response_model=List[UserResponse])
 def list_all_users(
+    response: Response,
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    before: Optional[str] = Query(None, description="Cursor: users created before this one"),
+    after: Optional[str] = Query(None, description="Cursor: users created after this one"),
     db: Session = Depends(get_db),
     admin=Depends(get_current_admin),
 ):
-    """List all users (admin only)."""
-    users = UserRepository.get_all_users(db, limit=limit, offset=offset)
-    return users
+    """List all users, newest first (admin only). Cursors: X-Before-Cursor / X-After-Cursor headers."""
+    if offset and before is None and after is None:
+        return UserRepository.get_all_users(db, limit=limit, offset=offset)
+    before_key, after_key = decode_cursors(before, after)
+    page = UserRepository.get_users_page(db, limit, before_key, after_key)
+    set_cursor_headers(response, page)
+    return page.items
 
 
 @router.patch("/users/{user_id}/role", response_model=UserResponse)
@@ -77,19 +87,8 @@ def list_user_chats(
     if UserRepository.get_by_id(db, user_id) is None:
         raise UserNotFoundError(user_id)
     chats = ChatRepository.get_user_chats(db, user_id, limit=limit, offset=offset)
-    chat_responses = []
-    for chat in chats:
-        message_count = MessageRepository.get_message_count(db, chat.id)
-        chat_responses.append(ChatResponse(
-            id=chat.id,
-            user_id=chat.user_id,
-            title=chat.title,
-            created_at=chat.created_at,
-            updated_at=chat.updated_at,
-            message_count=message_count,
-        ))
-    total = len(ChatRepository.get_user_chats(db, user_id, limit=1000))
-    return ChatListResponse(chats=chat_responses, total=total)
+    total = ChatRepository.count_user_chats(db, user_id)
+    return ChatListResponse(chats=[ChatResponse.model_validate(chat) for chat in chats], total=total)
 
 
 @router.get("/chats/{chat_id}/messages", response_model=List[MessageResponse])
@@ -105,3 +104,12 @@ def get_chat_messages(
         raise ChatNotFoundError(chat_id)
     messages = MessageRepository.get_chat_messages(db, chat_id, limit=limit)
     return messages
+
+
+@router.get("/cache/stats")
+def get_cache_stats(admin=Depends(get_current_admin)):
+    """
+    Hit/miss counters and size of the completion/title cache (admin only),
+    with the near-duplicate cache's counters under "near_duplicate".
+    """
+    return {**completion_cache.stats(), "near_duplicate": near_duplicate_index.stats()}
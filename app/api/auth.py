@@ -5,6 +5,7 @@ Authentication endpoints (email/password) returning JWT access tokens.
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.database import get_db
 from app.core.auth import get_current_user
@@ -16,19 +17,20 @@ from app.models.schemas.auth import (
     TokenResponse,
 )
 from app.repositories.auth_repository import UserRepository
+from app.services.auth_service import authenticate, register_user
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=UserResponse, status_code=201)
-def register(request: UserRegisterRequest, db: Session = Depends(get_db)):
-    existing = UserRepository.get_by_email(db, request.email)
+async def register(request: UserRegisterRequest, db: Session = Depends(get_db)):
+    existing = await run_in_threadpool(UserRepository.get_by_email, db, request.email)
     if existing:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already registered")
     try:
         # New users always start as regular users; admins can promote via /admin/users/{user_id}/role
-        user = UserRepository.create_user(db, request.email, request.password)
+        user = await register_user(db, request.email, request.password)
         return user
     except ValueError as e:
         # Convert hashing/validation issues into a clear client error (no 500)
@@ -39,9 +41,9 @@ def register(request: UserRegisterRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(request: UserLoginRequest, db: Session = Depends(get_db)):
+async def login(request: UserLoginRequest, db: Session = Depends(get_db)):
     """Login with JSON body (email + password). Use this from your app."""
-    user = UserRepository.authenticate(db, request.email, request.password)
+    user = await authenticate(db, request.email, request.password)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
     token = create_access_token(subject=user.id, token_version=str(user.token_version))
@@ -62,13 +64,13 @@ def get_me(user=Depends(get_current_user)):
 
 
 @router.post("/token", response_model=TokenResponse)
-def login_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """
     OAuth2-compatible token endpoint (form data: username + password).
     Use this for Swagger UI "Authorize": put your **email** in the username field.
     """
     # OAuth2 sends "username" and "password"; we use email as username
-    user = UserRepository.authenticate(db, form_data.username, form_data.password)
+    user = await authenticate(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
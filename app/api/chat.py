@@ -1,37 +1,115 @@
 """
 API endpoint for sending messages to AI in a chat
 """
-from fastapi import APIRouter, Depends, Query
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.core.database import get_db
 from app.core.auth import get_current_user
-from app.models.schemas import ChatRequest, ChatMessageResponse
-from app.services.ai_service import chat_with_ai
+from app.models.schemas import ChatRequest, ChatMessageResponse, ChatBatchRequest, ChatBatchResponse
+from app.services.ai_service import chat_with_ai, check_rate_limit, stream_chat_with_ai
+from app.services.batch_service import run_chat_batch
 from app.repositories.chat_repository import ChatRepository
 router = APIRouter(tags=["chat"])
 
 
+def _get_or_create_chat_id(db: Session, chat_id: Optional[str], user_id: str) -> str:
+    """Return chat_id if it belongs to the user, otherwise create a new chat and return its id."""
+    return ChatRepository.get_or_create_chat(db, chat_id, user_id).id
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @router.post("/chat", response_model=ChatMessageResponse)
-def send_message(
+async def send_message(
     request: ChatRequest,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
     """
     Send a message to AI. If chat_id is omitted or invalid, creates a new chat first.
+    Returns 429 with Retry-After if the user is over the rate limit.
     """
-    chat_id = request.chat_id
-    chat = ChatRepository.get_chat_by_id(db, chat_id, current_user.id) if chat_id else None
-
-    if not chat:
-        chat = ChatRepository.create_chat(db, current_user.id, title=None)
-        chat_id = chat.id
+    check_rate_limit(current_user.id)
+    chat_id = await run_in_threadpool(_get_or_create_chat_id, db, request.chat_id, current_user.id)
 
-    reply = chat_with_ai(
+    reply = await chat_with_ai(
         db=db,
         chat_id=chat_id,
         user_message=request.message,
         user_id=current_user.id,
+        use_cache=request.use_cache,
+        user_tier=current_user.role,
     )
 
     return ChatMessageResponse(reply=reply, chat_id=chat_id)
+
+
+@router.post("/chat/stream")
+async def send_message_stream(
+    request: ChatRequest,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Send a message to AI and stream the reply as Server-Sent Events.
+
+    Events (each `data` is JSON):
+    - `start`: `{"chat_id": ...}` – sent immediately (useful when a new chat was created)
+    - `delta`: `{"content": ...}` – next piece of the reply
+    - `done`: `{"chat_id": ...}` – reply finished and saved
+    - `error`: `{"detail": ..., "status_code": ...}` – request failed; nothing is saved for the turn
+
+    Returns 429 (before any event) if the user is over the rate limit.
+    """
+    check_rate_limit(current_user.id)
+    chat_id = await run_in_threadpool(_get_or_create_chat_id, db, request.chat_id, current_user.id)
+
+    async def event_stream():
+        yield _sse_event("start", {"chat_id": chat_id})
+        try:
+            async for delta in stream_chat_with_ai(
+                db=db,
+                chat_id=chat_id,
+                user_message=request.message,
+                user_id=current_user.id,
+                use_cache=request.use_cache,
+                user_tier=current_user.role,
+            ):
+                yield _sse_event("delta", {"content": delta})
+        except HTTPException as e:
+            yield _sse_event("error", {"detail": e.detail, "status_code": e.status_code})
+            return
+        yield _sse_event("done", {"chat_id": chat_id})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/chat/batch", response_model=ChatBatchResponse)
+async def send_message_batch(
+    request: ChatBatchRequest,
+    current_user=Depends(get_current_user),
+):
+    """
+    Send many messages in one request (authenticated once).
+
+    Items run concurrently (bounded), except that items for the same chat_id run in order.
+    The whole batch is charged to the per-user rate limit up front (one request per item):
+    429 with Retry-After if it does not fit. Results come back in request order; a failed
+    item reports its status code and error without affecting the others.
+    """
+    check_rate_limit(current_user.id, cost=len(request.items))
+    results = await run_chat_batch(current_user.id, request.items, user_tier=current_user.role)
+    succeeded = sum(1 for result in results if result.error is None)
+    return ChatBatchResponse(results=results, succeeded=succeeded, failed=len(results) - succeeded)
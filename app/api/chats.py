@@ -1,13 +1,15 @@
 """
 API endpoints for chat management (create, list, get, update, delete)
+
+Database work is awaited on an AsyncSession, so these endpoints never use the threadpool.
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.auth import get_current_user
-from app.repositories.chat_repository import ChatRepository
-from app.repositories.message_repository import MessageRepository
+from app.core.pagination import Page, decode_cursors, set_cursor_headers
+from app.repositories.async_repositories import AsyncChatRepository, AsyncMessageRepository
 from app.models.schemas import (
     ChatCreateRequest,
     ChatUpdateRequest,
@@ -21,138 +23,116 @@ router = APIRouter(prefix="/chats", tags=["chats"])
 
 
 @router.post("", response_model=ChatResponse, status_code=201)
-def create_chat(
+async def create_chat(
     request: ChatCreateRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
     """
     Create a new chat for a user
     """
-    chat = ChatRepository.create_chat(db, current_user.id, request.title)
-    
-    # Return chat with message count
-    return ChatResponse(
-        id=chat.id,
-        user_id=chat.user_id,
-        title=chat.title,
-        created_at=chat.created_at,
-        updated_at=chat.updated_at,
-        message_count=0
-    )
+    chat = await AsyncChatRepository.create_chat(db, current_user.id, request.title)
+    return ChatResponse.model_validate(chat)
 
 
 @router.get("", response_model=ChatListResponse)
-def list_chats(
+async def list_chats(
     limit: int = Query(50, ge=1, le=100, description="Maximum number of chats to return"),
-    offset: int = Query(0, ge=0, description="Number of chats to skip"),
-    db: Session = Depends(get_db),
+    offset: int = Query(0, ge=0, description="Number of chats to skip (prefer the before/after cursors)"),
+    before: Optional[str] = Query(None, description="Cursor: chats updated before this one (next page)"),
+    after: Optional[str] = Query(None, description="Cursor: chats updated after this one (previous page)"),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
     """
-    Get all chats for a user
+    Get all chats for a user, most recently updated first.
+    Page with the returned cursors (keyset pagination: every page costs the same).
     """
-    chats = ChatRepository.get_user_chats(db, current_user.id, limit, offset)
-    
-    # Get message count for each chat
-    chat_responses = []
-    for chat in chats:
-        message_count = len(MessageRepository.get_chat_messages(db, chat.id))
-        chat_responses.append(ChatResponse(
-            id=chat.id,
-            user_id=chat.user_id,
-            title=chat.title,
-            created_at=chat.created_at,
-            updated_at=chat.updated_at,
-            message_count=message_count
-        ))
-    
-    # Get total count (simplified - in production, use count query)
-    total = len(ChatRepository.get_user_chats(db, current_user.id, limit=1000))
-    
-    return ChatListResponse(chats=chat_responses, total=total)
+    # Message counts and previews are stored on the chat rows: one query for the page
+    if offset and before is None and after is None:
+        page = Page(await AsyncChatRepository.get_user_chats(db, current_user.id, limit, offset))
+    else:
+        before_key, after_key = decode_cursors(before, after)
+        page = await AsyncChatRepository.get_user_chats_page(db, current_user.id, limit, before_key, after_key)
+    total = await AsyncChatRepository.count_user_chats(db, current_user.id)
+    return ChatListResponse(
+        chats=[ChatResponse.model_validate(chat) for chat in page.items],
+        total=total,
+        before_cursor=page.before_cursor,
+        after_cursor=page.after_cursor,
+    )
 
 
 @router.get("/{chat_id}", response_model=ChatResponse)
-def get_chat(
+async def get_chat(
     chat_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
     """
     Get a specific chat by ID
     """
-    chat = ChatRepository.get_chat_by_id(db, chat_id, current_user.id)
+    chat = await AsyncChatRepository.get_chat_by_id(db, chat_id, current_user.id)
     if not chat:
         raise ChatNotFoundError(chat_id)
-    
-    message_count = len(MessageRepository.get_chat_messages(db, chat_id))
-    
-    return ChatResponse(
-        id=chat.id,
-        user_id=chat.user_id,
-        title=chat.title,
-        created_at=chat.created_at,
-        updated_at=chat.updated_at,
-        message_count=message_count
-    )
+    return ChatResponse.model_validate(chat)
 
 
 @router.get("/{chat_id}/messages", response_model=list[MessageResponse])
-def get_chat_messages(
+async def get_chat_messages(
     chat_id: str,
+    response: Response,
     limit: Optional[int] = Query(None, ge=1, le=500, description="Maximum number of messages to return"),
-    db: Session = Depends(get_db),
+    before: Optional[str] = Query(None, description="Cursor: messages sent before this one"),
+    after: Optional[str] = Query(None, description="Cursor: messages sent after this one"),
+    latest: bool = Query(False, description="Return the newest messages (then page back with 'before')"),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
     """
-    Get all messages for a specific chat
+    Get all messages for a specific chat, oldest first.
+    With latest, before or after, returns one page (default 50 messages) and the cursors
+    for the neighbouring pages in the X-Before-Cursor / X-After-Cursor headers.
     """
     # Verify chat exists and belongs to user
-    chat = ChatRepository.get_chat_by_id(db, chat_id, current_user.id)
+    chat = await AsyncChatRepository.get_chat_by_id(db, chat_id, current_user.id)
     if not chat:
         raise ChatNotFoundError(chat_id)
-    
-    messages = MessageRepository.get_chat_messages(db, chat_id, limit)
-    return messages
+
+    if not latest and before is None and after is None:
+        return await AsyncMessageRepository.get_chat_messages(db, chat_id, limit)
+    before_key, after_key = decode_cursors(before, after)
+    page = await AsyncMessageRepository.get_chat_messages_page(db, chat_id, limit or 50, before_key, after_key)
+    set_cursor_headers(response, page)
+    return page.items
 
 
 @router.patch("/{chat_id}", response_model=ChatResponse)
-def update_chat(
+async def update_chat(
     chat_id: str,
     request: ChatUpdateRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
     """
     Update a chat's title
     """
-    chat = ChatRepository.update_chat_title(db, chat_id, current_user.id, request.title)
+    chat = await AsyncChatRepository.update_chat_title(db, chat_id, current_user.id, request.title)
     if not chat:
         raise ChatNotFoundError(chat_id)
-    
-    message_count = len(MessageRepository.get_chat_messages(db, chat_id))
-    
-    return ChatResponse(
-        id=chat.id,
-        user_id=chat.user_id,
-        title=chat.title,
-        created_at=chat.created_at,
-        updated_at=chat.updated_at,
-        message_count=message_count
-    )
+    return ChatResponse.model_validate(chat)
 
 
 @router.delete("/{chat_id}", status_code=204)
-def delete_chat(
+async def delete_chat(
     chat_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
     """
     Delete a chat and all its messages
     """
-    deleted = ChatRepository.delete_chat(db, chat_id, current_user.id)
+    deleted = await AsyncChatRepository.delete_chat(db, chat_id, current_user.id)
     if not deleted:
         raise ChatNotFoundError(chat_id)
     
@@ -7,11 +7,13 @@ from typing import Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.config import PRINCIPAL_CACHE_ENABLED
+from app.core.database import get_async_db, set_request_user, use_primary
+from app.core.principals import Principal, principal_cache
 from app.core.security import decode_access_token
-from app.repositories.auth_repository import UserRepository
+from app.repositories.async_repositories import AsyncUserRepository
 
 logger = logging.getLogger("app.auth")
 
@@ -23,12 +25,12 @@ http_bearer = HTTPBearer(auto_error=False)
 def _get_token(credentials: Optional[HTTPAuthorizationCredentials], oauth2_token: Optional[str]) -> str:
     """Get token from either Bearer header or OAuth2 (Swagger form)."""
     if credentials is not None:
-        logger.info("Auth: token from Bearer header (len=%d)", len(credentials.credentials))
+        logger.debug("Auth: token from Bearer header")
         return credentials.credentials
     if oauth2_token is not None:
-        logger.info("Auth: token from OAuth2 (len=%d)", len(oauth2_token))
+        logger.debug("Auth: token from OAuth2")
         return oauth2_token
-    logger.warning("Auth: NO TOKEN – neither Bearer header nor OAuth2 present")
+    logger.info("Auth: no token (neither Bearer header nor OAuth2)")
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Not authenticated",
@@ -36,11 +38,34 @@ def _get_token(credentials: Optional[HTTPAuthorizationCredentials], oauth2_token
     )
 
 
-def get_current_user(
-    db: Session = Depends(get_db),
+async def _get_principal(db: AsyncSession, user_id: str) -> Optional[Principal]:
+    """The user's principal, from the principal cache or (on a miss) the database."""
+    generation = None
+    if PRINCIPAL_CACHE_ENABLED:
+        principal = principal_cache.get(user_id)
+        if principal is not None:
+            return principal
+        generation = principal_cache.generation()
+    # From the primary: a lagging replica could still accept a token revoked by logout
+    with use_primary(db):
+        user = await AsyncUserRepository.get_by_id(db, user_id)
+    if not user:
+        return None
+    principal = Principal.from_user(user)
+    if PRINCIPAL_CACHE_ENABLED:
+        principal_cache.set(principal, generation=generation)  # not if invalidated meanwhile
+    return principal
+
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db),
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(http_bearer),
     oauth2_token: Optional[str] = Depends(oauth2_scheme),
-):
+) -> Principal:
+    """
+    Authenticate the request's JWT and return the user's Principal (id, email, role, ...).
+    The user lookup is served from the principal cache when possible (else one async query).
+    """
     token = _get_token(credentials, oauth2_token)
     try:
         payload = decode_access_token(token)
@@ -48,18 +73,18 @@ def get_current_user(
         if not user_id:
             logger.warning("Auth: token has no 'sub' claim")
             raise ValueError("Missing subject")
-        logger.info("Auth: token decoded OK, user_id=%s", user_id)
     except Exception as e:
-        logger.warning("Auth: token decode failed – %s", e)
+        logger.info("Auth: token decode failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = UserRepository.get_by_id(db, user_id)
+    set_request_user(user_id)
+    user = await _get_principal(db, user_id)
     if not user:
-        logger.warning("Auth: user_id=%s not found in DB", user_id)
+        logger.info("Auth: user_id=%s not found", user_id)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
@@ -67,15 +92,15 @@ def get_current_user(
         )
     # Check token version: logout increments this to invalidate all sessions
     token_ver = payload.get("ver")
-    user_ver = str(user.token_version) if user.token_version else "0"
+    user_ver = user.token_version
     if token_ver != user_ver:
-        logger.warning("Auth: token version mismatch user=%s (token ver=%s, user ver=%s)", user.email, token_ver, user_ver)
+        logger.info("Auth: token version mismatch user_id=%s (token ver=%s, user ver=%s)", user.id, token_ver, user_ver)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Session expired",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    logger.info("Auth: OK user=%s", user.email)
+    logger.debug("Auth: OK user_id=%s", user.id)
     return user
 
 
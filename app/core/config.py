@@ -1,10 +1,187 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
+# Logging (see app/core/logging.py): root level, output format ("json" or "text"),
+# per-logger levels ("name=LEVEL,...") and sampling of INFO/DEBUG lines ("name=rate,...")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "app.access=0.1")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Database connection pool (per engine; ignored for in-memory SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+# Apply pending schema migrations at startup (app/core/migrations.py). When the schema is
+# current this costs one query; set to false when migrations run as a deploy step instead
+# ("python -m app.core.migrations").
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "true").lower() == "true"
+
+# SQLite production profile (file databases only): WAL journaling with synchronous=NORMAL,
+# memory-mapped reads, a page cache and a busy timeout instead of immediate "database is
+# locked" errors. With SQLITE_WRITE_QUEUE, repository writes are handed to one writer
+# thread that commits everything queued (up to SQLITE_WRITE_BATCH_MAX writes) in one
+# transaction, while reads run in parallel on the pooled connections.
+SQLITE_PRODUCTION_PROFILE = os.getenv("SQLITE_PRODUCTION_PROFILE", "true").lower() == "true"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000"))
+SQLITE_WRITE_QUEUE = os.getenv("SQLITE_WRITE_QUEUE", "true").lower() == "true"
+SQLITE_WRITE_BATCH_MAX = int(os.getenv("SQLITE_WRITE_BATCH_MAX", "64"))
+
+# Write-behind buffer for chat turns (any database): turns saved by concurrent requests are
+# collected for up to MESSAGE_WRITE_BEHIND_INTERVAL_MS, or until MESSAGE_WRITE_BEHIND_MAX_ROWS
+# messages are waiting, and inserted together in one transaction. Durability:
+# "flush" answers a request once its turn is committed; "immediate" answers as soon as the turn
+# is queued (lower latency, but a crash loses buffered turns, and reads see them only after
+# the flush).
+MESSAGE_WRITE_BEHIND_ENABLED = os.getenv("MESSAGE_WRITE_BEHIND_ENABLED", "false").lower() == "true"
+MESSAGE_WRITE_BEHIND_INTERVAL_MS = float(os.getenv("MESSAGE_WRITE_BEHIND_INTERVAL_MS", "5"))
+MESSAGE_WRITE_BEHIND_MAX_ROWS = int(os.getenv("MESSAGE_WRITE_BEHIND_MAX_ROWS", "500"))
+MESSAGE_WRITE_BEHIND_DURABILITY = os.getenv("MESSAGE_WRITE_BEHIND_DURABILITY", "flush").lower()
+
+# Read replica (DATABASE_READ_URL): plain reads go to the replica, writes to the primary.
+# For READ_YOUR_WRITES_SECONDS after a user's write, that user's reads use the primary, so
+# they never see replica lag on their own changes. Locally, "python -m app.core.replica_sync"
+# keeps a SQLite replica file in sync, copying every REPLICA_SYNC_INTERVAL_SECONDS.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+REPLICA_SYNC_INTERVAL_SECONDS = float(os.getenv("REPLICA_SYNC_INTERVAL_SECONDS", "1"))
+
+# Which AI provider to use: "groq" (default) or "fake" (local, for tests and load testing)
+AI_PROVIDER = os.getenv("AI_PROVIDER", "groq").lower()
+
+# Shared HTTP connection pool for provider calls (one pool per worker process)
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "1000"))
+GROQ_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GROQ_MAX_KEEPALIVE_CONNECTIONS", "100"))
+GROQ_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("GROQ_KEEPALIVE_EXPIRY_SECONDS", "30"))
+GROQ_CONNECT_TIMEOUT_SECONDS = float(os.getenv("GROQ_CONNECT_TIMEOUT_SECONDS", "5"))
+GROQ_TIMEOUT_SECONDS = float(os.getenv("GROQ_TIMEOUT_SECONDS", "60"))
+
+# Fake provider behaviour (only used when AI_PROVIDER=fake)
+FAKE_PROVIDER_LATENCY_MS = float(os.getenv("FAKE_PROVIDER_LATENCY_MS", "0"))
+FAKE_PROVIDER_TOKENS_PER_SECOND = float(os.getenv("FAKE_PROVIDER_TOKENS_PER_SECOND", "0"))
+FAKE_PROVIDER_REPLY_TOKENS = int(os.getenv("FAKE_PROVIDER_REPLY_TOKENS", "20"))
+FAKE_PROVIDER_ERROR_RATE = float(os.getenv("FAKE_PROVIDER_ERROR_RATE", "0"))
+FAKE_PROVIDER_STREAM_CHUNKS = os.getenv("FAKE_PROVIDER_STREAM_CHUNKS", "true").lower() == "true"
+FAKE_PROVIDER_SEED = int(os.getenv("FAKE_PROVIDER_SEED", "0"))
+
+# Provider resilience: timeout per attempt, jittered retries, circuit breaker, hedged requests
+PROVIDER_RESILIENCE_ENABLED = os.getenv("PROVIDER_RESILIENCE_ENABLED", "true").lower() == "true"
+PROVIDER_TIMEOUT_SECONDS = float(os.getenv("PROVIDER_TIMEOUT_SECONDS", "30"))
+PROVIDER_MAX_RETRIES = int(os.getenv("PROVIDER_MAX_RETRIES", "2"))
+PROVIDER_RETRY_BACKOFF_SECONDS = float(os.getenv("PROVIDER_RETRY_BACKOFF_SECONDS", "0.25"))
+PROVIDER_RETRY_BACKOFF_MAX_SECONDS = float(os.getenv("PROVIDER_RETRY_BACKOFF_MAX_SECONDS", "4"))
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5"))
+CIRCUIT_BREAKER_RESET_SECONDS = float(os.getenv("CIRCUIT_BREAKER_RESET_SECONDS", "30"))
+# Hedging is off unless HEDGE_PERCENTILE is set (e.g. 95); the hedge goes to HEDGE_MODEL
+# and/or HEDGE_PROVIDER (defaults: same model, same provider)
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE")) if os.getenv("HEDGE_PERCENTILE") else None
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_MODEL = os.getenv("HEDGE_MODEL") or None
+HEDGE_PROVIDER = os.getenv("HEDGE_PROVIDER") or None
+
+# Model routing per request. "rules": prompts of at least ROUTER_LARGE_MIN_PROMPT_TOKENS tokens
+# or conversations of at least ROUTER_LARGE_MIN_MESSAGES messages go to ROUTER_LARGE_MODEL;
+# "tier": the user's role picks the model from ROUTER_TIER_MODELS ("admin=model,user=model").
+# Everything else uses ROUTER_DEFAULT_MODEL (default: the provider's default model).
+# With ROUTER_LATENCY_BUDGET_SECONDS set, a model whose recent ROUTER_LATENCY_PERCENTILE latency
+# exceeds the budget is skipped for ROUTER_FALLBACK_MODEL (default: the default model), except for
+# one probe request in every ROUTER_PROBE_EVERY so its latency keeps being measured.
+MODEL_ROUTER_POLICY = os.getenv("MODEL_ROUTER_POLICY", "rules").lower()
+ROUTER_DEFAULT_MODEL = os.getenv("ROUTER_DEFAULT_MODEL") or None
+ROUTER_LARGE_MODEL = os.getenv("ROUTER_LARGE_MODEL") or None
+ROUTER_LARGE_MIN_PROMPT_TOKENS = int(os.getenv("ROUTER_LARGE_MIN_PROMPT_TOKENS", "1500"))
+ROUTER_LARGE_MIN_MESSAGES = int(os.getenv("ROUTER_LARGE_MIN_MESSAGES", "20"))
+ROUTER_TIER_MODELS = os.getenv("ROUTER_TIER_MODELS", "")
+ROUTER_LATENCY_BUDGET_SECONDS = (
+    float(os.getenv("ROUTER_LATENCY_BUDGET_SECONDS")) if os.getenv("ROUTER_LATENCY_BUDGET_SECONDS") else None
+)
+ROUTER_LATENCY_PERCENTILE = float(os.getenv("ROUTER_LATENCY_PERCENTILE", "95"))
+ROUTER_LATENCY_MIN_SAMPLES = int(os.getenv("ROUTER_LATENCY_MIN_SAMPLES", "20"))
+ROUTER_FALLBACK_MODEL = os.getenv("ROUTER_FALLBACK_MODEL") or None
+ROUTER_PROBE_EVERY = int(os.getenv("ROUTER_PROBE_EVERY", "10"))
+
+# Rate limiting of LLM calls: token bucket per user, plus a global cap on concurrent upstream
+# calls (callers queue up to LLM_QUEUE_TIMEOUT_SECONDS for a slot before getting a 429)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "30"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "10"))
+RATE_LIMIT_MAX_TRACKED_USERS = int(os.getenv("RATE_LIMIT_MAX_TRACKED_USERS", "100000"))
+LLM_MAX_CONCURRENT_CALLS = int(os.getenv("LLM_MAX_CONCURRENT_CALLS", "64"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "5"))
+
+# Password hashing: bcrypt cost factor, and a process pool so hashing never runs on request
+# threads (PASSWORD_HASH_WORKERS=0 hashes in the threadpool instead). At most
+# PASSWORD_HASH_MAX_CONCURRENT hashes are queued or running; further logins wait up to
+# PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS, then get a 429.
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_CONCURRENT = int(os.getenv("PASSWORD_HASH_MAX_CONCURRENT", "16"))
+PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", "5"))
+
+# Cache of authenticated users (role, token version) so requests skip the user lookup.
+# Logout and role changes invalidate entries in all worker processes on the host through
+# PRINCIPAL_INVALIDATION_FILE (workers on other hosts see changes within the TTL).
+PRINCIPAL_CACHE_ENABLED = os.getenv("PRINCIPAL_CACHE_ENABLED", "true").lower() == "true"
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+PRINCIPAL_INVALIDATION_FILE = os.getenv(
+    "PRINCIPAL_INVALIDATION_FILE",
+    os.path.join(tempfile.gettempdir(), "ai-chat-principal-invalidations"),
+)
+
+# Provider latency histograms (TTFT, duration, tokens/sec, queue wait), served at GET /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Batch chat endpoint: items per request, and how many of a batch's items run at once. A batch
+# is charged to the user's rate limit up front (one token per item), so with rate limiting on
+# it can have at most RATE_LIMIT_BURST items.
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+if RATE_LIMIT_ENABLED:
+    BATCH_MAX_ITEMS = min(BATCH_MAX_ITEMS, RATE_LIMIT_BURST)
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+# Context window assembly: newest messages that fit CONTEXT_TOKEN_BUDGET, minus the system
+# prompt and RESPONSE_TOKEN_RESERVE tokens left for the reply
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+RESPONSE_TOKEN_RESERVE = int(os.getenv("RESPONSE_TOKEN_RESERVE", "1024"))
+
+# Rolling summaries of messages that fell out of the context window (background worker)
+SUMMARY_WORKER_ENABLED = os.getenv("SUMMARY_WORKER_ENABLED", "true").lower() == "true"
+SUMMARY_MAX_MESSAGES_PER_RUN = int(os.getenv("SUMMARY_MAX_MESSAGES_PER_RUN", "40"))
+SUMMARY_MAX_WORDS = int(os.getenv("SUMMARY_MAX_WORDS", "250"))
+SUMMARY_POLL_INTERVAL_SECONDS = float(os.getenv("SUMMARY_POLL_INTERVAL_SECONDS", "60"))
+SUMMARY_DEBOUNCE_SECONDS = float(os.getenv("SUMMARY_DEBOUNCE_SECONDS", "1"))
+
+# Exact-match cache for completions and titles (bounded LRU with TTL)
+COMPLETION_CACHE_ENABLED = os.getenv("COMPLETION_CACHE_ENABLED", "true").lower() == "true"
+COMPLETION_CACHE_MAX_ENTRIES = int(os.getenv("COMPLETION_CACHE_MAX_ENTRIES", "1000"))
+COMPLETION_CACHE_TTL_SECONDS = float(os.getenv("COMPLETION_CACHE_TTL_SECONDS", "600"))
+
+# Opt-in near-duplicate cache for first-turn prompts (casing/punctuation/filler-word variants);
+# the threshold is the share of equal SimHash bits (0.9 = at most 6 of 64 bits differ)
+NEAR_DUP_CACHE_ENABLED = os.getenv("NEAR_DUP_CACHE_ENABLED", "false").lower() == "true"
+NEAR_DUP_CACHE_THRESHOLD = float(os.getenv("NEAR_DUP_CACHE_THRESHOLD", "0.9"))
+NEAR_DUP_CACHE_MAX_ENTRIES = int(os.getenv("NEAR_DUP_CACHE_MAX_ENTRIES", "5000"))
+NEAR_DUP_CACHE_TTL_SECONDS = float(os.getenv("NEAR_DUP_CACHE_TTL_SECONDS", "3600"))
+
+# Coalesce identical concurrent provider requests into one upstream call
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+# Background chat-title generation. When the worker is disabled (e.g. serverless deployments
+# without long-lived processes), titles are generated inline on the first message instead.
+TITLE_WORKER_ENABLED = os.getenv("TITLE_WORKER_ENABLED", "true").lower() == "true"
+TITLE_BATCH_SIZE = int(os.getenv("TITLE_BATCH_SIZE", "10"))
+TITLE_POLL_INTERVAL_SECONDS = float(os.getenv("TITLE_POLL_INTERVAL_SECONDS", "30"))
+TITLE_DEBOUNCE_SECONDS = float(os.getenv("TITLE_DEBOUNCE_SECONDS", "0.5"))
+TITLE_MAX_ATTEMPTS = int(os.getenv("TITLE_MAX_ATTEMPTS", "3"))
+
 SYSTEM_PROMPT = (
     "You are a helpful, friendly AI assistant. "
     "Answer clearly and concisely."
@@ -1,13 +1,33 @@
 """
 Database configuration and session management
 """
-from sqlalchemy import create_engine, text
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import UpdateBase
 import os
 
 from dotenv import load_dotenv
 
+from app.core.config import (
+    DB_MAX_OVERFLOW,
+    DB_POOL_SIZE,
+    READ_YOUR_WRITES_SECONDS,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_MMAP_SIZE,
+    SQLITE_PRODUCTION_PROFILE,
+)
+
 # Ensure environment variables from .env are loaded before reading DATABASE_URL
 load_dotenv()
 
@@ -16,14 +36,219 @@ load_dotenv()
 _default_db = "sqlite:////tmp/ai_chat.db" if os.getenv("VERCEL") else "sqlite:///./ai_chat.db"
 DATABASE_URL = os.getenv("DATABASE_URL", _default_db)
 
-# Create engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+# Optional read replica (see RoutingSession); unset means everything uses DATABASE_URL
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL") or None
+
+
+def is_sqlite_file(url: str) -> bool:
+    return url.startswith("sqlite") and ":memory:" not in url and url.split("://", 1)[-1] not in ("", "/")
+
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+IS_SQLITE_FILE = is_sqlite_file(DATABASE_URL)
+
+# Set on every new connection when SQLITE_PRODUCTION_PROFILE is on (journal_mode is stored
+# in the database file; the others are per connection)
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    f"busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+    f"mmap_size={SQLITE_MMAP_SIZE}",
+    f"cache_size=-{SQLITE_CACHE_SIZE_KB}",
+    "temp_store=MEMORY",
 )
+SQLITE_PROFILE_ACTIVE = IS_SQLITE_FILE and SQLITE_PRODUCTION_PROFILE
+
+
+def engine_options(url: str = DATABASE_URL) -> dict:
+    """create_engine() arguments for a database URL (SQLite thread check off, sized pool)."""
+    options = {}
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+    if not url.startswith("sqlite") or is_sqlite_file(url):
+        options["pool_size"] = DB_POOL_SIZE
+        options["max_overflow"] = DB_MAX_OVERFLOW
+    return options
+
+
+def apply_sqlite_profile(target: Engine) -> None:
+    """Run SQLITE_PRAGMAS on every new DBAPI connection of a (sync or async-adapted) engine."""
+
+    @event.listens_for(target, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in SQLITE_PRAGMAS:
+                cursor.execute(f"PRAGMA {pragma}")
+        finally:
+            cursor.close()
+
+
+def create_db_engine(url: str) -> Engine:
+    """Sync engine for a database URL, with the SQLite profile when it applies."""
+    target = create_engine(url, **engine_options(url))
+    if SQLITE_PRODUCTION_PROFILE and is_sqlite_file(url):
+        apply_sqlite_profile(target)
+    return target
+
+
+# Read routing. Sessions send plain SELECTs to the read replica and everything else (flushes,
+# UPDATE/INSERT/DELETE, raw SQL) to the primary. A session stays on the primary once it has
+# written, and inside use_primary(). For READ_YOUR_WRITES_SECONDS after a write, reads made on
+# behalf of the same user (set_request_user(), called by the auth dependency) also use the
+# primary. Write times are kept per process, so a user whose next request lands on another
+# worker may still see replica lag; the window should cover the replica's usual lag.
+READ_BIND_KEY = "read_bind"
+USE_PRIMARY_KEY = "use_primary"
+WROTE_KEY = "wrote"
+
+_request_user: ContextVar[Optional[str]] = ContextVar("request_user", default=None)
+_last_write: Dict[str, float] = {}
+_last_write_lock = threading.Lock()
+
+
+def set_request_user(user_id: Optional[str]) -> None:
+    """Record whose request this is, for read-your-writes routing."""
+    _request_user.set(user_id)
+
+
+def note_write() -> None:
+    """Send the current request user's reads to the primary for READ_YOUR_WRITES_SECONDS."""
+    user_id = _request_user.get()
+    if user_id is None:
+        return
+    now = time.monotonic()
+    with _last_write_lock:
+        _last_write[user_id] = now
+        if len(_last_write) > 10000:
+            # Drop users whose window has passed, so the map stays small
+            for stale in [u for u, t in _last_write.items() if now - t > READ_YOUR_WRITES_SECONDS]:
+                del _last_write[stale]
+
+
+def wrote_recently(user_id: Optional[str] = None) -> bool:
+    """Whether the user (default: the request user) wrote within READ_YOUR_WRITES_SECONDS."""
+    user_id = user_id if user_id is not None else _request_user.get()
+    if user_id is None:
+        return False
+    written_at = _last_write.get(user_id)
+    return written_at is not None and time.monotonic() - written_at < READ_YOUR_WRITES_SECONDS
+
+
+@contextmanager
+def use_primary(db) -> Iterator[None]:
+    """Within the block, send the session's (Session or AsyncSession) reads to the primary."""
+    previous = db.info.get(USE_PRIMARY_KEY, False)
+    db.info[USE_PRIMARY_KEY] = True
+    try:
+        yield
+    finally:
+        db.info[USE_PRIMARY_KEY] = previous
+
+
+class RoutingSession(Session):
+    """Session that reads from info["read_bind"] (the replica engine) when it is safe to."""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        primary = super().get_bind(mapper, clause=clause, **kw)
+        replica = self.info.get(READ_BIND_KEY)
+        if replica is None:
+            return primary
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info[WROTE_KEY] = True
+            note_write()
+            return primary
+        if not isinstance(clause, Select):
+            # Raw SQL, or a connection requested without a statement: may write
+            self.info[WROTE_KEY] = True
+            return primary
+        if self.info.get(WROTE_KEY) or self.info.get(USE_PRIMARY_KEY) or wrote_recently():
+            return primary
+        return replica
+
+
+# Create engines
+engine = create_db_engine(DATABASE_URL)
+read_engine: Optional[Engine] = create_db_engine(DATABASE_READ_URL) if DATABASE_READ_URL else None
 
 # Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    info={READ_BIND_KEY: read_engine},
+)
+
+
+def async_database_url(url: str) -> str:
+    """The async-driver form of a database URL (aiosqlite for SQLite, asyncpg for Postgres)."""
+    scheme, sep, rest = url.partition("://")
+    driver = {
+        "sqlite": "sqlite+aiosqlite",
+        "postgres": "postgresql+asyncpg",
+        "postgresql": "postgresql+asyncpg",
+        "postgresql+psycopg2": "postgresql+asyncpg",
+    }.get(scheme, scheme)
+    return f"{driver}{sep}{rest}"
+
+
+# Async engine for endpoints that await DB work instead of using the threadpool.
+# Created on first use, so deployments that never use it need no async driver.
+_async_engine: Optional[AsyncEngine] = None
+_async_read_engine: Optional[AsyncEngine] = None
+_async_sessionmaker: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(async_database_url(DATABASE_URL), **engine_options())
+        if SQLITE_PROFILE_ACTIVE:
+            apply_sqlite_profile(_async_engine.sync_engine)
+    return _async_engine
+
+
+def get_async_read_engine() -> Optional[AsyncEngine]:
+    """Async engine for DATABASE_READ_URL, or None without a read replica."""
+    global _async_read_engine
+    if _async_read_engine is None and DATABASE_READ_URL:
+        _async_read_engine = create_async_engine(
+            async_database_url(DATABASE_READ_URL), **engine_options(DATABASE_READ_URL)
+        )
+        if SQLITE_PRODUCTION_PROFILE and is_sqlite_file(DATABASE_READ_URL):
+            apply_sqlite_profile(_async_read_engine.sync_engine)
+    return _async_read_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    """
+    New AsyncSession. Objects are not expired on commit, so their attributes stay readable
+    afterwards without another (implicit, unawaitable) load.
+    """
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        read = get_async_read_engine()
+        _async_sessionmaker = async_sessionmaker(
+            get_async_engine(),
+            sync_session_class=RoutingSession,
+            autoflush=False,
+            expire_on_commit=False,
+            info={READ_BIND_KEY: read.sync_engine if read is not None else None},
+        )
+    return _async_sessionmaker()
+
+
+async def dispose_async_engine() -> None:
+    """Close the async engine's connections (call on app shutdown)."""
+    global _async_engine, _async_read_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_sessionmaker = None
+    if _async_read_engine is not None:
+        await _async_read_engine.dispose()
+        _async_read_engine = None
 
 # Base class for models
 Base = declarative_base()
@@ -40,22 +265,18 @@ def get_db():
         db.close()
 
 
-def _migrate_token_version():
-    """Add token_version column to users if it doesn't exist (for existing DBs)."""
-    try:
-        with engine.connect() as conn:
-            conn.execute(text("ALTER TABLE users ADD COLUMN token_version VARCHAR DEFAULT '0'"))
-            conn.commit()
-    except Exception:
-        pass  # Column likely already exists
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency function to get an async database session (use with the Async* repositories)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
 
 
 def init_db():
     """
-    Initialize database - create all tables
+    Bring the database schema up to date (see app/core/migrations.py).
+    When the schema is current this is a single version query, with no DDL.
     """
-    # Ensure models are imported before creating tables
-    # (otherwise Base.metadata may be empty at startup)
-    from app.models import database  # noqa: F401
-    Base.metadata.create_all(bind=engine)
-    _migrate_token_version()
+    from app.core.migrations import migrate
+    migrate(engine)
@@ -0,0 +1,237 @@
+"""
+Single-writer queue for SQLite.
+
+SQLite allows one writer at a time; concurrent commits from request threads queue up on the
+database lock (and fail with "database is locked" once the busy timeout runs out). Instead,
+repository methods decorated with @writes hand their work to one writer thread with its own
+connection. The thread takes everything queued (up to SQLITE_WRITE_BATCH_MAX writes) and runs
+it in one transaction, each write in its own savepoint so a failing write does not affect the
+others, then commits once: one fsync for the whole group. Callers wait for the commit and get
+the method's return value (ORM objects come back detached, with their attributes loaded).
+
+Reads are not affected: they keep using the pooled connections (in parallel, under WAL).
+The queue is only used for SQLite file databases with SQLITE_WRITE_QUEUE on; otherwise
+decorated methods run directly on the caller's session.
+"""
+import functools
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import SQLITE_WRITE_BATCH_MAX, SQLITE_WRITE_QUEUE
+from app.core.database import (
+    DATABASE_URL,
+    IS_SQLITE_FILE,
+    SQLITE_PROFILE_ACTIVE,
+    apply_sqlite_profile,
+    note_write,
+    use_primary,
+)
+
+logger = logging.getLogger("app.db")
+
+# Marks the writer's session in Session.info, so nested @writes calls run in place
+WRITER_SESSION_KEY = "single_writer"
+
+
+class WriterSession(Session):
+    """
+    Session of the writer thread. Repository methods call commit() as usual; here that only
+    flushes, and the writer commits the whole group with commit_group(). Callbacks registered
+    with after_commit() run once that group commit has succeeded.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.after_commit_callbacks: List[Callable[[], None]] = []
+
+    def commit(self) -> None:
+        self.flush()
+
+    def commit_group(self) -> None:
+        super().commit()
+
+
+def after_commit(db: Session, callback: Callable[[], None]) -> None:
+    """
+    Run callback once the writes made so far on db are committed: right away on a regular
+    session (call it after db.commit()), after the group commit on the writer's session.
+    Use it for side effects others must not see early, like cache invalidation.
+    """
+    if isinstance(db, WriterSession):
+        db.after_commit_callbacks.append(callback)
+    else:
+        callback()
+
+
+@dataclass
+class _WriteJob:
+    fn: Callable[..., Any]
+    args: Tuple[Any, ...]
+    kwargs: Dict[str, Any]
+    future: Future = field(default_factory=Future)
+
+
+def create_writer_engine(url: str = DATABASE_URL, profile: bool = SQLITE_PROFILE_ACTIVE) -> Engine:
+    """
+    Engine with the writer's single connection. Transactions start with BEGIN IMMEDIATE
+    (taking the write lock up front) and are managed by SQLAlchemy rather than the sqlite3
+    module, which savepoints require.
+    """
+    writer_engine = create_engine(url, connect_args={"check_same_thread": False}, pool_size=1, max_overflow=0)
+    if profile:
+        apply_sqlite_profile(writer_engine)
+
+    @event.listens_for(writer_engine, "connect")
+    def _manual_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(writer_engine, "begin")
+    def _begin_immediate(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return writer_engine
+
+
+class SingleWriter:
+    """One thread that runs submitted writes in group-committed transactions (see module docstring)."""
+
+    def __init__(self, writer_engine: Engine, max_batch: int = SQLITE_WRITE_BATCH_MAX):
+        self.engine = writer_engine
+        self.max_batch = max(1, max_batch)
+        self._session_factory = sessionmaker(
+            bind=writer_engine, class_=WriterSession, autoflush=False, expire_on_commit=False,
+            info={WRITER_SESSION_KEY: True},
+        )
+        self._queue: "queue.Queue[Optional[_WriteJob]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.transactions = 0
+        self.writes = 0
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Queue fn(session, *args, **kwargs); the future resolves once its transaction committed."""
+        job = _WriteJob(fn, args, kwargs)
+        note_write()  # here, on the request's context: the writer thread has no request user
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+                self._thread.start()
+            self._queue.put(job)
+        return job.future
+
+    def stop(self) -> None:
+        """Commit what is queued, then stop the thread (submit() starts a new one)."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(None)
+        if thread is not None:
+            thread.join()
+        self.engine.dispose()
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            batch = [job]
+            stopping = False
+            while len(batch) < self.max_batch:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+            self._commit_group(batch)
+            if stopping:
+                return
+
+    def _commit_group(self, batch) -> None:
+        outcomes = []
+        session = self._session_factory()
+        try:
+            for job in batch:
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                registered = len(session.after_commit_callbacks)
+                try:
+                    with session.begin_nested():
+                        outcomes.append((job, job.fn(session, *job.args, **job.kwargs), None))
+                except Exception as e:
+                    del session.after_commit_callbacks[registered:]  # rolled back: nothing to announce
+                    outcomes.append((job, None, e))
+            session.commit_group()
+        except Exception as e:
+            logger.exception("Group commit of %d writes failed", len(outcomes))
+            session.rollback()
+            session.after_commit_callbacks.clear()
+            outcomes = [(job, None, e) for job, _, _ in outcomes]
+        finally:
+            session.close()
+        for callback in session.after_commit_callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("After-commit callback failed")
+        self.transactions += 1
+        self.writes += len(outcomes)
+        for job, value, error in outcomes:
+            if error is None:
+                job.future.set_result(value)
+            else:
+                job.future.set_exception(error)
+
+
+_writer: Optional[SingleWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_db_writer() -> Optional[SingleWriter]:
+    """The process-wide writer, or None when writes go straight to the caller's session."""
+    global _writer
+    if not (IS_SQLITE_FILE and SQLITE_WRITE_QUEUE):
+        return None
+    with _writer_lock:
+        if _writer is None:
+            _writer = SingleWriter(create_writer_engine())
+        return _writer
+
+
+def shutdown_db_writer() -> None:
+    """Commit queued writes and stop the writer thread (call on app shutdown)."""
+    if _writer is not None:
+        _writer.stop()
+
+
+def writes(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Decorator for repository methods that write (first argument: the Session). When the
+    writer queue is on, the call runs on the writer thread and blocks until committed;
+    the caller's session is expired afterwards, as its own commit would have done.
+    Otherwise it runs on the caller's session with its reads on the primary: a read that
+    decides a write (token_version + 1, "only if untitled") must not come from a replica.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(db: Session, *args: Any, **kwargs: Any) -> Any:
+        writer = get_db_writer()
+        if writer is None or db.info.get(WRITER_SESSION_KEY):
+            with use_primary(db):
+                return fn(db, *args, **kwargs)
+        result = writer.submit(fn, *args, **kwargs).result()
+        db.expire_all()
+        return result
+
+    wrapper.db_write = True
+    return wrapper
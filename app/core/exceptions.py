@@ -1,6 +1,9 @@
 """
 Custom exception classes for the application
 """
+import math
+from typing import Optional
+
 from fastapi import HTTPException, status
 
 
@@ -33,8 +36,28 @@ class UnauthorizedChatAccessError(HTTPException):
 
 class AIProviderError(HTTPException):
     """Raised when AI provider fails"""
-    def __init__(self, message: str = "AI service temporarily unavailable"):
+    def __init__(self, message: str = "AI service temporarily unavailable", retry_after: Optional[float] = None):
         super().__init__(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=message
+            detail=message,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))} if retry_after is not None else None,
+        )
+
+
+class RateLimitExceededError(HTTPException):
+    """Raised when a user (or the server as a whole) is over its AI request limit"""
+    def __init__(self, detail: str = "Too many requests, please slow down", retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(max(1, retry_after))},
+        )
+
+
+class InvalidCursorError(HTTPException):
+    """Raised when a pagination cursor is malformed (or both directions are given)"""
+    def __init__(self, detail: str = "Invalid pagination cursor"):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail,
         )
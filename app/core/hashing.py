@@ -0,0 +1,80 @@
+"""
+Password hashing off the request path.
+
+bcrypt costs ~100-300 ms of CPU per call, so hashes run in a small dedicated process pool
+(PASSWORD_HASH_WORKERS processes): a login storm then uses at most that many cores and never
+holds the GIL or threadpool threads needed by the chat endpoints. The number of hashes
+queued or running is capped; beyond that, logins get a 429 instead of piling up.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import (
+    PASSWORD_HASH_MAX_CONCURRENT,
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS,
+    PASSWORD_HASH_WORKERS,
+)
+from app.core.rate_limit import ConcurrencyLimiter
+from app.core.security import hash_password, is_bcrypt_hash, verify_password
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+password_hash_limiter = ConcurrencyLimiter(
+    max_concurrent=PASSWORD_HASH_MAX_CONCURRENT,
+    queue_timeout_seconds=PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS,
+    detail="Too many logins in progress, please retry shortly",
+)
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if PASSWORD_HASH_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: forking a process that runs an event loop and threads is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+async def _run(fn, *args):
+    async with password_hash_limiter.slot():
+        pool = _get_pool()
+        if pool is None:
+            return await run_in_threadpool(fn, *args)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            shutdown_hashing()  # a worker died; start a fresh pool on the next call
+            raise
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password in the hashing pool."""
+    return await _run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: Optional[str]) -> bool:
+    """verify_password in the hashing pool (legacy plaintext values are compared inline)."""
+    if not is_bcrypt_hash(hashed_password or ""):
+        return verify_password(plain_password, hashed_password)
+    return await _run(verify_password, plain_password, hashed_password)
+
+
+def shutdown_hashing() -> None:
+    """Stop the hashing processes (call on app shutdown)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
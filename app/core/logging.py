@@ -0,0 +1,168 @@
+"""
+Logging setup: structured (JSON) output written by a background thread.
+
+Request code only renders the message and puts the record on a queue (QueueHandler); JSON
+serialization and I/O happen on the QueueListener thread. High-volume INFO/DEBUG loggers (e.g. the per-request
+access log) can be sampled, and levels can be set per logger:
+
+    LOG_LEVEL=INFO
+    LOG_LEVELS=app.auth=DEBUG,app.providers=WARNING
+    LOG_SAMPLE_RATES=app.access=0.1
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from app.core.config import LOG_FORMAT, LOG_LEVEL, LOG_LEVELS, LOG_QUEUE_SIZE, LOG_SAMPLE_RATES
+
+# Attributes every LogRecord has; anything else was passed via extra= and is emitted as a field
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_exception_formatter = logging.Formatter()
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """Parse "logger=value,logger=value" (as in LOG_LEVELS / LOG_SAMPLE_RATES) into a dict."""
+    values = {}
+    for part in spec.split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            if name.strip() and value.strip():
+                values[name.strip()] = value.strip()
+    return values
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, message, extra fields and exception."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of INFO/DEBUG records from the configured loggers (and their
+    children). Warnings and errors are never dropped. Kept records carry sample_rate.
+    """
+
+    def __init__(self, rates: Dict[str, float], rng: random.Random = None):
+        super().__init__()
+        self.rates = rates
+        self._rng = rng or random.Random()
+
+    def _rate(self, name: str) -> Optional[float]:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate is None or rate >= 1:
+            return True
+        if self._rng.random() >= rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves the output formatting to the listener thread (the stock handler
+    runs the whole formatter on the calling thread). The message is still merged with its
+    arguments here, as arguments may be mutated once the call returns. When the queue is
+    full, records are dropped and counted rather than blocking the caller.
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)  # other handlers still see the original
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            # The traceback keeps every frame alive; only its text goes on the queue
+            record.exc_text = record.exc_text or _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1  # never block (or print tracebacks from) the request path
+
+
+def configure_logging(
+    level: str = LOG_LEVEL,
+    fmt: str = LOG_FORMAT,
+    logger_levels: str = LOG_LEVELS,
+    sample_rates: str = LOG_SAMPLE_RATES,
+    stream=None,
+) -> logging.handlers.QueueListener:
+    """
+    Route the root logger through a bounded queue to a stream handler on a background thread.
+    Safe to call again (the previous listener is stopped and replaced).
+    """
+    global _listener
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    if fmt == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s", "%H:%M:%S"))
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = _DeferredQueueHandler(log_queue)
+    rates = {name: float(rate) for name, rate in parse_levels(sample_rates).items()}
+    if rates:
+        handler.addFilter(SamplingFilter(rates))
+
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if isinstance(h, _DeferredQueueHandler)]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    for name, logger_level in parse_levels(logger_levels).items():
+        logging.getLogger(name).setLevel(logger_level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,159 @@
+"""
+In-process metrics: labeled histograms rendered in the Prometheus text format.
+
+Each worker process keeps its own values (scrape every worker, or aggregate in Prometheus).
+"""
+import math
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+RATE_BUCKETS = (5, 10, 25, 50, 100, 200, 400, 800, 1600)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with a fixed set of label names.
+    Thread-safe; observe() is O(number of buckets).
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one value for the given label values (all label names are required)."""
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * len(self.buckets), 0.0, 0]
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels: str) -> int:
+        """Number of observations for the given label values."""
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            return series[2] if series else 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        """Prometheus text exposition lines for this histogram."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+        for key, (bucket_counts, total, count) in series:
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, key)]
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                lines.append(f"{self.name}_bucket{_labels(labels, _format(bound))} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_labels(labels, '+Inf')} {count}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {_format(total)}")
+            lines.append(f"{self.name}_count{_labels(labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of histograms, rendered together for GET /metrics."""
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str],
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        """Return the histogram called name, creating it on first use."""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = Histogram(name, documentation, label_names, buckets)
+                self._histograms[name] = histogram
+            return histogram
+
+    def get(self, name: str) -> Optional[Histogram]:
+        return self._histograms.get(name)
+
+    def clear(self) -> None:
+        """Drop all recorded values (keeps the histograms registered)."""
+        for histogram in list(self._histograms.values()):
+            histogram.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for histogram in list(self._histograms.values()):
+            lines.extend(histogram.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: List[str], le: Optional[str] = None) -> str:
+    """Render a {name="value",...} label set, optionally with the le bucket label."""
+    if le is not None:
+        labels = labels + [f'le="{le}"']
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def _format(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value))
+
+
+registry = MetricsRegistry()
+
+# LLM call instrumentation (labels: model, operation = completion/stream/title/titles, outcome)
+_LLM_LABELS = ("model", "operation", "outcome")
+llm_time_to_first_token = registry.histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from dispatch to the first reply token (the whole reply for non-streaming calls)",
+    _LLM_LABELS,
+)
+llm_request_duration = registry.histogram(
+    "llm_request_duration_seconds",
+    "Time from dispatch until the provider call finished",
+    _LLM_LABELS,
+)
+llm_prompt_tokens = registry.histogram(
+    "llm_prompt_tokens",
+    "Prompt tokens reported by the provider",
+    _LLM_LABELS,
+    TOKEN_BUCKETS,
+)
+llm_completion_tokens = registry.histogram(
+    "llm_completion_tokens",
+    "Completion tokens reported by the provider (estimated for streams)",
+    _LLM_LABELS,
+    TOKEN_BUCKETS,
+)
+llm_tokens_per_second = registry.histogram(
+    "llm_tokens_per_second",
+    "Completion tokens per second of generation time",
+    _LLM_LABELS,
+    RATE_BUCKETS,
+)
+llm_queue_wait = registry.histogram(
+    "llm_queue_wait_seconds",
+    "Time a request waited for an upstream slot before dispatch",
+    ("model", "outcome"),
+)
@@ -0,0 +1,198 @@
+"""
+Versioned schema migrations.
+
+The schema_version table records which migrations have been applied. At startup, init_db()
+reads the current version (one query) and only runs DDL when migrations are pending, so a
+cold start on an up-to-date database does no schema work. A new database is created from
+the models in one go and stamped with the latest version.
+
+Migrations are idempotent (columns and indexes are only added when missing), because
+databases from before versioning start at version 0 with part of the schema in place.
+Index migrations are not run in a transaction; on Postgres they use CREATE INDEX
+CONCURRENTLY so writes continue while the index builds.
+
+Run pending migrations without starting the app (e.g. in a deploy step):
+
+    python -m app.core.migrations
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional, Union
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+from app.core.database import Base, engine
+from app.models import database as models  # noqa: F401  (registers the tables on Base.metadata)
+from app.repositories.message_repository import message_preview
+
+logger = logging.getLogger("app.db")
+
+# Key for pg_advisory_lock, so only one process migrates a Postgres database at a time
+ADVISORY_LOCK_KEY = 0x61694368  # "aiCh"
+
+_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One schema change. Non-transactional migrations get an autocommit connection."""
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+    transactional: bool = True
+
+
+def add_column(
+    conn: Connection, table: str, column_ddl: str, backfill: Union[str, Callable[[Connection], None], None] = None
+) -> None:
+    """
+    Add a column (DDL after the name, e.g. "summary TEXT") if missing, then run the backfill:
+    SQL, or a Python data step for values the application computes.
+    """
+    name = column_ddl.split()[0]
+    if name in {column["name"] for column in inspect(conn).get_columns(table)}:
+        return
+    conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column_ddl}")
+    if callable(backfill):
+        backfill(conn)
+    elif backfill:
+        conn.exec_driver_sql(backfill)
+
+
+def create_index(conn: Connection, table: str, name: str, columns: List[str]) -> None:
+    """Create an index if missing (CONCURRENTLY on Postgres: needs an autocommit connection)."""
+    concurrently = "CONCURRENTLY " if conn.dialect.name == "postgresql" else ""
+    conn.exec_driver_sql(f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+
+
+def _baseline(conn: Connection) -> None:
+    # Tables that are missing entirely are created in their current shape; the column
+    # migrations below then find nothing to add to them
+    Base.metadata.create_all(conn)
+
+
+def _chat_summary(conn: Connection) -> None:
+    add_column(conn, "chats", "summary TEXT")
+    add_column(conn, "chats", "summary_through_id INTEGER")
+
+
+def _backfill_previews(conn: Connection, batch_size: int = 1000) -> None:
+    # Same preview as new writes (whitespace collapsed, "…" when cut), which SQL cannot express portably
+    latest = conn.exec_driver_sql(
+        "SELECT m.chat_id, m.content FROM messages m "
+        "WHERE m.id = (SELECT MAX(id) FROM messages WHERE messages.chat_id = m.chat_id)"
+    ).fetchall()
+    update = text("UPDATE chats SET last_message_preview = :preview WHERE id = :chat_id")
+    for start in range(0, len(latest), batch_size):
+        batch = latest[start:start + batch_size]
+        conn.execute(update, [{"chat_id": chat_id, "preview": message_preview(content)} for chat_id, content in batch])
+
+
+def _chat_counters(conn: Connection) -> None:
+    add_column(
+        conn,
+        "chats",
+        "message_count INTEGER NOT NULL DEFAULT 0",
+        "UPDATE chats SET message_count = "
+        "(SELECT COUNT(*) FROM messages WHERE messages.chat_id = chats.id)",
+    )
+    add_column(conn, "chats", "last_message_preview VARCHAR", _backfill_previews)
+
+
+def _keyset_indexes(conn: Connection) -> None:
+    create_index(conn, "chats", "ix_chats_user_id_updated_at_id", ["user_id", "updated_at", "id"])
+    create_index(conn, "messages", "ix_messages_chat_id_created_at_id", ["chat_id", "created_at", "id"])
+    create_index(conn, "users", "ix_users_created_at_id", ["created_at", "id"])
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline tables", _baseline),
+    Migration(2, "users.role", lambda conn: add_column(conn, "users", "role VARCHAR NOT NULL DEFAULT 'user'")),
+    Migration(3, "users.token_version", lambda conn: add_column(conn, "users", "token_version VARCHAR DEFAULT '0'")),
+    Migration(4, "messages.token_count", lambda conn: add_column(conn, "messages", "token_count INTEGER")),
+    Migration(5, "chats.summary", _chat_summary),
+    Migration(6, "chats.message_count and last_message_preview", _chat_counters),
+    Migration(7, "keyset pagination indexes", _keyset_indexes, transactional=False),
+    Migration(8, "chats.title_attempts", lambda conn: add_column(conn, "chats", "title_attempts INTEGER NOT NULL DEFAULT 0")),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def current_version(target: Engine = engine) -> Optional[int]:
+    """The applied schema version (0 if none yet), or None if there is no schema_version table."""
+    try:
+        with target.connect() as conn:
+            return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+    except DBAPIError:
+        return None
+
+
+def _record(conn: Connection, migration: Migration) -> None:
+    conn.execute(insert(schema_version).values(version=migration.version, name=migration.name))
+
+
+def _run(target: Engine, version: Optional[int]) -> List[int]:
+    if version is None:
+        schema_version.create(target, checkfirst=True)
+        if not inspect(target).has_table("users"):
+            # New database: create the current schema and mark every migration as applied
+            try:
+                with target.begin() as conn:
+                    Base.metadata.create_all(conn)
+                    for migration in MIGRATIONS:
+                        _record(conn, migration)
+            except IntegrityError:
+                return []  # another process created it in the meantime
+            logger.info("Created schema at version %d", LATEST_VERSION)
+            return [m.version for m in MIGRATIONS]
+        version = 0
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        try:
+            if migration.transactional:
+                with target.begin() as conn:
+                    migration.apply(conn)
+                    _record(conn, migration)
+            else:
+                with target.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    migration.apply(conn)
+                    _record(conn, migration)
+        except IntegrityError:
+            continue  # recorded by another process in the meantime
+        logger.info("Applied migration %d (%s)", migration.version, migration.name)
+        applied.append(migration.version)
+    return applied
+
+
+def migrate(target: Engine = engine) -> List[int]:
+    """Apply pending migrations; returns the versions applied (empty if the schema is current)."""
+    version = current_version(target)
+    if version == LATEST_VERSION:
+        return []
+    if target.dialect.name != "postgresql":
+        return _run(target, version)
+    with target.connect().execution_options(isolation_level="AUTOCOMMIT") as lock:
+        lock.exec_driver_sql(f"SELECT pg_advisory_lock({ADVISORY_LOCK_KEY})")
+        try:
+            return _run(target, current_version(target))
+        finally:
+            lock.exec_driver_sql(f"SELECT pg_advisory_unlock({ADVISORY_LOCK_KEY})")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    applied = migrate()
+    print(f"Applied migrations: {applied}" if applied else f"Schema is current (version {LATEST_VERSION})")
@@ -0,0 +1,108 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are fetched with a range condition on a (timestamp, id) key instead of OFFSET, so
+every page is one index range scan however deep it is. Cursors are opaque strings that
+encode the key of the first or last row of a page; they are chronological:
+
+    before=<cursor>  rows older than the cursor
+    after=<cursor>   rows newer than the cursor
+
+Each page returns before_cursor (pass as before= for the next older page) and after_cursor
+(pass as after= for the next newer page); either is None when there is nothing further.
+Endpoints that return a plain list send them as X-Before-Cursor / X-After-Cursor headers.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Tuple, Union
+
+from fastapi import Response
+from sqlalchemy import tuple_
+from sqlalchemy.orm import InstrumentedAttribute, Query
+
+from app.core.exceptions import InvalidCursorError
+
+CursorKey = Tuple[datetime, Union[int, str]]
+
+
+@dataclass
+class Page:
+    """One page of rows, in the order requested, with cursors to the neighbouring pages."""
+    items: List[Any]
+    before_cursor: Optional[str] = None
+    after_cursor: Optional[str] = None
+
+
+def encode_cursor(timestamp: datetime, row_id: Union[int, str]) -> str:
+    raw = json.dumps([timestamp.isoformat(), row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[CursorKey]:
+    """The (timestamp, id) key of a cursor (None for None). Raises InvalidCursorError."""
+    if cursor is None:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, row_id = json.loads(raw)
+        if not isinstance(row_id, (int, str)):
+            raise ValueError(row_id)
+        return datetime.fromisoformat(timestamp), row_id
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        raise InvalidCursorError()
+
+
+def decode_cursors(before: Optional[str], after: Optional[str]) -> Tuple[Optional[CursorKey], Optional[CursorKey]]:
+    """Decode the before/after query parameters (at most one may be given)."""
+    if before is not None and after is not None:
+        raise InvalidCursorError("Pass either 'before' or 'after', not both")
+    return decode_cursor(before), decode_cursor(after)
+
+
+def keyset_page(
+    query: Query,
+    timestamp_column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+    limit: int,
+    before: Optional[CursorKey] = None,
+    after: Optional[CursorKey] = None,
+    newest_first: bool = False,
+) -> Page:
+    """
+    Fetch one page of query, keyed on (timestamp_column, id_column). Without a cursor the
+    page is the newest rows. Items come oldest first, or newest first with newest_first.
+    One extra row is fetched to tell whether there is a further page.
+    """
+    key = tuple_(timestamp_column, id_column)
+    if after is not None:
+        rows = query.filter(key > tuple_(*after)).order_by(
+            timestamp_column.asc(), id_column.asc()
+        ).limit(limit + 1).all()
+        has_newer, has_older = len(rows) > limit, True
+        rows = rows[:limit]
+    else:
+        if before is not None:
+            query = query.filter(key < tuple_(*before))
+        rows = query.order_by(timestamp_column.desc(), id_column.desc()).limit(limit + 1).all()
+        has_older, has_newer = len(rows) > limit, before is not None
+        rows = rows[:limit][::-1]
+
+    def cursor(row) -> str:
+        return encode_cursor(getattr(row, timestamp_column.key), getattr(row, id_column.key))
+
+    return Page(
+        items=rows[::-1] if newest_first else rows,
+        before_cursor=cursor(rows[0]) if rows and has_older else None,
+        after_cursor=cursor(rows[-1]) if rows and has_newer else None,
+    )
+
+
+def set_cursor_headers(response: Response, page: Page) -> None:
+    """Expose a page's cursors as X-Before-Cursor / X-After-Cursor (for endpoints returning a list)."""
+    if page.before_cursor:
+        response.headers["X-Before-Cursor"] = page.before_cursor
+    if page.after_cursor:
+        response.headers["X-After-Cursor"] = page.after_cursor
@@ -0,0 +1,182 @@
+"""
+Cache of authenticated principals (user_id -> role, token version), so authenticating a
+request does not need a database query.
+
+Entries live for PRINCIPAL_CACHE_TTL_SECONDS at most. Changes that must take effect at
+once (logout, role changes) call invalidate_principal(), which drops the local entry and
+appends the user id to a shared invalidation file; every worker process checks that file
+(one os.stat per lookup) and drops the listed users before using its cache.
+
+A principal loaded from the database is only cached if no invalidation arrived while it
+was being loaded (see PrincipalCache.generation), so a logout that commits during the
+lookup cannot be overwritten by the stale principal.
+"""
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import (
+    PRINCIPAL_CACHE_ENABLED,
+    PRINCIPAL_CACHE_MAX_ENTRIES,
+    PRINCIPAL_CACHE_TTL_SECONDS,
+    PRINCIPAL_INVALIDATION_FILE,
+)
+
+logger = logging.getLogger("app.auth")
+
+# The invalidation file is started afresh (atomically replaced) once it grows past this size
+MAX_INVALIDATION_FILE_BYTES = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user, as seen by request handlers (same fields as UserResponse)."""
+    id: str
+    email: str
+    role: str
+    token_version: str
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            role=user.role,
+            token_version=str(user.token_version) if user.token_version else "0",
+            created_at=user.created_at,
+        )
+
+
+class InvalidationLog:
+    """
+    Append-only file of invalidated keys, shared by all worker processes on a host.
+    poll() returns the keys appended since the last poll, or None when the file was
+    replaced, truncated or removed (then everything cached must be dropped).
+    """
+
+    def __init__(self, path: str, max_bytes: int = MAX_INVALIDATION_FILE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._identity: Optional[Tuple[int, int]] = None  # (st_dev, st_ino) of the file read so far
+        self._offset = 0
+        self._lock = threading.Lock()
+        self.sync()
+
+    def _stat(self):
+        try:
+            return os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+    def sync(self) -> None:
+        """Skip everything already in the file (only later invalidations matter)."""
+        with self._lock:
+            st = self._stat()
+            self._identity = (st.st_dev, st.st_ino) if st else None
+            self._offset = st.st_size if st else 0
+
+    def append(self, key: str) -> None:
+        try:
+            st = self._stat()
+            if st is not None and st.st_size > self.max_bytes:
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                open(tmp, "w").close()
+                os.replace(tmp, self.path)
+            # O_APPEND makes each short write atomic with respect to other processes
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, f"{key}\n".encode("utf-8"))
+            finally:
+                os.close(fd)
+        except OSError:
+            logger.exception("Could not write principal invalidation for %s", key)
+
+    def poll(self) -> Optional[list]:
+        with self._lock:
+            st = self._stat()
+            identity = (st.st_dev, st.st_ino) if st else None
+            if self._identity is None and identity is not None:
+                self._identity = identity  # file created since the last poll: all of it is new
+            elif identity != self._identity or (st is not None and st.st_size < self._offset):
+                self._identity = identity
+                self._offset = st.st_size if st else 0
+                return None
+            if st is None or st.st_size == self._offset:
+                return []
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read(st.st_size - self._offset)
+            # Only consume complete lines; a partially written line is read next time
+            complete = data.rfind(b"\n") + 1
+            self._offset += complete
+            return [line for line in data[:complete].decode("utf-8").split("\n") if line]
+
+
+class PrincipalCache:
+    """TTLCache of principals by user id, kept in sync with an InvalidationLog."""
+
+    def __init__(self, cache: TTLCache, log: InvalidationLog):
+        self.cache = cache
+        self.log = log
+        self._generation = 0  # bumped by every invalidation seen by this worker
+        self._lock = threading.Lock()
+
+    def _apply_invalidations(self) -> None:
+        invalidated = self.log.poll()
+        if invalidated is None:
+            with self._lock:
+                self.cache.clear()
+                self._generation += 1
+            return
+        if invalidated:
+            with self._lock:
+                for user_id in invalidated:
+                    self.cache.invalidate(user_id)
+                self._generation += 1
+
+    def generation(self) -> int:
+        """Take before loading a principal from the database; pass to set() afterwards."""
+        return self._generation
+
+    def get(self, user_id: str) -> Optional[Principal]:
+        self._apply_invalidations()
+        return self.cache.get(user_id)
+
+    def set(self, principal: Principal, generation: Optional[int] = None) -> None:
+        """
+        Cache the principal. With generation, it is skipped if any invalidation arrived
+        since generation was taken (the principal may have been loaded before it committed).
+        """
+        if generation is not None:
+            self._apply_invalidations()
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self.cache.set(principal.id, principal)
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop the user's entry here and in every other worker."""
+        with self._lock:
+            self.cache.invalidate(user_id)
+            self._generation += 1
+        self.log.append(user_id)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+
+principal_cache = PrincipalCache(
+    TTLCache(max_entries=PRINCIPAL_CACHE_MAX_ENTRIES, ttl_seconds=PRINCIPAL_CACHE_TTL_SECONDS),
+    InvalidationLog(PRINCIPAL_INVALIDATION_FILE),
+)
+
+
+def invalidate_principal(user_id: str) -> None:
+    """Call after changing anything a principal carries (role, token version)."""
+    if PRINCIPAL_CACHE_ENABLED:
+        principal_cache.invalidate(user_id)
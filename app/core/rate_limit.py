@@ -0,0 +1,128 @@
+"""
+In-memory rate limiting for LLM calls: a token bucket per user and a global cap on
+concurrent upstream calls. Both are O(1) per check and never touch the database.
+"""
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Hashable, Optional
+
+from app.core.config import (
+    LLM_MAX_CONCURRENT_CALLS,
+    LLM_QUEUE_TIMEOUT_SECONDS,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_MAX_TRACKED_USERS,
+    RATE_LIMIT_PER_MINUTE,
+)
+from app.core.exceptions import RateLimitExceededError
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket per key: up to `burst` requests at once, refilled at rate_per_second.
+    Buckets are refilled lazily on access; the least recently used buckets are dropped
+    beyond max_keys (a dropped bucket was idle, so it would be full anyway).
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        burst: int,
+        max_keys: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Hashable, cost: float = 1) -> float:
+        """Take cost tokens. Returns 0 if allowed, else seconds until enough tokens are available."""
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(self.burst), now]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate_per_second)
+                bucket[1] = now
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return 0.0
+            return (cost - bucket[0]) / self.rate_per_second
+
+    def check(self, key: Hashable, cost: float = 1) -> None:
+        """Like acquire, but raises RateLimitExceededError (429) when limited."""
+        retry_after = self.acquire(key, cost)
+        if retry_after:
+            raise RateLimitExceededError(retry_after=math.ceil(retry_after))
+
+
+class ConcurrencyLimiter:
+    """
+    Caps concurrent calls (e.g. upstream LLM calls). Callers wait up to queue_timeout_seconds for a slot,
+    then get a 429. Waiting and active counts are kept for instrumentation.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        queue_timeout_seconds: float,
+        detail: str = "Too many concurrent AI requests, please retry shortly",
+    ):
+        self.max_concurrent = max_concurrent
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.detail = detail
+        self.active = 0
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:  # new event loop (e.g. app restarted in tests)
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._loop = loop
+            self.active = 0
+            self.waiting = 0
+        return self._semaphore
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[float]:
+        """Hold one upstream slot; yields the seconds spent waiting for it."""
+        semaphore = self._get_semaphore()
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            raise RateLimitExceededError(detail=self.detail, retry_after=1)
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        try:
+            yield time.monotonic() - started
+        finally:
+            self.active -= 1
+            semaphore.release()
+
+
+user_rate_limiter = TokenBucketLimiter(
+    rate_per_second=RATE_LIMIT_PER_MINUTE / 60,
+    burst=RATE_LIMIT_BURST,
+    max_keys=RATE_LIMIT_MAX_TRACKED_USERS,
+)
+
+upstream_limiter = ConcurrencyLimiter(
+    max_concurrent=LLM_MAX_CONCURRENT_CALLS,
+    queue_timeout_seconds=LLM_QUEUE_TIMEOUT_SECONDS,
+)
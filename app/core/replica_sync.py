@@ -0,0 +1,63 @@
+"""
+Local read replica for SQLite.
+
+Copies the primary database file (DATABASE_URL) into the replica file (DATABASE_READ_URL)
+every REPLICA_SYNC_INTERVAL_SECONDS with SQLite's online backup API, which copies a
+consistent snapshot while the app keeps writing. The replica lags by up to one interval,
+which is enough to exercise read routing and read-your-writes locally:
+
+    DATABASE_READ_URL=sqlite:///./ai_chat_replica.db python -m app.core.replica_sync
+
+Run it alongside the app (with the same DATABASE_URL / DATABASE_READ_URL). Postgres
+replicas are kept in sync by Postgres streaming replication instead.
+"""
+import logging
+import sqlite3
+import time
+
+from sqlalchemy.engine import make_url
+
+from app.core.config import REPLICA_SYNC_INTERVAL_SECONDS
+from app.core.database import DATABASE_READ_URL, DATABASE_URL, is_sqlite_file
+
+logger = logging.getLogger("app.db")
+
+
+def sqlite_path(url: str) -> str:
+    """The file path of a SQLite URL (ValueError for other databases)."""
+    if not is_sqlite_file(url):
+        raise ValueError(f"Not a SQLite file database: {url}")
+    return make_url(url).database
+
+
+def sync_replica(primary_url: str = DATABASE_URL, replica_url: str = DATABASE_READ_URL) -> None:
+    """Copy the primary database into the replica (one consistent snapshot)."""
+    source = sqlite3.connect(sqlite_path(primary_url))
+    target = sqlite3.connect(sqlite_path(replica_url))
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def run(interval_seconds: float = REPLICA_SYNC_INTERVAL_SECONDS) -> None:
+    """Sync the replica every interval_seconds, until interrupted."""
+    logger.info("Syncing %s -> %s every %.1fs", DATABASE_URL, DATABASE_READ_URL, interval_seconds)
+    while True:
+        started = time.monotonic()
+        try:
+            sync_replica()
+        except sqlite3.Error:
+            logger.warning("Replica sync failed, retrying", exc_info=True)
+        time.sleep(max(0.0, interval_seconds - (time.monotonic() - started)))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if not DATABASE_READ_URL:
+        raise SystemExit("Set DATABASE_READ_URL to the replica's SQLite URL")
+    try:
+        run()
+    except KeyboardInterrupt:
+        pass
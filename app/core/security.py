@@ -3,32 +3,70 @@ Security utilities: password hashing and JWT handling.
 """
 
 from datetime import datetime, timedelta, timezone
+import hmac
 import os
 from typing import Any, Optional
 
+import bcrypt
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 
+from app.core.config import PASSWORD_HASH_ROUNDS
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "CHANGE_ME_IN_PRODUCTION")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 
-# WARNING: Now hash for password at the moment, too many error im confused :|
+# bcrypt only looks at the first 72 bytes; longer passwords are rejected rather than truncated
+MAX_PASSWORD_BYTES = 72
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
 
-def hash_password(password: str) -> str:
-    # encoded = password.encode("utf-8")
-    # if len(encoded) > 72:
-    #     raise ValueError("Password too long (max 72 bytes).")
-    return password
 
+def is_bcrypt_hash(hashed_password: str) -> bool:
+    """True if the stored value is a bcrypt hash (anything else is a legacy plaintext password)."""
+    return hashed_password.startswith(_BCRYPT_PREFIXES)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    # return pwd_context.verify(plain_password, hashed_password)
-    return plain_password
+def hash_password(password: str, rounds: int = PASSWORD_HASH_ROUNDS) -> str:
+    """
+    bcrypt hash of password with cost factor rounds (CPU-heavy: call through
+    app.core.hashing from request handlers).
+
+    Raises:
+        ValueError: If the password is longer than 72 bytes
+    """
+    encoded = password.encode("utf-8")
+    if len(encoded) > MAX_PASSWORD_BYTES:
+        raise ValueError(f"Password too long (max {MAX_PASSWORD_BYTES} bytes).")
+    return bcrypt.hashpw(encoded, bcrypt.gensalt(rounds=rounds)).decode("ascii")
+
+
+def verify_password(plain_password: str, hashed_password: Optional[str]) -> bool:
+    """
+    Check a password against a stored hash. Stored values that are not bcrypt hashes are
+    legacy plaintext passwords (from before hashing was enabled) and are compared directly.
+    """
+    if not hashed_password:
+        return False
+    if not is_bcrypt_hash(hashed_password):
+        return hmac.compare_digest(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+    encoded = plain_password.encode("utf-8")
+    if len(encoded) > MAX_PASSWORD_BYTES:
+        return False
+    try:
+        return bcrypt.checkpw(encoded, hashed_password.encode("ascii"))
+    except ValueError:  # malformed hash
+        return False
+
+
+def needs_rehash(hashed_password: Optional[str], rounds: int = PASSWORD_HASH_ROUNDS) -> bool:
+    """True if the stored value is not a bcrypt hash with the configured cost factor."""
+    if not hashed_password or not is_bcrypt_hash(hashed_password):
+        return True
+    try:
+        return int(hashed_password.split("$")[2]) != rounds
+    except (IndexError, ValueError):
+        return True
 
 
 def create_access_token(
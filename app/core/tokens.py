@@ -0,0 +1,26 @@
+"""
+Token counting for context-window budgeting.
+
+A fast local estimate (no tokenizer dependency): a word counts as one token plus one per
+further 5 characters, and every punctuation mark as one token, which tracks BPE
+tokenizers closely enough for budgeting. Counts are stored per message at write time.
+"""
+import re
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# Per-message overhead of the chat format (role markers, separators)
+MESSAGE_TOKEN_OVERHEAD = 4
+
+
+def count_tokens(text: str) -> int:
+    """Estimated number of tokens in text."""
+    if not text:
+        return 0
+    return sum(1 + (len(piece) - 1) // 5 for piece in _TOKEN_RE.findall(text))
+
+
+def message_tokens(content: str, token_count=None) -> int:
+    """Tokens a message costs in a prompt; token_count is the stored count if known."""
+    tokens = token_count if token_count is not None else count_tokens(content)
+    return tokens + MESSAGE_TOKEN_OVERHEAD
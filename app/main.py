@@ -2,22 +2,30 @@
 Main FastAPI application
 """
 import logging
+import time
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.api.auth import router as auth_router
 from app.api.chat import router as chat_router
 from app.api.chats import router as chats_router
 from app.api.admin import router as admin_router
-from app.core.database import init_db
+from app.core.config import MIGRATE_ON_STARTUP, SUMMARY_WORKER_ENABLED, TITLE_WORKER_ENABLED
+from app.core.database import dispose_async_engine, init_db
+from app.core.db_writer import shutdown_db_writer
+from app.core.hashing import shutdown_hashing
+from app.core.logging import configure_logging
+from app.core.metrics import registry
+from app.providers import close_provider
+from app.repositories.message_buffer import shutdown_message_buffer
+from app.services.summary_service import summary_worker
+from app.services.title_service import title_worker
 
-# Configure logging so uvicorn terminal shows our debug output
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    datefmt="%H:%M:%S",
-)
+# Structured logging, written by a background thread (levels and sampling: see app/core/logging.py)
+configure_logging()
 logger = logging.getLogger("app")
+access_logger = logging.getLogger("app.access")
 
 # Create FastAPI app
 app = FastAPI(
@@ -40,16 +48,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Before-Cursor", "X-After-Cursor"],  # pagination cursors (app.core.pagination)
 )
 
 
-# Request logging middleware – see each request and if Authorization header is present
+# Access log: one (sampled, see LOG_SAMPLE_RATES) line per request with status and duration
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    auth = request.headers.get("Authorization", "(none)")
-    has_bearer = auth.startswith("Bearer ") if auth != "(none)" else False
-    logger.info("→ %s %s | Auth: %s", request.method, request.url.path, "Bearer present" if has_bearer else "MISSING")
+    started = time.perf_counter()
     response = await call_next(request)
+    if access_logger.isEnabledFor(logging.INFO):
+        access_logger.info(
+            "%s %s %d",
+            request.method,
+            request.url.path,
+            response.status_code,
+            extra={
+                "method": request.method,
+                "path": request.url.path,
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            },
+        )
     return response
 
 # Include routers
@@ -60,9 +80,26 @@ app.include_router(admin_router)  # Admin-only endpoints
 
 
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     """Initialize database on first request (deferred to avoid import-time failures on Vercel)."""
-    init_db()
+    if MIGRATE_ON_STARTUP:
+        init_db()
+    if TITLE_WORKER_ENABLED:
+        title_worker.start()
+    if SUMMARY_WORKER_ENABLED:
+        summary_worker.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """Stop background workers and close shared resources (provider and DB connection pools, message buffer, DB writer, hashing pool)."""
+    await title_worker.stop()
+    await summary_worker.stop()
+    await close_provider()
+    shutdown_hashing()
+    shutdown_message_buffer()
+    shutdown_db_writer()
+    await dispose_async_engine()
 
 
 @app.get("/")
@@ -79,3 +116,9 @@ def root():
 def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Provider latency histograms for this worker process, in the Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -5,7 +5,7 @@ Chat ORM model.
 from datetime import datetime
 import uuid
 
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Index, Integer
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -17,12 +17,23 @@ class Chat(Base):
     Each chat belongs to a user and contains multiple messages.
     """
     __tablename__ = "chats"
+    __table_args__ = (
+        # Keyset pagination of a user's chats, newest first (app.core.pagination)
+        Index("ix_chats_user_id_updated_at_id", "user_id", "updated_at", "id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     title = Column(String, nullable=True)  # Optional title for the chat
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Rolling summary of the messages that fell out of the AI context window
+    summary = Column(Text, nullable=True)
+    summary_through_id = Column(Integer, nullable=True)  # id of the newest message folded into summary
+    # Kept up to date by MessageRepository.add_message / add_turn / delete_message (same transaction)
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_message_preview = Column(String, nullable=True)  # start of the newest message
+    title_attempts = Column(Integer, nullable=False, default=0, server_default="0")  # failed title generations
 
     user = relationship("User", back_populates="chats")
 
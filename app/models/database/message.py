@@ -4,7 +4,7 @@ Message ORM model.
 
 from datetime import datetime
 
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Index, Integer
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -16,11 +16,16 @@ class Message(Base):
     Each message belongs to a chat and has a role (user/assistant) and content.
     """
     __tablename__ = "messages"
+    __table_args__ = (
+        # Keyset pagination of a chat's messages in either direction (app.core.pagination)
+        Index("ix_messages_chat_id_created_at_id", "chat_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     chat_id = Column(String, ForeignKey("chats.id", ondelete="CASCADE"), nullable=False, index=True)
     role = Column(String, nullable=False)  # "user" or "assistant"
     content = Column(Text, nullable=False)
+    token_count = Column(Integer, nullable=True)  # estimated at write time; NULL for messages saved before it existed
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationship to chat
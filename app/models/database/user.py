@@ -5,7 +5,7 @@ User ORM model.
 from datetime import datetime
 import uuid
 
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Index
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -17,6 +17,10 @@ class User(Base):
     role: "user" (default) or "admin". Admins can list all users and view any user's chat history.
     """
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination of the admin user list (app.core.pagination)
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     email = Column(String, unique=True, index=True, nullable=False)
@@ -11,6 +11,9 @@ from .chat import (  # noqa: F401
     ChatListResponse,
     ChatRequest,
     ChatMessageResponse,
+    ChatBatchRequest,
+    ChatBatchResponse,
+    ChatBatchItemResult,
 )
 from .message import MessageResponse  # noqa: F401
 
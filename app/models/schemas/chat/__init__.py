@@ -13,3 +13,5 @@ from .chat_list_response import ChatListResponse  # noqa: F401
 from .chat_request import ChatRequest  # noqa: F401
 from .chat_message_response import ChatMessageResponse  # noqa: F401
 
+from .chat_batch_request import ChatBatchRequest  # noqa: F401
+from .chat_batch_response import ChatBatchResponse, ChatBatchItemResult  # noqa: F401
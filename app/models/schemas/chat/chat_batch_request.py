@@ -0,0 +1,23 @@
+"""
+ChatBatchRequest schema.
+"""
+
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from app.core.config import BATCH_MAX_ITEMS
+from .chat_request import ChatRequest
+
+
+class ChatBatchRequest(BaseModel):
+    """
+    Several chat messages submitted in one request.
+    Items for the same chat_id are processed in order; other items run concurrently.
+    """
+    items: List[ChatRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=BATCH_MAX_ITEMS,
+        description=f"Messages to send (at most {BATCH_MAX_ITEMS})"
+    )
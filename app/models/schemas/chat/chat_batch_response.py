@@ -0,0 +1,23 @@
+"""
+ChatBatchResponse and ChatBatchItemResult schemas.
+"""
+
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ChatBatchItemResult(BaseModel):
+    """Outcome of one batch item: a reply, or an error with its HTTP status code"""
+    index: int = Field(..., description="Position of the item in the request")
+    status_code: int = Field(..., description="HTTP status this item would have returned on its own")
+    chat_id: Optional[str] = Field(None, description="Chat the message was sent to")
+    reply: Optional[str] = Field(None, description="AI-generated response (on success)")
+    error: Optional[str] = Field(None, description="Error detail (on failure)")
+
+
+class ChatBatchResponse(BaseModel):
+    """Per-item results, in request order"""
+    results: List[ChatBatchItemResult] = Field(..., description="One result per request item")
+    succeeded: int = Field(..., description="Number of items that got a reply")
+    failed: int = Field(..., description="Number of items that failed")
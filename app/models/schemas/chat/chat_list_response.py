@@ -3,7 +3,7 @@ ChatListResponse schema.
 """
 
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 
 from .chat_response import ChatResponse
 
@@ -12,4 +12,6 @@ class ChatListResponse(BaseModel):
     """Response containing a list of chats"""
     chats: List[ChatResponse] = Field(..., description="List of chats")
     total: int = Field(..., description="Total number of chats")
+    before_cursor: Optional[str] = Field(None, description="Pass as 'before' for the next page (older chats)")
+    after_cursor: Optional[str] = Field(None, description="Pass as 'after' for the previous page (more recent chats)")
 
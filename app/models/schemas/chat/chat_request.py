@@ -20,4 +20,8 @@ class ChatRequest(BaseModel):
         min_length=1,
         description="User message to the AI"
     )
+    use_cache: bool = Field(
+        default=True,
+        description="Set to false to always get a fresh reply instead of a cached one for an identical request"
+    )
 
@@ -16,6 +16,7 @@ class ChatResponse(BaseModel):
     created_at: datetime = Field(..., description="When the chat was created")
     updated_at: datetime = Field(..., description="When the chat was last updated")
     message_count: int = Field(0, description="Number of messages in this chat")
+    last_message_preview: Optional[str] = Field(None, description="Start of the newest message")
 
     class Config:
         from_attributes = True
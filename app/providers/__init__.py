@@ -1,3 +1,105 @@
 """
 AI provider integrations
+
+The active provider is chosen by the AI_PROVIDER setting ("groq" or "fake"):
+    from app.providers import get_provider
+    completion = await get_provider().generate_chat_completion(messages)
 """
+from typing import Optional
+
+from app.core.config import (
+    AI_PROVIDER,
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_RESET_SECONDS,
+    COMPLETION_CACHE_ENABLED,
+    SINGLE_FLIGHT_ENABLED,
+    FAKE_PROVIDER_ERROR_RATE,
+    FAKE_PROVIDER_LATENCY_MS,
+    FAKE_PROVIDER_REPLY_TOKENS,
+    FAKE_PROVIDER_SEED,
+    FAKE_PROVIDER_STREAM_CHUNKS,
+    FAKE_PROVIDER_TOKENS_PER_SECOND,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_MODEL,
+    HEDGE_PERCENTILE,
+    HEDGE_PROVIDER,
+    METRICS_ENABLED,
+    NEAR_DUP_CACHE_ENABLED,
+    PROVIDER_MAX_RETRIES,
+    PROVIDER_RESILIENCE_ENABLED,
+    PROVIDER_RETRY_BACKOFF_MAX_SECONDS,
+    PROVIDER_RETRY_BACKOFF_SECONDS,
+    PROVIDER_TIMEOUT_SECONDS,
+)
+from app.providers.base import AIProvider, Completion, ProviderError, ProviderWrapper  # noqa: F401
+
+_provider: Optional[AIProvider] = None
+
+
+def create_provider(name: str) -> AIProvider:
+    """Build a provider by name."""
+    if name == "groq":
+        from app.providers.groq_provider import GroqProvider
+        return GroqProvider()
+    if name == "fake":
+        from app.providers.fake_provider import FakeProvider
+        return FakeProvider(
+            latency_ms=FAKE_PROVIDER_LATENCY_MS,
+            tokens_per_second=FAKE_PROVIDER_TOKENS_PER_SECOND,
+            reply_tokens=FAKE_PROVIDER_REPLY_TOKENS,
+            error_rate=FAKE_PROVIDER_ERROR_RATE,
+            stream_chunks=FAKE_PROVIDER_STREAM_CHUNKS,
+            seed=FAKE_PROVIDER_SEED,
+        )
+    raise ValueError(f"Unknown AI_PROVIDER '{name}' (expected 'groq' or 'fake')")
+
+
+def _create_upstream(name: str) -> AIProvider:
+    """Build a provider by name, timed for the router (and the latency metrics when METRICS_ENABLED)."""
+    from app.providers.instrumentation import InstrumentedProvider
+    return InstrumentedProvider(create_provider(name), metrics=METRICS_ENABLED)
+
+
+def build_provider(name: str) -> AIProvider:
+    """Build a provider by name, wrapped in the layers enabled in config (outermost last)."""
+    provider = _create_upstream(name)
+    if PROVIDER_RESILIENCE_ENABLED:
+        from app.providers.resilience import CircuitBreaker, ResilientProvider
+        provider = ResilientProvider(
+            provider,
+            timeout_seconds=PROVIDER_TIMEOUT_SECONDS,
+            max_retries=PROVIDER_MAX_RETRIES,
+            backoff_base_seconds=PROVIDER_RETRY_BACKOFF_SECONDS,
+            backoff_max_seconds=PROVIDER_RETRY_BACKOFF_MAX_SECONDS,
+            breaker=CircuitBreaker(CIRCUIT_BREAKER_FAILURE_THRESHOLD, CIRCUIT_BREAKER_RESET_SECONDS),
+            hedge_percentile=HEDGE_PERCENTILE,
+            hedge_min_samples=HEDGE_MIN_SAMPLES,
+            hedge_model=HEDGE_MODEL,
+            hedge_provider=_create_upstream(HEDGE_PROVIDER) if HEDGE_PROVIDER else None,
+        )
+    if SINGLE_FLIGHT_ENABLED:
+        from app.providers.singleflight import SingleFlightProvider
+        provider = SingleFlightProvider(provider)
+    if NEAR_DUP_CACHE_ENABLED:
+        from app.providers.similarity_cache import NearDuplicateCacheProvider
+        provider = NearDuplicateCacheProvider(provider)
+    if COMPLETION_CACHE_ENABLED:
+        from app.providers.cache import CachedProvider
+        provider = CachedProvider(provider)
+    return provider
+
+
+def get_provider() -> AIProvider:
+    """Return the process-wide provider configured by AI_PROVIDER."""
+    global _provider
+    if _provider is None:
+        _provider = build_provider(AI_PROVIDER)
+    return _provider
+
+
+async def close_provider() -> None:
+    """Close the active provider (call on app shutdown)."""
+    global _provider
+    if _provider is not None:
+        await _provider.close()
+        _provider = None
@@ -0,0 +1,141 @@
+"""
+Provider interface shared by all AI backends.
+"""
+import asyncio
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional
+
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an AI assistant. "
+    "You get the current summary (may be empty) and the next messages of the conversation. "
+    "Reply with ONLY the updated summary, at most {max_words} words. Keep facts, names, decisions, "
+    "user preferences and open questions; drop greetings and small talk."
+)
+
+
+class ProviderError(Exception):
+    """Raised by providers when the upstream call fails (mapped to AIProviderError by the service layer)."""
+
+
+@dataclass
+class Completion:
+    """A finished chat completion and the usage the provider reported for it."""
+    content: str
+    model: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+
+class AIProvider(ABC):
+    """
+    Base class for AI providers. Implementations are async and safe to share
+    between concurrent requests.
+    """
+
+    name: str = "base"
+    default_model: str = ""
+
+    @abstractmethod
+    async def generate_chat_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+    ) -> Completion:
+        """
+        Return the full completion for a list of {role, content} messages.
+        use_cache=False asks caching layers to skip lookup and storage for this call.
+        """
+
+    @abstractmethod
+    def stream_chat_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+    ) -> AsyncIterator[str]:
+        """Yield the completion's text deltas as they are produced."""
+
+    @abstractmethod
+    async def generate_chat_title(self, first_message: str) -> str:
+        """Generate a short title from the user's first message (for new chats)."""
+
+    async def generate_chat_titles(self, first_messages: List[str]) -> List[str]:
+        """
+        Generate titles for several chats at once (same order as first_messages).
+        Providers that can batch several prompts into one upstream call override this.
+        """
+        return list(await asyncio.gather(*(self.generate_chat_title(m) for m in first_messages)))
+
+    async def summarize_conversation(
+        self,
+        previous_summary: Optional[str],
+        messages: List[dict],
+        max_words: int = 250,
+    ) -> str:
+        """Fold messages into previous_summary and return the updated summary."""
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        completion = await self.generate_chat_completion(
+            [
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT.format(max_words=max_words)},
+                {
+                    "role": "user",
+                    "content": f"Current summary:\n{previous_summary or '(none)'}\n\nNew messages:\n{transcript}",
+                },
+            ],
+            temperature=0.3,
+            use_cache=False,
+        )
+        return completion.content.strip()
+
+    async def close(self) -> None:
+        """Release network resources (called on app shutdown)."""
+
+
+class ProviderWrapper(AIProvider):
+    """
+    Base for layers that add behaviour (caching, retries, ...) around another provider.
+    Every call is forwarded to the wrapped provider unless a subclass overrides it.
+    """
+
+    def __init__(self, inner: AIProvider):
+        self.inner = inner
+
+    @property
+    def name(self) -> str:
+        return self.inner.name
+
+    @property
+    def default_model(self) -> str:
+        return self.inner.default_model
+
+    async def generate_chat_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+    ) -> Completion:
+        return await self.inner.generate_chat_completion(messages, model, temperature, use_cache)
+
+    def stream_chat_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+    ) -> AsyncIterator[str]:
+        return self.inner.stream_chat_completion(messages, model, temperature, use_cache)
+
+    async def generate_chat_title(self, first_message: str) -> str:
+        return await self.inner.generate_chat_title(first_message)
+
+    async def generate_chat_titles(self, first_messages: List[str]) -> List[str]:
+        return await self.inner.generate_chat_titles(first_messages)
+
+    async def close(self) -> None:
+        await self.inner.close()
@@ -0,0 +1,103 @@
+"""
+Exact-match response cache in front of the provider.
+
+Completions are keyed on a hash of (model, temperature, full message list); titles on a hash
+of the (truncated) first message. Identical requests within the TTL are served from memory.
+"""
+import hashlib
+import json
+from typing import AsyncIterator, List, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import COMPLETION_CACHE_MAX_ENTRIES, COMPLETION_CACHE_TTL_SECONDS
+from app.providers.base import AIProvider, Completion, ProviderWrapper
+
+completion_cache = TTLCache(
+    max_entries=COMPLETION_CACHE_MAX_ENTRIES,
+    ttl_seconds=COMPLETION_CACHE_TTL_SECONDS,
+)
+
+
+def completion_key(model: str, temperature: float, messages: List[dict]) -> str:
+    payload = json.dumps(
+        {
+            "model": model,
+            "temperature": temperature,
+            "messages": [{"role": m.get("role"), "content": m.get("content")} for m in messages],
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return "completion:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def title_key(model: str, first_message: str) -> str:
+    payload = json.dumps([model, first_message[:500]], ensure_ascii=False)
+    return "title:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CachedProvider(ProviderWrapper):
+    """Serves repeated completions and titles from a TTLCache."""
+
+    def __init__(self, inner: AIProvider, cache: TTLCache = completion_cache):
+        super().__init__(inner)
+        self.cache = cache
+
+    async def generate_chat_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+    ) -> Completion:
+        if not use_cache:
+            return await self.inner.generate_chat_completion(messages, model, temperature, use_cache)
+        key = completion_key(model or self.default_model, temperature, messages)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        completion = await self.inner.generate_chat_completion(messages, model, temperature, use_cache)
+        self.cache.set(key, completion)
+        return completion
+
+    async def stream_chat_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+    ) -> AsyncIterator[str]:
+        if not use_cache:
+            async for delta in self.inner.stream_chat_completion(messages, model, temperature, use_cache):
+                yield delta
+            return
+        key = completion_key(model or self.default_model, temperature, messages)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached.content
+            return
+        parts: List[str] = []
+        async for delta in self.inner.stream_chat_completion(messages, model, temperature, use_cache):
+            parts.append(delta)
+            yield delta
+        # Only a stream that ran to completion is cached
+        self.cache.set(key, Completion(content="".join(parts), model=model or self.default_model))
+
+    async def generate_chat_title(self, first_message: str) -> str:
+        key = title_key(self.default_model, first_message)
+        title = self.cache.get(key)
+        if title is None:
+            title = await self.inner.generate_chat_title(first_message)
+            self.cache.set(key, title)
+        return title
+
+    async def generate_chat_titles(self, first_messages: List[str]) -> List[str]:
+        keys = [title_key(self.default_model, message) for message in first_messages]
+        titles = [self.cache.get(key) for key in keys]
+        missing = [i for i, title in enumerate(titles) if title is None]
+        if missing:
+            generated = await self.inner.generate_chat_titles([first_messages[i] for i in missing])
+            for i, title in zip(missing, generated):
+                titles[i] = title
+                self.cache.set(keys[i], title)
+        return titles
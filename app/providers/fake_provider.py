@@ -0,0 +1,121 @@
+"""
+Deterministic local provider for tests, benchmarks and load tests.
+Never touches the network; latency, token rate and error rate are configurable.
+"""
+import asyncio
+import hashlib
+import random
+from typing import AsyncIterator, List, Optional
+
+from app.providers.base import AIProvider, Completion, ProviderError
+
+FAKE_MODEL = "fake-model"
+
+# Filler vocabulary for replies; chosen deterministically from a hash of the prompt
+_WORDS = (
+    "the", "a", "model", "answer", "simply", "because", "this", "is", "quite", "clear",
+    "chat", "reply", "token", "fast", "local", "test", "response", "and", "then", "so",
+)
+
+
+def _last_user_message(messages: List[dict]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return message.get("content") or ""
+    return ""
+
+
+class FakeProvider(AIProvider):
+    """
+    Fake provider with a deterministic reply for a given prompt.
+
+    Args:
+        latency_ms: Delay before the first token (or before the full reply when not streaming)
+        tokens_per_second: Rate at which tokens are produced after the first one (0 = instant)
+        reply_tokens: Number of filler words appended to every reply
+        error_rate: Probability (0-1) that a call fails with ProviderError
+        stream_chunks: If False, stream_chat_completion yields the whole reply as one chunk
+        seed: Seed for the error-rate RNG, so failure sequences are reproducible
+    """
+
+    name = "fake"
+    default_model = FAKE_MODEL
+
+    def __init__(
+        self,
+        latency_ms: float = 0,
+        tokens_per_second: float = 0,
+        reply_tokens: int = 20,
+        error_rate: float = 0.0,
+        stream_chunks: bool = True,
+        seed: int = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.tokens_per_second = tokens_per_second
+        self.reply_tokens = reply_tokens
+        self.error_rate = error_rate
+        self.stream_chunks = stream_chunks
+        self._random = random.Random(seed)
+
+    def _reply_tokens(self, messages: List[dict]) -> List[str]:
+        """Reply as a list of tokens (words with their leading space)."""
+        prompt = _last_user_message(messages)
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        filler = [" " + _WORDS[digest[i % len(digest)] % len(_WORDS)] for i in range(self.reply_tokens)]
+        return ["Echo:"] + [" " + word for word in prompt.split()] + filler
+
+    async def _before_call(self) -> None:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise ProviderError("Fake provider error (injected)")
+
+    async def generate_chat_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+    ) -> Completion:
+        await self._before_call()
+        tokens = self._reply_tokens(messages)
+        if self.tokens_per_second:
+            await asyncio.sleep(len(tokens) / self.tokens_per_second)
+        return Completion(
+            content="".join(tokens),
+            model=model or self.default_model,
+            prompt_tokens=sum(len((m.get("content") or "").split()) for m in messages),
+            completion_tokens=len(tokens),
+        )
+
+    async def stream_chat_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+    ) -> AsyncIterator[str]:
+        await self._before_call()
+        tokens = self._reply_tokens(messages)
+        if not self.stream_chunks:
+            if self.tokens_per_second:
+                await asyncio.sleep(len(tokens) / self.tokens_per_second)
+            yield "".join(tokens)
+            return
+        for i, token in enumerate(tokens):
+            if i and self.tokens_per_second:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            yield token
+
+    @staticmethod
+    def _title(first_message: str) -> str:
+        words = first_message.split()[:6]
+        return " ".join(words).capitalize()[:80] if words else "New chat"
+
+    async def generate_chat_title(self, first_message: str) -> str:
+        await self._before_call()
+        return self._title(first_message)
+
+    async def generate_chat_titles(self, first_messages: List[str]) -> List[str]:
+        await self._before_call()  # one "upstream call" for the whole batch
+        return [self._title(message) for message in first_messages]
@@ -1,22 +1,61 @@
-from openai import OpenAI
-from app.core.config import GROQ_API_KEY
+import json
+import logging
+from typing import AsyncIterator, List, Optional
+
+from openai import AsyncOpenAI
+from app.core.config import (
+    GROQ_API_KEY,
+    GROQ_CONNECT_TIMEOUT_SECONDS,
+    GROQ_KEEPALIVE_EXPIRY_SECONDS,
+    GROQ_MAX_CONNECTIONS,
+    GROQ_MAX_KEEPALIVE_CONNECTIONS,
+    GROQ_TIMEOUT_SECONDS,
+    PROVIDER_RESILIENCE_ENABLED,
+)
+from app.providers.base import AIProvider, Completion
+
+logger = logging.getLogger("app.providers.groq")
 
 # Always use fast model (Llama 3.1 8B Instant)
 GROQ_FAST_MODEL = "llama-3.1-8b-instant"
 
-client = OpenAI(
-    base_url="https://api.groq.com/openai/v1",
-    api_key=GROQ_API_KEY,
-)
+_client: Optional[AsyncOpenAI] = None
+
 
+def get_client() -> AsyncOpenAI:
+    """
+    Return the shared AsyncOpenAI client, creating it on first use.
+    All calls in this process share one tuned httpx connection pool, so concurrent chats
+    reuse keep-alive connections instead of opening one per request.
+    """
+    global _client
+    if _client is None:
+        import httpx  # openai's transport; imported here so the app can start without credentials
 
-def generate_chat_completion(messages: list) -> str:
-    response = client.chat.completions.create(
-        model=GROQ_FAST_MODEL,
-        messages=messages,
-        temperature=0.7,
-    )
-    return response.choices[0].message.content
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=GROQ_MAX_CONNECTIONS,
+                max_keepalive_connections=GROQ_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=GROQ_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=httpx.Timeout(GROQ_TIMEOUT_SECONDS, connect=GROQ_CONNECT_TIMEOUT_SECONDS),
+        )
+        _client = AsyncOpenAI(
+            base_url="https://api.groq.com/openai/v1",
+            api_key=GROQ_API_KEY,
+            http_client=http_client,
+            # ResilientProvider owns retries (with its breaker); avoid retrying twice
+            max_retries=0 if PROVIDER_RESILIENCE_ENABLED else 2,
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared client and its connection pool (call on app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
 
 
 TITLE_SYSTEM_PROMPT = (
@@ -24,17 +63,101 @@ TITLE_SYSTEM_PROMPT = (
     "that captures the topic. No quotes, no punctuation at the end, no explanation. Just the title."
 )
 
+TITLES_SYSTEM_PROMPT = (
+    "You generate very short chat titles. You get several numbered user messages. For each message, "
+    "write a title of 3-6 words that captures its topic. No quotes, no punctuation at the end. "
+    "Reply with ONLY a JSON array of strings: one title per message, in the same order."
+)
+
 
-def generate_chat_title(first_message: str) -> str:
-    """Generate a short title from the user's first message (for new chats)."""
-    response = client.chat.completions.create(
-        model=GROQ_FAST_MODEL,
-        messages=[
-            {"role": "system", "content": TITLE_SYSTEM_PROMPT},
-            {"role": "user", "content": first_message[:500]},  # avoid huge input
-        ],
-        temperature=0.3,
-        max_tokens=30,
-    )
-    title = (response.choices[0].message.content or "").strip()
+def _clean_title(title: Optional[str]) -> str:
+    title = (title or "").strip().strip('"').strip()
     return title[:80] if title else "New chat"  # cap length; fallback if empty
+
+
+class GroqProvider(AIProvider):
+    """Groq's OpenAI-compatible API."""
+
+    name = "groq"
+    default_model = GROQ_FAST_MODEL
+
+    async def generate_chat_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+    ) -> Completion:
+        response = await get_client().chat.completions.create(
+            model=model or self.default_model,
+            messages=messages,
+            temperature=temperature,
+        )
+        usage = response.usage
+        return Completion(
+            content=response.choices[0].message.content or "",
+            model=response.model or model or self.default_model,
+            prompt_tokens=usage.prompt_tokens if usage else None,
+            completion_tokens=usage.completion_tokens if usage else None,
+        )
+
+    async def stream_chat_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+    ) -> AsyncIterator[str]:
+        stream = await get_client().chat.completions.create(
+            model=model or self.default_model,
+            messages=messages,
+            temperature=temperature,
+            stream=True,
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+    async def generate_chat_title(self, first_message: str) -> str:
+        response = await get_client().chat.completions.create(
+            model=self.default_model,
+            messages=[
+                {"role": "system", "content": TITLE_SYSTEM_PROMPT},
+                {"role": "user", "content": first_message[:500]},  # avoid huge input
+            ],
+            temperature=0.3,
+            max_tokens=30,
+        )
+        return _clean_title(response.choices[0].message.content)
+
+    async def generate_chat_titles(self, first_messages: List[str]) -> List[str]:
+        """Title several chats with one upstream call; falls back to one call per chat if the reply is malformed."""
+        if len(first_messages) <= 1:
+            return await super().generate_chat_titles(first_messages)
+        numbered = "\n".join(
+            f"{i}. {json.dumps(message[:500])}" for i, message in enumerate(first_messages, start=1)
+        )
+        response = await get_client().chat.completions.create(
+            model=self.default_model,
+            messages=[
+                {"role": "system", "content": TITLES_SYSTEM_PROMPT},
+                {"role": "user", "content": numbered},
+            ],
+            temperature=0.3,
+            max_tokens=30 * len(first_messages),
+        )
+        content = (response.choices[0].message.content or "").strip()
+        try:
+            titles = json.loads(content[content.index("["):content.rindex("]") + 1])
+        except ValueError:
+            titles = None
+        if not isinstance(titles, list) or len(titles) != len(first_messages):
+            logger.warning("Batched title reply malformed; falling back to one call per chat")
+            return await super().generate_chat_titles(first_messages)
+        return [_clean_title(str(title)) for title in titles]
+
+    async def close(self) -> None:
+        await close_client()
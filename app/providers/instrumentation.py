@@ -0,0 +1,188 @@
+"""
+Latency instrumentation around the upstream provider.
+
+Wraps the raw provider (inside retries and caching), so every upstream attempt is timed:
+time to first token, total duration, prompt/completion tokens and tokens per second,
+labeled by model, operation and outcome. Values go to the histograms in app.core.metrics
+(when METRICS_ENABLED).
+
+Chat calls are also reported to the upstream_calls() collector of the current request, so
+the model router's latency budget only sees real upstream calls: cache hits and calls that
+joined another request's in-flight call record nothing, and each retry is its own sample.
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, List, Optional
+
+from app.core.metrics import (
+    llm_completion_tokens,
+    llm_prompt_tokens,
+    llm_request_duration,
+    llm_time_to_first_token,
+    llm_tokens_per_second,
+)
+from app.core.tokens import count_tokens
+from app.providers.base import AIProvider, Completion, ProviderWrapper
+
+
+def _outcome(error: Optional[BaseException]) -> str:
+    if error is None:
+        return "ok"
+    if isinstance(error, asyncio.CancelledError):
+        return "cancelled"  # e.g. the losing request of a hedged pair
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    return "error"
+
+
+@dataclass
+class UpstreamCall:
+    """One upstream chat call made for the current request."""
+    model: str
+    duration: float
+    error: Optional[BaseException] = None
+
+
+_upstream_calls: ContextVar[Optional[List[UpstreamCall]]] = ContextVar("upstream_calls", default=None)
+
+
+@contextmanager
+def upstream_calls() -> Iterator[List[UpstreamCall]]:
+    """Collect the upstream chat calls made inside the block (single-flight pumps inherit the leader's)."""
+    calls: List[UpstreamCall] = []
+    previous = _upstream_calls.get()
+    _upstream_calls.set(calls)
+    try:
+        yield calls
+    finally:
+        # set, not reset: a streaming block may be closed from another context
+        _upstream_calls.set(previous)
+
+
+def _note_upstream(model: str, duration: float, error: Optional[BaseException]) -> None:
+    calls = _upstream_calls.get()
+    if calls is not None:
+        calls.append(UpstreamCall(model, duration, error))
+
+
+def record_call(
+    model: str,
+    operation: str,
+    duration: float,
+    error: Optional[BaseException] = None,
+    ttft: Optional[float] = None,
+    prompt_tokens: Optional[int] = None,
+    completion_tokens: Optional[int] = None,
+) -> None:
+    """Record one provider call. Tokens per second is measured over the time after the first token."""
+    labels = {"model": model, "operation": operation, "outcome": _outcome(error)}
+    llm_request_duration.observe(duration, **labels)
+    if ttft is not None:
+        llm_time_to_first_token.observe(ttft, **labels)
+    if prompt_tokens is not None:
+        llm_prompt_tokens.observe(prompt_tokens, **labels)
+    if completion_tokens is not None:
+        llm_completion_tokens.observe(completion_tokens, **labels)
+        # Non-streaming replies arrive at once, so their rate is over the whole call
+        generation_time = duration - ttft if ttft is not None and duration > ttft else duration
+        if completion_tokens and generation_time > 0:
+            llm_tokens_per_second.observe(completion_tokens / generation_time, **labels)
+
+
+class InstrumentedProvider(ProviderWrapper):
+    """Times every call to the wrapped provider (see module docstring)."""
+
+    def __init__(self, inner: AIProvider, clock=time.perf_counter, metrics: bool = True):
+        super().__init__(inner)
+        self._clock = clock
+        self._metrics = metrics
+
+    def _record(self, model: str, operation: str, duration: float, upstream_model: Optional[str] = None, **kwargs) -> None:
+        if operation in ("completion", "stream"):
+            _note_upstream(upstream_model or model, duration, kwargs.get("error"))
+        if self._metrics:
+            record_call(model, operation, duration, **kwargs)
+
+    async def generate_chat_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+    ) -> Completion:
+        started = self._clock()
+        try:
+            completion = await self.inner.generate_chat_completion(messages, model, temperature, use_cache)
+        except BaseException as e:
+            self._record(model or self.default_model, "completion", self._clock() - started, error=e)
+            raise
+        duration = self._clock() - started
+        self._record(
+            completion.model or model or self.default_model,
+            "completion",
+            duration,
+            upstream_model=model or self.default_model,
+            ttft=duration,
+            prompt_tokens=completion.prompt_tokens,
+            completion_tokens=completion.completion_tokens,
+        )
+        return completion
+
+    async def stream_chat_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+    ) -> AsyncIterator[str]:
+        started = self._clock()
+        ttft: Optional[float] = None
+        parts: List[str] = []
+        error: Optional[BaseException] = None
+        try:
+            async for delta in self.inner.stream_chat_completion(messages, model, temperature, use_cache):
+                if ttft is None:
+                    ttft = self._clock() - started
+                parts.append(delta)
+                yield delta
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if isinstance(error, GeneratorExit):
+                error = asyncio.CancelledError()  # consumer stopped reading (client disconnected)
+            self._record(
+                model or self.default_model,
+                "stream",
+                self._clock() - started,
+                error=error,
+                ttft=ttft,
+                completion_tokens=count_tokens("".join(parts)) if parts else None,
+            )
+
+    async def generate_chat_title(self, first_message: str) -> str:
+        started = self._clock()
+        error: Optional[BaseException] = None
+        try:
+            return await self.inner.generate_chat_title(first_message)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            duration = self._clock() - started
+            self._record(self.default_model, "title", duration, error=error, ttft=None if error else duration)
+
+    async def generate_chat_titles(self, first_messages: List[str]) -> List[str]:
+        started = self._clock()
+        error: Optional[BaseException] = None
+        try:
+            return await self.inner.generate_chat_titles(first_messages)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            duration = self._clock() - started
+            self._record(self.default_model, "titles", duration, error=error, ttft=None if error else duration)
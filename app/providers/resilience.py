@@ -0,0 +1,288 @@
+"""
+Provider resilience: per-call timeouts, jittered retries, a circuit breaker and
+optional hedged requests.
+
+- Every upstream attempt is bounded by a timeout; retryable failures (timeouts, connection
+  errors, 408/409/429/5xx) are retried with exponential backoff and full jitter.
+- After failure_threshold consecutive failures the breaker opens and calls fail fast with
+  CircuitOpenError until reset_timeout_seconds have passed; then one probe call is let through.
+  Non-retryable client errors (400, 401, ...) do not count as failures; a cancelled probe
+  re-opens the breaker.
+- With hedging on, if a completion is still running after the recent latency percentile,
+  a second request goes to the hedge model/provider and the first answer wins.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+from app.providers.base import AIProvider, Completion, ProviderError, ProviderWrapper
+
+logger = logging.getLogger("app.providers.resilience")
+
+
+class CircuitOpenError(ProviderError):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"AI provider circuit open; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts, connection problems, throttling and server errors are worth retrying."""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError, ProviderError)):
+        return not isinstance(error, CircuitOpenError)
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        # SDK connection/timeout errors carry no status code
+        return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+    return status_code in (408, 409, 429) or status_code >= 500
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half-open -> closed)."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError if the call must not go upstream."""
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.reset_timeout_seconds - self._clock()
+                if remaining > 0:
+                    raise CircuitOpenError(remaining)
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    raise CircuitOpenError(self.reset_timeout_seconds)
+                self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Circuit breaker opened after %d failures", self._failures)
+                self.state = self.OPEN
+                self._opened_at = self._clock()
+                self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """
+        End a call that says nothing about upstream health (cancelled, or failed on our side).
+        A half-open probe ending this way re-opens the breaker, so the next probe can run.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._probe_in_flight:
+                self.state = self.OPEN
+                self._opened_at = self._clock()
+                self._probe_in_flight = False
+
+
+class LatencyTracker:
+    """Rolling window of recent successful call durations."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class ResilientProvider(ProviderWrapper):
+    """Adds timeouts, retries, circuit breaking and hedging around another provider."""
+
+    def __init__(
+        self,
+        inner: AIProvider,
+        timeout_seconds: float,
+        max_retries: int,
+        backoff_base_seconds: float,
+        backoff_max_seconds: float,
+        breaker: CircuitBreaker,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        hedge_model: Optional[str] = None,
+        hedge_provider: Optional[AIProvider] = None,
+    ):
+        super().__init__(inner)
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.breaker = breaker
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_model = hedge_model
+        self.hedge_provider = hedge_provider or inner
+        self.latency = LatencyTracker()
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt))
+
+    async def _call(self, make_call: Callable[[], Awaitable]):
+        """Run make_call under the breaker with a timeout per attempt and retries."""
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                result = await asyncio.wait_for(make_call(), timeout=self.timeout_seconds)
+            except Exception as e:
+                if not is_retryable(e):
+                    if getattr(e, "status_code", None) is not None:
+                        # Upstream answered (e.g. 400, 401): the request was at fault, not the provider
+                        self.breaker.record_success()
+                    else:
+                        self.breaker.release_probe()
+                    raise
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.info("Provider call failed (%s); retry %d in %.2fs", type(e).__name__, attempt + 1, delay)
+                attempt += 1
+                await asyncio.sleep(delay)
+            except BaseException:
+                # Cancelled (client disconnect, losing hedge, outer timeout): free the probe slot
+                self.breaker.release_probe()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+
+    def _hedge_delay(self) -> Optional[float]:
+        if self.hedge_percentile is None or len(self.latency) < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(self.hedge_percentile)
+
+    async def _hedged_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str],
+        temperature: float,
+        use_cache: bool,
+    ) -> Completion:
+        """Primary request, plus a hedge request if the primary outlives the latency percentile."""
+        started = time.monotonic()
+        primary = asyncio.ensure_future(self.inner.generate_chat_completion(messages, model, temperature, use_cache))
+        try:
+            delay = self._hedge_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done:
+                    logger.info("Hedging completion after %.2fs", delay)
+                    hedge = asyncio.ensure_future(
+                        self.hedge_provider.generate_chat_completion(
+                            messages, self.hedge_model or model, temperature, use_cache
+                        )
+                    )
+                    completion = await self._first_success(primary, hedge)
+                    self.latency.record(time.monotonic() - started)
+                    return completion
+            completion = await primary
+            self.latency.record(time.monotonic() - started)
+            return completion
+        finally:
+            if not primary.done():  # timed out or cancelled by the caller
+                primary.cancel()
+
+    @staticmethod
+    async def _first_success(*tasks: asyncio.Future):
+        """Return the first successful result; raise the last error if all fail."""
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def generate_chat_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+    ) -> Completion:
+        return await self._call(lambda: self._hedged_completion(messages, model, temperature, use_cache))
+
+    async def stream_chat_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+    ) -> AsyncIterator[str]:
+        """Retries and the timeout apply until the first delta; after that the stream is passed through."""
+
+        async def open_stream():
+            stream = self.inner.stream_chat_completion(messages, model, temperature, use_cache).__aiter__()
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                first = None
+            except BaseException:
+                # Failed, or cancelled by the per-attempt timeout: close the upstream stream
+                aclose = getattr(stream, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+                raise
+            return stream, first
+
+        stream, first = await self._call(open_stream)
+        if first is None:
+            return
+        yield first
+        async for delta in stream:
+            yield delta
+
+    async def generate_chat_title(self, first_message: str) -> str:
+        return await self._call(lambda: self.inner.generate_chat_title(first_message))
+
+    async def generate_chat_titles(self, first_messages: List[str]) -> List[str]:
+        return await self._call(lambda: self.inner.generate_chat_titles(first_messages))
@@ -0,0 +1,177 @@
+"""
+Per-request model routing.
+
+The router picks the model for a chat completion from the prompt size, the conversation
+length and (optionally) the user's tier, and falls back to a faster model when the preferred
+one is over its latency budget. Every decision and its outcome is logged (logger
+"app.providers.router") so the policy can be tuned from the logs.
+"""
+import logging
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from app.core.config import (
+    MODEL_ROUTER_POLICY,
+    ROUTER_DEFAULT_MODEL,
+    ROUTER_FALLBACK_MODEL,
+    ROUTER_LARGE_MIN_MESSAGES,
+    ROUTER_LARGE_MIN_PROMPT_TOKENS,
+    ROUTER_LARGE_MODEL,
+    ROUTER_LATENCY_BUDGET_SECONDS,
+    ROUTER_LATENCY_MIN_SAMPLES,
+    ROUTER_LATENCY_PERCENTILE,
+    ROUTER_PROBE_EVERY,
+    ROUTER_TIER_MODELS,
+)
+from app.core.tokens import message_tokens
+from app.providers.resilience import LatencyTracker
+
+logger = logging.getLogger("app.providers.router")
+
+POLICIES = ("rules", "tier")
+
+
+@dataclass
+class RouteDecision:
+    """The model chosen for one request, and why (model None = the provider's default model)."""
+    model: Optional[str]
+    reason: str
+    preferred_model: Optional[str]
+    prompt_tokens: int
+    message_count: int
+
+
+def parse_tier_models(spec: str) -> Dict[str, str]:
+    """Parse "tier=model,tier=model" (as in ROUTER_TIER_MODELS) into a dict."""
+    tiers = {}
+    for part in spec.split(","):
+        if "=" in part:
+            tier, model = part.split("=", 1)
+            if tier.strip() and model.strip():
+                tiers[tier.strip()] = model.strip()
+    return tiers
+
+
+class ModelRouter:
+    """
+    Chooses a model per request (see module docstring). Thread-safe.
+    default_model None means the provider's own default model.
+    """
+
+    def __init__(
+        self,
+        default_model: Optional[str] = None,
+        policy: str = "rules",
+        large_model: Optional[str] = None,
+        large_min_prompt_tokens: int = 1500,
+        large_min_messages: int = 20,
+        tier_models: Optional[Dict[str, str]] = None,
+        fallback_model: Optional[str] = None,
+        latency_budget_seconds: Optional[float] = None,
+        latency_percentile: float = 95,
+        latency_min_samples: int = 20,
+        probe_every: int = 10,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown MODEL_ROUTER_POLICY '{policy}' (expected one of {', '.join(POLICIES)})")
+        self.default_model = default_model
+        self.policy = policy
+        self.large_model = large_model
+        self.large_min_prompt_tokens = large_min_prompt_tokens
+        self.large_min_messages = large_min_messages
+        self.tier_models = tier_models or {}
+        self.fallback_model = fallback_model or default_model
+        self.latency_budget_seconds = latency_budget_seconds
+        self.latency_percentile = latency_percentile
+        self.latency_min_samples = latency_min_samples
+        self.probe_every = probe_every
+        self._latency: Dict[Optional[str], LatencyTracker] = defaultdict(LatencyTracker)
+        self._skipped: Dict[Optional[str], int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _preferred(self, prompt_tokens: int, message_count: int, tier: Optional[str]):
+        if self.policy == "tier":
+            if tier in self.tier_models:
+                return self.tier_models[tier], f"tier:{tier}"
+            return self.default_model, "default"
+        if self.large_model:
+            if prompt_tokens >= self.large_min_prompt_tokens:
+                return self.large_model, "long_prompt"
+            if message_count >= self.large_min_messages:
+                return self.large_model, "long_conversation"
+        return self.default_model, "default"
+
+    def over_budget(self, model: Optional[str]) -> bool:
+        """True if the model's recent latency percentile exceeds the latency budget."""
+        if self.latency_budget_seconds is None:
+            return False
+        with self._lock:
+            tracker = self._latency.get(model)
+            if tracker is None or len(tracker) < self.latency_min_samples:
+                return False
+            return tracker.percentile(self.latency_percentile) > self.latency_budget_seconds
+
+    def route(self, messages: List[dict], tier: Optional[str] = None) -> RouteDecision:
+        """Pick the model for a prompt (the full messages list sent to the provider)."""
+        prompt_tokens = sum(message_tokens(m.get("content") or "") for m in messages)
+        message_count = sum(1 for m in messages if m.get("role") in ("user", "assistant"))
+        preferred, reason = self._preferred(prompt_tokens, message_count, tier)
+        model = preferred
+        if preferred != self.fallback_model and self.over_budget(preferred):
+            with self._lock:
+                self._skipped[preferred] += 1
+                probe = self.probe_every > 0 and self._skipped[preferred] % self.probe_every == 0
+            if probe:
+                reason += "+latency_probe"
+            else:
+                model, reason = self.fallback_model, reason + "+over_latency_budget"
+        decision = RouteDecision(model, reason, preferred, prompt_tokens, message_count)
+        logger.info(
+            "Routed to %s (%s): prompt_tokens=%d messages=%d tier=%s",
+            model or "default model", reason, prompt_tokens, message_count, tier,
+        )
+        return decision
+
+    def record(
+        self, decision: RouteDecision, duration: Optional[float], error: Optional[BaseException] = None
+    ) -> None:
+        """
+        Record how a routed call went. duration is the upstream call's own latency; successful
+        durations feed the latency budget check. None means no upstream call was made for the
+        routed model (cache hit, shared in-flight call, fallback model), so nothing is sampled.
+        """
+        if error is None and duration is not None:
+            with self._lock:
+                self._latency[decision.model].record(duration)
+        logger.info(
+            "Route outcome model=%s reason=%s upstream=%s outcome=%s",
+            decision.model or "default model",
+            decision.reason,
+            "none" if duration is None else f"{duration:.3f}s",
+            "ok" if error is None else type(error).__name__,
+        )
+
+
+_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """Return the process-wide router built from config."""
+    global _router
+    if _router is None:
+        _router = ModelRouter(
+            default_model=ROUTER_DEFAULT_MODEL,
+            policy=MODEL_ROUTER_POLICY,
+            large_model=ROUTER_LARGE_MODEL,
+            large_min_prompt_tokens=ROUTER_LARGE_MIN_PROMPT_TOKENS,
+            large_min_messages=ROUTER_LARGE_MIN_MESSAGES,
+            tier_models=parse_tier_models(ROUTER_TIER_MODELS),
+            fallback_model=ROUTER_FALLBACK_MODEL,
+            latency_budget_seconds=ROUTER_LATENCY_BUDGET_SECONDS,
+            latency_percentile=ROUTER_LATENCY_PERCENTILE,
+            latency_min_samples=ROUTER_LATENCY_MIN_SAMPLES,
+            probe_every=ROUTER_PROBE_EVERY,
+        )
+    return _router
@@ -0,0 +1,266 @@
+"""
+Near-duplicate response cache for first-turn prompts.
+
+Prompts that differ only in casing, punctuation, filler words ("please", articles), a
+greeting or thanks around the question, or the order of their words get the same reply.
+Each prompt is reduced to its normalized words. A prompt can only hit a cached prompt with
+exactly the same words: SimHash cannot tell one changed word in a long prompt from noise,
+so a different content word ("Windows" for "Ubuntu") always misses. Among prompts with the
+same words, a 64-bit SimHash of the words and word pairs decides whether the order is close
+enough (share of equal bits, the configured similarity). Lookups use banded buckets: with at
+most d differing bits, splitting the fingerprint into d + 1 bands guarantees one band
+matches exactly, so only prompts sharing a band are compared.
+
+Only single-turn prompts (system messages + one user message) are served from here, and the
+system messages, model and temperature must match exactly. Multi-turn contexts are left to
+the exact-match cache, which keys on the whole context.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.config import (
+    NEAR_DUP_CACHE_MAX_ENTRIES,
+    NEAR_DUP_CACHE_THRESHOLD,
+    NEAR_DUP_CACHE_TTL_SECONDS,
+)
+from app.providers.base import AIProvider, Completion, ProviderWrapper
+
+FINGERPRINT_BITS = 64
+
+_WORD_RE = re.compile(r"\w+")
+# Unambiguous contractions only ("'s" may be "is", "has" or a possessive, so it is kept)
+_CONTRACTIONS = (
+    ("n't", " not"), ("'re", " are"), ("'m", " am"), ("'ll", " will"), ("'ve", " have"),
+)
+
+# Articles and politeness words: they never change what is being asked. Pronouns and modal
+# verbs do ("Can you help me?" vs "Can I help you?"), so they are not listed.
+FILLER_WORDS = frozenset({"a", "an", "the", "please", "pls", "plz", "kindly", "um", "uh"})
+
+# Greetings and thanks, dropped only at the start or end of a prompt: inside it they can be
+# what is asked about ("How do I say hello in Spanish?")
+GREETING_WORDS = frozenset({"hi", "hello", "hey", "thanks", "thank", "thx"})
+
+
+def _strip_greetings(words: List[str]) -> List[str]:
+    start, end = 0, len(words)
+    while start < end and words[start] in GREETING_WORDS:
+        start += 2 if words[start:start + 2] == ["thank", "you"] else 1
+    while end > start:
+        if words[end - 2:end] == ["thank", "you"] and end - 2 >= start:
+            end -= 2
+        elif words[end - 1] in GREETING_WORDS:
+            end -= 1
+        else:
+            break
+    return words[start:end]
+
+
+def normalize(text: str) -> List[str]:
+    """
+    Lowercased words of text (contractions expanded), without punctuation, filler words and
+    leading or trailing greetings and thanks.
+    """
+    text = text.lower().replace("\u2019", "'")
+    for contraction, expansion in _CONTRACTIONS:
+        text = text.replace(contraction, expansion)
+    return _strip_greetings([word for word in _WORD_RE.findall(text) if word not in FILLER_WORDS])
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(words: List[str]) -> int:
+    """64-bit SimHash over words and adjacent word pairs (pairs keep some word order)."""
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    weights = [0] * FINGERPRINT_BITS
+    for feature in features:
+        h = _feature_hash(feature)
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def similarity(a: int, b: int) -> float:
+    """Share of equal bits between two fingerprints (1.0 = identical)."""
+    return 1 - bin(a ^ b).count("1") / FINGERPRINT_BITS
+
+
+class SimHashIndex:
+    """
+    Bounded LRU index of (context key, fingerprint) -> value, with a TTL per entry.
+    get() returns the value of the closest entry for the same context key within
+    max_distance differing bits. Thread-safe.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        threshold: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.max_distance = int(FINGERPRINT_BITS * (1 - threshold))
+        self._clock = clock
+        band_count = min(self.max_distance + 1, FINGERPRINT_BITS)
+        width = FINGERPRINT_BITS // band_count
+        # (shift, mask) per band; the last band takes the leftover bits
+        self._bands = [
+            (i * width, (1 << (width if i < band_count - 1 else FINGERPRINT_BITS - i * width)) - 1)
+            for i in range(band_count)
+        ]
+        self._entries: "OrderedDict[int, Tuple[str, int, float, Any]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, str, int], Set[int]] = defaultdict(set)
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _band_keys(self, context_key: str, fingerprint: int):
+        return [(i, context_key, (fingerprint >> shift) & mask) for i, (shift, mask) in enumerate(self._bands)]
+
+    def _remove(self, entry_id: int) -> None:
+        context_key, fingerprint, _, _ = self._entries.pop(entry_id)
+        for band_key in self._band_keys(context_key, fingerprint):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def get(self, context_key: str, fingerprint: int) -> Any:
+        """Return the closest cached value within the threshold, or None."""
+        now = self._clock()
+        with self._lock:
+            candidates = set()
+            for band_key in self._band_keys(context_key, fingerprint):
+                candidates.update(self._buckets.get(band_key, ()))
+            best_id, best_distance = None, self.max_distance + 1
+            for entry_id in candidates:
+                _, other, expires_at, _ = self._entries[entry_id]
+                if expires_at <= now:
+                    self._remove(entry_id)
+                    continue
+                distance = bin(fingerprint ^ other).count("1")
+                if distance < best_distance:
+                    best_id, best_distance = entry_id, distance
+            if best_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id][3]
+
+    def set(self, context_key: str, fingerprint: int, value: Any) -> None:
+        """Store a value, evicting the least recently used entries beyond max_entries."""
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (context_key, fingerprint, self._clock() + self.ttl_seconds, value)
+            for band_key in self._band_keys(context_key, fingerprint):
+                self._buckets[band_key].add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+near_duplicate_index = SimHashIndex(
+    max_entries=NEAR_DUP_CACHE_MAX_ENTRIES,
+    ttl_seconds=NEAR_DUP_CACHE_TTL_SECONDS,
+    threshold=NEAR_DUP_CACHE_THRESHOLD,
+)
+
+
+def prompt_fingerprint(model: str, temperature: float, messages: List[dict]) -> Optional[Tuple[str, int]]:
+    """
+    (context key, fingerprint) for a single-turn prompt, or None if the prompt is multi-turn
+    or has nothing left after normalization. The context key covers everything that must
+    match exactly: model, temperature, the system messages and the prompt's words (in any order).
+    """
+    user_messages = [m for m in messages if m.get("role") != "system"]
+    if len(user_messages) != 1 or user_messages[0].get("role") != "user":
+        return None
+    words = normalize(user_messages[0].get("content") or "")
+    if not words:
+        return None
+    context = json.dumps(
+        [model, temperature, [m.get("content") for m in messages if m.get("role") == "system"], sorted(words)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(context.encode("utf-8")).hexdigest(), simhash(words)
+
+
+class NearDuplicateCacheProvider(ProviderWrapper):
+    """Serves first-turn completions for near-duplicate prompts from a SimHashIndex."""
+
+    def __init__(self, inner: AIProvider, index: SimHashIndex = near_duplicate_index):
+        super().__init__(inner)
+        self.index = index
+
+    async def generate_chat_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+    ) -> Completion:
+        key = prompt_fingerprint(model or self.default_model, temperature, messages) if use_cache else None
+        if key is None:
+            return await self.inner.generate_chat_completion(messages, model, temperature, use_cache)
+        cached = self.index.get(*key)
+        if cached is not None:
+            return cached
+        completion = await self.inner.generate_chat_completion(messages, model, temperature, use_cache)
+        self.index.set(*key, completion)
+        return completion
+
+    async def stream_chat_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+    ) -> AsyncIterator[str]:
+        key = prompt_fingerprint(model or self.default_model, temperature, messages) if use_cache else None
+        cached = self.index.get(*key) if key is not None else None
+        if cached is not None:
+            yield cached.content
+            return
+        parts: List[str] = []
+        async for delta in self.inner.stream_chat_completion(messages, model, temperature, use_cache):
+            parts.append(delta)
+            yield delta
+        if key is not None:
+            self.index.set(*key, Completion(content="".join(parts), model=model or self.default_model))
@@ -0,0 +1,130 @@
+"""
+Single-flight coalescing of identical concurrent provider requests.
+
+While an upstream call for a request key is running, identical requests wait for that call
+instead of starting their own. Streams are shared too: late joiners replay the chunks
+received so far and then follow the live stream. A shared stream is cancelled upstream
+once its last subscriber leaves (e.g. every client disconnected).
+"""
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional
+
+from app.providers.base import AIProvider, Completion, ProviderWrapper
+from app.providers.cache import completion_key, title_key
+
+
+class _SharedStream:
+    """Fans one upstream stream out to any number of subscribers."""
+
+    def __init__(self, source: AsyncIterator[str]):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.abandoned = False  # every subscriber left before the end; the pump was cancelled
+        self._changed = asyncio.Condition()
+        self.task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[str]) -> None:
+        try:
+            async for chunk in source:
+                async with self._changed:
+                    self.chunks.append(chunk)
+                    self._changed.notify_all()
+        except BaseException as e:  # includes cancellation; subscribers must not hang
+            self.error = e
+        finally:
+            async with self._changed:
+                self.done = True
+                self._changed.notify_all()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        position = 0
+        self.subscribers += 1
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: len(self.chunks) > position or self.done)
+                    new_chunks = self.chunks[position:]
+                    finished = self.done
+                for chunk in new_chunks:
+                    yield chunk
+                position += len(new_chunks)
+                if finished and position == len(self.chunks):
+                    break
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                self.abandoned = True
+                self.task.cancel()  # nobody is reading: stop the upstream call
+        if self.error is not None:
+            raise self.error
+
+
+class SingleFlightProvider(ProviderWrapper):
+    """Coalesces identical in-flight completions, streams and titles into one upstream call each."""
+
+    def __init__(self, inner: AIProvider):
+        super().__init__(inner)
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._streams: Dict[str, _SharedStream] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls) + len(self._streams)
+
+    def _forget_stream(self, key: str, shared: _SharedStream) -> None:
+        if self._streams.get(key) is shared:  # not a newer stream started after this one was abandoned
+            del self._streams[key]
+
+    async def _share(self, key: str, make_call) -> object:
+        """Await the running call for key, starting it if there is none."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(make_call())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        # shield: one caller giving up (e.g. client disconnect) must not cancel the others' call
+        return await asyncio.shield(task)
+
+    async def generate_chat_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+    ) -> Completion:
+        if not use_cache:  # a caller asking for a fresh reply does not share one either
+            return await self.inner.generate_chat_completion(messages, model, temperature, use_cache)
+        key = completion_key(model or self.default_model, temperature, messages)
+        return await self._share(
+            key, lambda: self.inner.generate_chat_completion(messages, model, temperature, use_cache)
+        )
+
+    async def stream_chat_completion(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_cache: bool = True,
+    ) -> AsyncIterator[str]:
+        if not use_cache:
+            async for delta in self.inner.stream_chat_completion(messages, model, temperature, use_cache):
+                yield delta
+            return
+        key = completion_key(model or self.default_model, temperature, messages)
+        shared = self._streams.get(key)
+        if shared is None or shared.abandoned:
+            shared = _SharedStream(self.inner.stream_chat_completion(messages, model, temperature, use_cache))
+            self._streams[key] = shared
+            shared.task.add_done_callback(lambda _, shared=shared: self._forget_stream(key, shared))
+        subscription = shared.subscribe()
+        try:
+            async for delta in subscription:
+                yield delta
+        finally:
+            await subscription.aclose()  # unsubscribe now, not whenever the generator is collected
+
+    async def generate_chat_title(self, first_message: str) -> str:
+        key = title_key(self.default_model, first_message)
+        return await self._share(key, lambda: self.inner.generate_chat_title(first_message))
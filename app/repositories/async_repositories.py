@@ -0,0 +1,52 @@
+"""
+Async versions of the repositories, for use with an AsyncSession (app.core.database.get_async_db).
+
+Each AsyncXRepository has the same static methods as XRepository, with the same arguments
+(an AsyncSession in place of the Session), and is awaited:
+
+    chat = await AsyncChatRepository.get_chat_by_id(db, chat_id, user_id)
+
+Methods run the sync implementation through AsyncSession.run_sync, so queries and business
+rules live in one place while the database I/O goes through the async driver (aiosqlite,
+asyncpg) on the event loop instead of a threadpool thread. Writing methods (@writes) are
+awaited on the SQLite writer queue when it is on (see app.core.db_writer).
+"""
+import asyncio
+import functools
+from typing import Any, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db_writer import get_db_writer
+from app.repositories.auth_repository import UserRepository
+from app.repositories.chat_repository import ChatRepository
+from app.repositories.message_repository import MessageRepository
+
+
+def _async_method(repository: type, name: str, fn: Callable) -> staticmethod:
+    @functools.wraps(fn)
+    async def method(db: AsyncSession, *args: Any, **kwargs: Any) -> Any:
+        # Looked up per call, so the async method always runs the current sync implementation
+        impl = getattr(repository, name)
+        writer = get_db_writer() if getattr(impl, "db_write", False) else None
+        if writer is not None:
+            return await asyncio.wrap_future(writer.submit(impl, *args, **kwargs))
+        return await db.run_sync(impl, *args, **kwargs)
+
+    return staticmethod(method)
+
+
+def make_async_repository(repository: type) -> type:
+    """Build AsyncX from repository X: one awaitable static method per static method of X."""
+    namespace = {
+        name: _async_method(repository, name, value.__func__)
+        for name, value in vars(repository).items()
+        if isinstance(value, staticmethod)
+    }
+    namespace["__doc__"] = f"Async {repository.__name__}: same methods, taking an AsyncSession."
+    return type(f"Async{repository.__name__}", (), namespace)
+
+
+AsyncUserRepository = make_async_repository(UserRepository)
+AsyncChatRepository = make_async_repository(ChatRepository)
+AsyncMessageRepository = make_async_repository(MessageRepository)
@@ -2,9 +2,12 @@
 Repository layer for Auth operations
 """
 from app.models.database import User
+import functools
 from typing import Optional
 from sqlalchemy.orm import Session
-from app.core.security import hash_password, verify_password
+from app.core.db_writer import after_commit, writes
+from app.core.pagination import CursorKey, Page, keyset_page
+from app.core.principals import invalidate_principal
 
 
 class UserRepository:
@@ -21,14 +24,17 @@ class UserRepository:
         return db.query(User).filter(User.id == user_id).first()
 
     @staticmethod
-    def create_user(db: Session, email: str, password: str, role: str = "user") -> User:
-        user = User(email=email, hashed_password=hash_password(password), role=role)
+    @writes
+    def create_user(db: Session, email: str, hashed_password: str, role: str = "user") -> User:
+        """Create a user; hashed_password comes from app.core.security.hash_password."""
+        user = User(email=email, hashed_password=hashed_password, role=role)
         db.add(user)
         db.commit()
         db.refresh(user)
         return user
 
     @staticmethod
+    @writes
     def update_role(db: Session, user_id: str, role: str) -> Optional[User]:
         """Update a user's role (e.g. promote to admin)."""
         user = UserRepository.get_by_id(db, user_id)
@@ -36,10 +42,12 @@ class UserRepository:
             return None
         user.role = role
         db.commit()
+        after_commit(db, functools.partial(invalidate_principal, user.id))
         db.refresh(user)
         return user
 
     @staticmethod
+    @writes
     def update_role_by_email(db: Session, email: str, role: str) -> Optional[User]:
         """Update a user's role by email (for bootstrap/dev helpers)."""
         user = UserRepository.get_by_email(db, email)
@@ -47,6 +55,7 @@ class UserRepository:
             return None
         user.role = role
         db.commit()
+        after_commit(db, functools.partial(invalidate_principal, user.id))
         db.refresh(user)
         return user
 
@@ -55,21 +64,32 @@ class UserRepository:
         """Return all users (for admin)."""
         return db.query(User).order_by(User.created_at.desc()).offset(offset).limit(limit).all()
 
+    @staticmethod
+    def get_users_page(
+        db: Session,
+        limit: int = 100,
+        before: Optional[CursorKey] = None,
+        after: Optional[CursorKey] = None,
+    ) -> Page:
+        """One page of all users, newest first, keyed on (created_at, id) (for admin)."""
+        return keyset_page(db.query(User), User.created_at, User.id, limit, before, after, newest_first=True)
+
     @staticmethod
     def count_users(db: Session) -> int:
         """Total user count (for admin)."""
         return db.query(User).count()
 
     @staticmethod
-    def authenticate(db: Session, email: str, password: str) -> Optional[User]:
-        user = UserRepository.get_by_email(db, email)
-        if not user:
-            return None
-        if not verify_password(password, user.hashed_password):
-            return None
-        return user
+    @writes
+    def update_password_hash(db: Session, user_id: str, hashed_password: str) -> None:
+        """Replace the stored password hash (e.g. rehash of a legacy password on login)."""
+        db.query(User).filter(User.id == user_id).update(
+            {User.hashed_password: hashed_password}, synchronize_session=False
+        )
+        db.commit()
 
     @staticmethod
+    @writes
     def increment_token_version(db: Session, user_id: str) -> None:
         """Increment token_version to invalidate all existing tokens for this user."""
         user = UserRepository.get_by_id(db, user_id)
@@ -77,3 +97,4 @@ class UserRepository:
             current = int(user.token_version) if user.token_version else 0
             user.token_version = str(current + 1)
             db.commit()
+            after_commit(db, functools.partial(invalidate_principal, user.id))
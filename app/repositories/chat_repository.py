@@ -1,8 +1,12 @@
 """
 Repository layer for Chat operations
 """
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Collection, List, Optional, Tuple
+from app.core.database import use_primary
+from app.core.db_writer import writes
+from app.core.pagination import CursorKey, Page, keyset_page
 from app.models.database import Chat, Message
 from datetime import datetime
 
@@ -13,6 +17,7 @@ class ChatRepository:
     """
 
     @staticmethod
+    @writes
     def create_chat(db: Session, user_id: str, title: Optional[str] = None) -> Chat:
         """
         Create a new chat for a user
@@ -33,6 +38,17 @@ class ChatRepository:
             Chat.user_id == user_id
         ).first()
 
+    @staticmethod
+    def get_or_create_chat(db: Session, chat_id: Optional[str], user_id: str) -> Chat:
+        """
+        Get the user's chat by ID, or create a new (untitled) chat if chat_id is
+        omitted or does not belong to the user. The lookup reads the primary: on a lagging
+        replica an existing chat would look missing and the turn would go to a new chat.
+        """
+        with use_primary(db):
+            chat = ChatRepository.get_chat_by_id(db, chat_id, user_id) if chat_id else None
+        return chat or ChatRepository.create_chat(db, user_id, title=None)
+
     @staticmethod
     def get_chat_by_id_any(db: Session, chat_id: str) -> Optional[Chat]:
         """Get any chat by ID (for admin)."""
@@ -48,6 +64,27 @@ class ChatRepository:
         ).order_by(Chat.updated_at.desc()).offset(offset).limit(limit).all()
 
     @staticmethod
+    def get_user_chats_page(
+        db: Session,
+        user_id: str,
+        limit: int = 50,
+        before: Optional[CursorKey] = None,
+        after: Optional[CursorKey] = None,
+    ) -> Page:
+        """
+        One page of a user's chats, most recent first, keyed on (updated_at, id):
+        the newest chats, or those updated before / after a cursor
+        """
+        query = db.query(Chat).filter(Chat.user_id == user_id)
+        return keyset_page(query, Chat.updated_at, Chat.id, limit, before, after, newest_first=True)
+
+    @staticmethod
+    def count_user_chats(db: Session, user_id: str) -> int:
+        """Total number of chats of a user"""
+        return db.query(func.count(Chat.id)).filter(Chat.user_id == user_id).scalar()
+
+    @staticmethod
+    @writes
     def delete_chat(db: Session, chat_id: str, user_id: str) -> bool:
         """
         Delete a chat (and all its messages via cascade)
@@ -61,15 +98,95 @@ class ChatRepository:
         return False
 
     @staticmethod
-    def update_chat_title(db: Session, chat_id: str, user_id: str, title: str) -> Optional[Chat]:
+    @writes
+    def update_chat_title(
+        db: Session,
+        chat_id: str,
+        user_id: str,
+        title: str,
+        only_if_untitled: bool = False,
+    ) -> Optional[Chat]:
         """
-        Update the title of a chat
+        Update the title of a chat.
+        With only_if_untitled=True, a title set in the meantime (e.g. by the user) is kept.
         """
         chat = ChatRepository.get_chat_by_id(db, chat_id, user_id)
-        if chat:
+        if chat and not (only_if_untitled and chat.title is not None):
             chat.title = title
             chat.updated_at = datetime.utcnow()
             db.commit()
             db.refresh(chat)
         return chat
 
+
+    @staticmethod
+    def get_untitled_chats(
+        db: Session,
+        limit: int = 10,
+        max_attempts: Optional[int] = None,
+    ) -> List[Tuple[str, str, str]]:
+        """
+        Get chats that have no title yet but already have a user message, oldest first,
+        skipping chats whose title generation already failed max_attempts times.
+        Returns (chat_id, user_id, first_user_message) tuples.
+        """
+        first_message = (
+            select(Message.content)
+            .where(Message.chat_id == Chat.id, Message.role == "user")
+            .order_by(Message.id)
+            .limit(1)
+            .correlate(Chat)
+            .scalar_subquery()
+        )
+        query = db.query(Chat.id, Chat.user_id, first_message).filter(
+            Chat.title.is_(None),
+            first_message.isnot(None),
+        )
+        if max_attempts is not None:
+            query = query.filter(Chat.title_attempts < max_attempts)
+        return [tuple(row) for row in query.order_by(Chat.created_at).limit(limit).all()]
+
+    @staticmethod
+    @writes
+    def record_title_failures(db: Session, chat_ids: Collection[str]) -> None:
+        """Count a failed title generation for each chat."""
+        db.query(Chat).filter(Chat.id.in_(list(chat_ids))).update(
+            {Chat.title_attempts: Chat.title_attempts + 1}, synchronize_session=False
+        )
+        db.commit()
+
+    @staticmethod
+    def get_summary(db: Session, chat_id: str) -> Tuple[Optional[str], Optional[int]]:
+        """Return (summary, summary_through_id) for a chat ((None, None) if it has no summary)."""
+        row = db.query(Chat.summary, Chat.summary_through_id).filter(Chat.id == chat_id).first()
+        return (row[0], row[1]) if row else (None, None)
+
+    @staticmethod
+    @writes
+    def update_summary(
+        db: Session,
+        chat_id: str,
+        summary: str,
+        through_id: int,
+        previous_through_id: Optional[int],
+    ) -> bool:
+        """
+        Store a new rolling summary, only if nobody else advanced it since previous_through_id
+        was read. Leaves updated_at alone so chat ordering is unaffected.
+        Returns True if the summary was stored.
+        """
+        query = db.query(Chat).filter(Chat.id == chat_id)
+        if previous_through_id is None:
+            query = query.filter(Chat.summary_through_id.is_(None))
+        else:
+            query = query.filter(Chat.summary_through_id == previous_through_id)
+        updated = query.update(
+            {
+                Chat.summary: summary,
+                Chat.summary_through_id: through_id,
+                Chat.updated_at: Chat.updated_at,
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+        return updated == 1
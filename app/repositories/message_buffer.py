@@ -0,0 +1,162 @@
+"""
+Write-behind buffer for chat messages.
+
+Turns saved by concurrent requests are queued here and written by a background thread in
+batches: everything that arrived within MESSAGE_WRITE_BEHIND_INTERVAL_MS of the first queued
+turn (at most MESSAGE_WRITE_BEHIND_MAX_ROWS messages) goes into one transaction through
+MessageRepository.add_message_batch, so many requests share one commit (one fsync).
+
+Durability mode:
+    flush      callers wait until their turn is committed (default)
+    immediate  callers return as soon as the turn is queued; buffered turns are lost if the
+               process crashes, and are not visible to reads until flushed
+
+If a batch fails, its turns are retried one by one, so a bad turn only fails itself.
+"""
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    MESSAGE_WRITE_BEHIND_DURABILITY,
+    MESSAGE_WRITE_BEHIND_INTERVAL_MS,
+    MESSAGE_WRITE_BEHIND_MAX_ROWS,
+)
+from app.core.database import SessionLocal, note_write
+from app.repositories.message_repository import MessageRepository
+
+logger = logging.getLogger("app.db")
+
+DURABILITY_MODES = ("flush", "immediate")
+
+
+@dataclass
+class _PendingWrite:
+    messages: List[Tuple[str, str, str, datetime]]
+    titles: Dict[str, str]
+    future: Future = field(default_factory=Future)
+
+
+class MessageWriteBuffer:
+    """Collects message writes and commits them in batches (see module docstring). Thread-safe."""
+
+    def __init__(
+        self,
+        interval_ms: float = MESSAGE_WRITE_BEHIND_INTERVAL_MS,
+        max_rows: int = MESSAGE_WRITE_BEHIND_MAX_ROWS,
+        durability: str = MESSAGE_WRITE_BEHIND_DURABILITY,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(
+                f"Unknown MESSAGE_WRITE_BEHIND_DURABILITY '{durability}' "
+                f"(expected one of {', '.join(DURABILITY_MODES)})"
+            )
+        self.interval_seconds = interval_ms / 1000
+        self.max_rows = max(1, max_rows)
+        self.durability = durability
+        self._session_factory = session_factory
+        self._queue: "queue.Queue[Optional[_PendingWrite]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.flushes = 0
+        self.rows = 0
+
+    def submit(
+        self,
+        messages: List[Tuple[str, str, str, datetime]],
+        titles: Optional[Dict[str, str]] = None,
+    ) -> Future:
+        """Queue messages ((chat_id, role, content, created_at)); the future resolves once committed."""
+        write = _PendingWrite(messages, titles or {})
+        note_write()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="message-write-behind", daemon=True)
+                self._thread.start()
+            self._queue.put(write)
+        return write.future
+
+    async def add_turn(self, chat_id: str, user_message: str, reply: str, title: Optional[str] = None) -> None:
+        """Queue one chat turn; with durability "flush", return once it is committed."""
+        now = datetime.utcnow()
+        future = self.submit(
+            [(chat_id, "user", user_message, now), (chat_id, "assistant", reply, now)],
+            {chat_id: title} if title is not None else None,
+        )
+        if self.durability == "flush":
+            await asyncio.wrap_future(future)
+
+    def stop(self) -> None:
+        """Flush everything queued, then stop the thread (submit() starts a new one)."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(None)
+        if thread is not None:
+            thread.join()
+
+    def _run(self) -> None:
+        while True:
+            write = self._queue.get()
+            if write is None:
+                return
+            batch, rows = [write], len(write.messages)
+            deadline = time.monotonic() + self.interval_seconds
+            stopping = False
+            while rows < self.max_rows:
+                try:
+                    write = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if write is None:
+                    stopping = True
+                    break
+                batch.append(write)
+                rows += len(write.messages)
+            self._flush(batch)
+            if stopping:
+                return
+
+    def _write(self, batch: List[_PendingWrite]) -> None:
+        titles: Dict[str, str] = {}
+        for write in batch:
+            for chat_id, title in write.titles.items():
+                titles.setdefault(chat_id, title)
+        db = self._session_factory()
+        try:
+            MessageRepository.add_message_batch(db, [m for write in batch for m in write.messages], titles)
+        finally:
+            db.close()
+        self.flushes += 1
+        self.rows += sum(len(write.messages) for write in batch)
+
+    def _flush(self, batch: List[_PendingWrite]) -> None:
+        try:
+            self._write(batch)
+        except Exception as e:
+            if len(batch) > 1:
+                for write in batch:
+                    self._flush([write])
+                return
+            logger.exception("Write-behind flush of %d messages failed", len(batch[0].messages))
+            batch[0].future.set_exception(e)
+            return
+        for write in batch:
+            write.future.set_result(None)
+
+
+message_buffer = MessageWriteBuffer()
+
+
+def shutdown_message_buffer() -> None:
+    """Flush buffered messages and stop the buffer thread (call on app shutdown)."""
+    message_buffer.stop()
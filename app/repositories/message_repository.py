@@ -1,38 +1,162 @@
 """
 Repository layer for Messages operations
 """
+from sqlalchemy import bindparam, func, insert, update
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from app.models.database import Chat, Message
+from app.core.database import use_primary
+from app.core.db_writer import writes
+from app.core.pagination import CursorKey, Page, keyset_page
+from app.core.tokens import count_tokens, message_tokens
 from datetime import datetime
 
 
+# Characters of the newest message stored on the chat (Chat.last_message_preview)
+PREVIEW_CHARS = 120
+
+
+def message_preview(content: str) -> str:
+    """Single-line start of a message, for chat listings."""
+    preview = " ".join(content.split())
+    return preview if len(preview) <= PREVIEW_CHARS else preview[: PREVIEW_CHARS - 1] + "…"
+
+
 class MessageRepository:
     """
     Repository for managing Message entities
     """
 
     @staticmethod
+    @writes
     def add_message(db: Session, chat_id: str, role: str, content: str) -> Message:
         """
-        Add a message to a chat
+        Add a message to a chat, and update the chat's counter, preview and timestamp
+        in the same transaction
         """
-        message = Message(chat_id=chat_id, role=role, content=content)
+        message = Message(chat_id=chat_id, role=role, content=content, token_count=count_tokens(content))
         db.add(message)
-        
-        # Update chat's updated_at timestamp
-        chat = db.query(Chat).filter(Chat.id == chat_id).first()
-        if chat:
-            chat.updated_at = datetime.utcnow()
-        
+        db.execute(
+            update(Chat)
+            .where(Chat.id == chat_id)
+            .values(
+                message_count=Chat.message_count + 1,
+                last_message_preview=message_preview(content),
+                updated_at=datetime.utcnow(),
+            )
+            .execution_options(synchronize_session=False)
+        )
         db.commit()
         db.refresh(message)
         return message
 
+    @staticmethod
+    @writes
+    def add_turn(
+        db: Session,
+        chat_id: str,
+        user_content: str,
+        assistant_content: str,
+        title: Optional[str] = None,
+    ) -> Tuple[Message, Message]:
+        """
+        Save one chat turn (user message and reply) as a unit: both messages, the chat's
+        counter, preview and timestamp, and the title (only if the chat has none yet) are
+        written in one transaction. The returned messages are not refreshed.
+        """
+        user = Message(chat_id=chat_id, role="user", content=user_content, token_count=count_tokens(user_content))
+        reply = Message(
+            chat_id=chat_id, role="assistant", content=assistant_content, token_count=count_tokens(assistant_content)
+        )
+        db.add_all([user, reply])
+        values = {
+            "message_count": Chat.message_count + 2,
+            "last_message_preview": message_preview(assistant_content),
+            "updated_at": datetime.utcnow(),
+        }
+        if title is not None:
+            values["title"] = func.coalesce(Chat.title, title)
+        db.execute(update(Chat).where(Chat.id == chat_id).values(**values).execution_options(synchronize_session=False))
+        db.commit()
+        return user, reply
+
+    @staticmethod
+    @writes
+    def add_message_batch(
+        db: Session,
+        messages: List[Tuple[str, str, str, datetime]],
+        titles: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Insert many messages ((chat_id, role, content, created_at), oldest first, any chats)
+        in one transaction: one multi-row INSERT, then one UPDATE per chat for its counter,
+        preview and timestamp, and titles (chat_id -> title; only set on untitled chats).
+        """
+        if not messages:
+            return
+        db.execute(insert(Message), [
+            {
+                "chat_id": chat_id,
+                "role": role,
+                "content": content,
+                "token_count": count_tokens(content),
+                "created_at": created_at,
+            }
+            for chat_id, role, content, created_at in messages
+        ])
+        chats: Dict[str, dict] = {}
+        for chat_id, _, content, created_at in messages:
+            chat = chats.setdefault(chat_id, {"b_id": chat_id, "b_count": 0, "b_title": (titles or {}).get(chat_id)})
+            chat["b_count"] += 1
+            chat["b_preview"] = message_preview(content)
+            chat["b_updated_at"] = created_at
+        # Core statement: an executemany UPDATE with per-row WHERE values
+        db.connection().execute(
+            update(Chat.__table__)
+            .where(Chat.id == bindparam("b_id"))
+            .values(
+                message_count=Chat.message_count + bindparam("b_count"),
+                last_message_preview=bindparam("b_preview"),
+                updated_at=bindparam("b_updated_at"),
+                title=func.coalesce(Chat.title, bindparam("b_title")),
+            ),
+            list(chats.values()),
+        )
+        db.commit()
+
+    @staticmethod
+    @writes
+    def delete_message(db: Session, chat_id: str, message_id: int) -> bool:
+        """
+        Delete a message, and update the chat's counter and preview in the same transaction.
+        Returns True if deleted, False if not found
+        """
+        deleted = db.query(Message).filter(
+            Message.id == message_id,
+            Message.chat_id == chat_id,
+        ).delete(synchronize_session=False)
+        if not deleted:
+            return False
+        newest = db.query(Message.content).filter(
+            Message.chat_id == chat_id
+        ).order_by(Message.id.desc()).first()
+        db.execute(
+            update(Chat)
+            .where(Chat.id == chat_id)
+            .values(
+                message_count=Chat.message_count - 1,
+                last_message_preview=message_preview(newest[0]) if newest else None,
+                updated_at=Chat.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return True
+
     @staticmethod
     def get_message_count(db: Session, chat_id: str) -> int:
         """Return the number of messages in a chat (e.g. to detect first message)."""
-        return db.query(Message).filter(Message.chat_id == chat_id).count()
+        return db.query(Chat.message_count).filter(Chat.id == chat_id).scalar() or 0
 
     @staticmethod
     def get_chat_messages(db: Session, chat_id: str, limit: Optional[int] = None) -> List[Message]:
@@ -45,13 +169,76 @@ class MessageRepository:
         return query.all()
 
     @staticmethod
-    def get_chat_messages_for_ai(db: Session, chat_id: str, limit: int = 50) -> List[dict]:
+    def get_chat_messages_page(
+        db: Session,
+        chat_id: str,
+        limit: int = 50,
+        before: Optional[CursorKey] = None,
+        after: Optional[CursorKey] = None,
+    ) -> Page:
         """
-        Get messages formatted for AI API (list of dicts with role and content)
+        One page of a chat's messages, oldest first, keyed on (created_at, id):
+        the newest messages, or those sent before / after a cursor
         """
-        messages = MessageRepository.get_chat_messages(db, chat_id, limit)
-        return [
-            {"role": msg.role, "content": msg.content}
-            for msg in messages
-        ]
+        query = db.query(Message).filter(Message.chat_id == chat_id)
+        return keyset_page(query, Message.created_at, Message.id, limit, before, after)
 
+    @staticmethod
+    def get_context_window(
+        db: Session,
+        chat_id: str,
+        token_budget: int,
+        after_id: Optional[int] = None,
+        always_include_newest: bool = True,
+    ) -> Tuple[List[dict], Optional[int]]:
+        """
+        Get the newest messages (with id > after_id) that fit in token_budget, formatted for
+        AI API (list of dicts with role and content, oldest first). The newest message is
+        included even if it alone exceeds the budget, unless always_include_newest is False.
+
+        Returns (messages, dropped_through_id): dropped_through_id is the id of the newest
+        message that did not fit (it and every older message after after_id were left out),
+        or None if nothing was left out.
+        """
+        query = db.query(
+            Message.id, Message.role, Message.content, Message.token_count
+        ).filter(Message.chat_id == chat_id)
+        if after_id is not None:
+            query = query.filter(Message.id > after_id)
+        rows = query.order_by(Message.created_at.desc(), Message.id.desc()).yield_per(50)
+
+        selected = []
+        used = 0
+        dropped_through_id = None
+        for message_id, role, content, token_count in rows:
+            tokens = message_tokens(content, token_count)
+            if (selected or not always_include_newest) and used + tokens > token_budget:
+                dropped_through_id = message_id
+                break
+            selected.append({"role": role, "content": content})
+            used += tokens
+        selected.reverse()
+        return selected, dropped_through_id
+
+    @staticmethod
+    def get_chat_messages_for_ai(db: Session, chat_id: str, token_budget: int) -> List[dict]:
+        """
+        Get the newest messages that fit in token_budget, formatted for AI API
+        (list of dicts with role and content, oldest first). Always reads the primary.
+        """
+        with use_primary(db):
+            return MessageRepository.get_context_window(db, chat_id, token_budget)[0]
+
+    @staticmethod
+    def get_messages_in_range(
+        db: Session,
+        chat_id: str,
+        after_id: Optional[int],
+        through_id: int,
+        limit: int,
+    ) -> List[Message]:
+        """Get up to limit messages with after_id < id <= through_id, oldest first."""
+        query = db.query(Message).filter(Message.chat_id == chat_id, Message.id <= through_id)
+        if after_id is not None:
+            query = query.filter(Message.id > after_id)
+        return query.order_by(Message.id).limit(limit).all()
@@ -1,64 +1,217 @@
 """
 AI Service - handles chat interactions with AI
+
+Provider calls are awaited on the event loop; the (synchronous) database work around
+them runs in the threadpool, so a slow LLM call never holds a worker thread.
 """
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Tuple
+from fastapi import HTTPException
 from sqlalchemy.orm import Session
-from app.services.memory_service import add_message, get_conversation
+from starlette.concurrency import run_in_threadpool
+from app.services.memory_service import get_conversation, save_turn
 from app.repositories.message_repository import MessageRepository
-from app.repositories.chat_repository import ChatRepository
-from app.providers.groq_provider import generate_chat_completion, generate_chat_title
-from app.core.config import SYSTEM_PROMPT
-from app.core.exceptions import AIProviderError
+from app.providers import get_provider
+from app.providers.instrumentation import UpstreamCall, upstream_calls
+from app.providers.router import get_model_router
+from app.services.title_service import title_worker
+from app.core.config import METRICS_ENABLED, RATE_LIMIT_ENABLED, SYSTEM_PROMPT
+from app.core.database import use_primary
+from app.core.exceptions import AIProviderError, RateLimitExceededError
+from app.core.metrics import llm_queue_wait
+from app.core.rate_limit import upstream_limiter, user_rate_limiter
+
+
+def check_rate_limit(user_id: Optional[str], cost: int = 1) -> None:
+    """
+    Charge cost requests (e.g. the items of a batch) to the user's token bucket.
+
+    Raises:
+        RateLimitExceededError: 429 with Retry-After if the user is over the limit
+    """
+    if RATE_LIMIT_ENABLED and user_id:
+        user_rate_limiter.check(user_id, cost)
+
+
+@asynccontextmanager
+async def _upstream_slot(model: Optional[str] = None) -> AsyncIterator[float]:
+    """
+    Hold one of the globally limited upstream slots (429 if none frees up in time).
+    The time spent waiting is recorded in the llm_queue_wait_seconds histogram, labeled
+    with the model the request was routed to (None: the provider's default model).
+    """
+    if not RATE_LIMIT_ENABLED:
+        yield 0.0
+        return
+    model = model or get_provider().default_model
+    acquired = False
+    try:
+        async with upstream_limiter.slot() as waited:
+            acquired = True
+            if METRICS_ENABLED:
+                llm_queue_wait.observe(waited, model=model, outcome="dispatched")
+            yield waited
+    except RateLimitExceededError:
+        if METRICS_ENABLED and not acquired:
+            llm_queue_wait.observe(upstream_limiter.queue_timeout_seconds, model=model, outcome="rejected")
+        raise
+
+
+def _upstream_duration(calls: List[UpstreamCall], model: Optional[str]) -> Optional[float]:
+    """Latency of the successful upstream call to the routed model (None if it made none)."""
+    model = model or get_provider().default_model
+    for call in reversed(calls):
+        if call.model == model and call.error is None:
+            return call.duration
+    return None
+
+
+def _provider_error(error: Exception) -> AIProviderError:
+    """Map a failure to AIProviderError (with Retry-After when the provider's circuit is open)."""
+    return AIProviderError(
+        f"Failed to get AI response: {str(error)}",
+        retry_after=getattr(error, "retry_after", None),
+    )
+
+
+def _start_turn(db: Session, chat_id: str, user_message: str) -> Tuple[bool, List[dict]]:
+    """
+    Build the messages list for AI (system prompt + rolling summary + the newest conversation
+    messages that fit the context budget + the new user message, leaving room for the reply).
+    Nothing is written yet: the user message is saved together with the reply.
+    Returns (is_first_message, messages).
+    """
+    with use_primary(db):
+        is_first_message = MessageRepository.get_message_count(db, chat_id) == 0
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    messages.extend(get_conversation(db, chat_id, pending={"role": "user", "content": user_message}))
+    return is_first_message, messages
+
+
+async def _finish_turn(
+    db: Session,
+    chat_id: str,
+    user_message: str,
+    reply: str,
+    is_first_message: bool,
+    user_id: Optional[str],
+) -> None:
+    """
+    Save the turn in one transaction (shared with other turns when the write-behind buffer
+    is on). On a chat's first message the title is normally left to the background title
+    worker; when the worker is not running it is generated inline (reference/summary, not
+    copy-paste) and saved with the turn.
+    """
+    wants_title = is_first_message and user_id is not None
+    title = None
+    if wants_title and not title_worker.running:
+        try:
+            title = await get_provider().generate_chat_title(user_message)
+        except Exception:
+            pass  # keep existing title (e.g. None or "New chat") on failure
+    await save_turn(db, chat_id, user_message, reply, title)
+    if wants_title and title_worker.running:
+        title_worker.notify()
 
 
-def chat_with_ai(
+async def chat_with_ai(
     db: Session,
     chat_id: str,
     user_message: str,
     user_id: Optional[str] = None,
+    use_cache: bool = True,
+    user_tier: Optional[str] = None,
 ) -> str:
     """
-    Process a user message and get AI response (always uses fast model).
+    Process a user message and get AI response from the configured provider.
     If this is the first message in the chat and user_id is provided,
-    the chat title is auto-generated from the message (AI-generated short title).
+    the chat title is auto-generated from the message (AI-generated short title),
+    by the background title worker when it is running.
 
     Args:
         db: Database session
         chat_id: ID of the chat conversation
         user_message: User's message
         user_id: Optional; required to auto-set chat title on first message
+        use_cache: If False, bypass the completion cache for this request
+        user_tier: The user's tier (role), for the tier routing policy
 
     Returns:
         AI's reply
 
+    Callers check the per-user limit with check_rate_limit first (before creating a chat).
+
     Raises:
+        RateLimitExceededError: If no upstream slot frees up in time
         AIProviderError: If AI service fails
     """
     try:
-        is_first_message = MessageRepository.get_message_count(db, chat_id) == 0
+        is_first_message, messages = await run_in_threadpool(_start_turn, db, chat_id, user_message)
+
+        # Get AI reply from the configured provider, with the model picked by the router
+        router = get_model_router()
+        route = router.route(messages, tier=user_tier)
+        async with _upstream_slot(route.model):
+            with upstream_calls() as calls:
+                try:
+                    completion = await get_provider().generate_chat_completion(
+                        messages, model=route.model, use_cache=use_cache
+                    )
+                except Exception as e:
+                    router.record(route, _upstream_duration(calls, route.model), error=e)
+                    raise
+            router.record(route, _upstream_duration(calls, route.model))
+            ai_reply = completion.content
 
-        # Add user message to conversation
-        add_message(db, chat_id, "user", user_message)
+        # Save the user message and the reply (nothing is saved if the provider failed)
+        await _finish_turn(db, chat_id, user_message, ai_reply, is_first_message, user_id)
+        return ai_reply
+    except HTTPException:
+        raise
+    except Exception as e:
+        # Re-raise as AIProviderError for proper HTTP handling
+        raise _provider_error(e)
 
-        # Build messages list for AI (system prompt + conversation history)
-        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-        messages.extend(get_conversation(db, chat_id))
 
-        # Get AI reply (fast model only)
-        ai_reply = generate_chat_completion(messages)
+async def stream_chat_with_ai(
+    db: Session,
+    chat_id: str,
+    user_message: str,
+    user_id: Optional[str] = None,
+    use_cache: bool = True,
+    user_tier: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of chat_with_ai: yields reply deltas as the provider produces them.
+    The turn (user message and assembled reply) is saved once the stream completes
+    (nothing is saved if the stream fails or the client disconnects).
+    Callers check the per-user limit with check_rate_limit before starting the stream.
 
-        # Save AI reply to conversation
-        add_message(db, chat_id, "assistant", ai_reply)
+    Raises:
+        RateLimitExceededError: If no upstream slot frees up in time
+        AIProviderError: If AI service fails (possibly after some deltas were yielded)
+    """
+    try:
+        is_first_message, messages = await run_in_threadpool(_start_turn, db, chat_id, user_message)
 
-        # Auto-generate chat title from first message (reference/summary, not copy-paste)
-        if is_first_message and user_id:
-            try:
-                title = generate_chat_title(user_message)
-                ChatRepository.update_chat_title(db, chat_id, user_id, title)
-            except Exception:
-                pass  # keep existing title (e.g. None or "New chat") on failure
+        router = get_model_router()
+        route = router.route(messages, tier=user_tier)
+        parts: List[str] = []
+        async with _upstream_slot(route.model):
+            with upstream_calls() as calls:
+                try:
+                    async for delta in get_provider().stream_chat_completion(
+                        messages, model=route.model, use_cache=use_cache
+                    ):
+                        parts.append(delta)
+                        yield delta
+                except Exception as e:
+                    router.record(route, _upstream_duration(calls, route.model), error=e)
+                    raise
+            router.record(route, _upstream_duration(calls, route.model))
 
-        return ai_reply
+        await _finish_turn(db, chat_id, user_message, "".join(parts), is_first_message, user_id)
+    except HTTPException:
+        raise
     except Exception as e:
-        # Re-raise as AIProviderError for proper HTTP handling
-        raise AIProviderError(f"Failed to get AI response: {str(e)}")
+        raise _provider_error(e)
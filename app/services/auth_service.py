@@ -0,0 +1,48 @@
+"""
+Auth Service - registration and password login.
+
+Password hashing runs in the hashing process pool (app.core.hashing) and database work in
+the threadpool, so logins never tie up the threads the chat endpoints need.
+"""
+import logging
+from typing import Optional
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import use_primary
+from app.core.hashing import hash_password_async, verify_password_async
+from app.core.security import needs_rehash
+from app.models.database import User
+from app.repositories.auth_repository import UserRepository
+
+logger = logging.getLogger("app.auth")
+
+
+async def register_user(db: Session, email: str, password: str) -> User:
+    """
+    Create a regular user with a hashed password.
+
+    Raises:
+        ValueError: If the password cannot be hashed (e.g. longer than 72 bytes)
+    """
+    hashed = await hash_password_async(password)
+    return await run_in_threadpool(UserRepository.create_user, db, email, hashed)
+
+
+async def authenticate(db: Session, email: str, password: str) -> Optional[User]:
+    """
+    Return the user if email and password match, else None.
+    Legacy (plaintext) or outdated-cost hashes are replaced with a fresh hash on success.
+    """
+    with use_primary(db):
+        user = await run_in_threadpool(UserRepository.get_by_email, db, email)
+    if not user or not await verify_password_async(password, user.hashed_password):
+        return None
+    if needs_rehash(user.hashed_password):
+        try:
+            hashed = await hash_password_async(password)
+            await run_in_threadpool(UserRepository.update_password_hash, db, user.id, hashed)
+        except Exception:
+            logger.warning("Could not rehash password for user_id=%s", user.id, exc_info=True)
+    return user
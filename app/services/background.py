@@ -0,0 +1,77 @@
+"""
+Background workers that run on the app's event loop.
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from contextlib import suppress
+from typing import Optional
+
+logger = logging.getLogger("app.workers")
+
+
+class BackgroundWorker(ABC):
+    """
+    Periodic asyncio worker. Subclasses implement run_once(), which is called every
+    interval_seconds, or soon after notify() (after debounce_seconds, so work that arrives
+    together is handled together).
+    """
+
+    name = "worker"
+
+    def __init__(self, interval_seconds: float, debounce_seconds: float = 0):
+        self.interval_seconds = interval_seconds
+        self.debounce_seconds = debounce_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the worker on the running event loop (no-op if already running)."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        """Cancel the worker and wait for it to exit."""
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+        self._task = None
+        self._wakeup = None
+        self._loop = None
+
+    def notify(self) -> None:
+        """
+        Ask the worker to run soon instead of waiting for the next interval.
+        Safe to call from threadpool threads as well as from the event loop.
+        """
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                if self.debounce_seconds:
+                    await asyncio.sleep(self.debounce_seconds)
+            self._wakeup.clear()
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("%s: run failed", self.name)
+
+    @abstractmethod
+    async def run_once(self) -> None:
+        """One round of work."""
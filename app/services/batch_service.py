@@ -0,0 +1,77 @@
+"""
+Batch Service - runs many chat messages for one user concurrently.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import BATCH_MAX_CONCURRENCY
+from app.core.database import SessionLocal
+from app.models.schemas import ChatBatchItemResult, ChatRequest
+from app.repositories.chat_repository import ChatRepository
+from app.services.ai_service import chat_with_ai
+
+logger = logging.getLogger("app.batch")
+
+
+async def _run_item(
+    index: int,
+    user_id: str,
+    item: ChatRequest,
+    user_tier: Optional[str] = None,
+) -> ChatBatchItemResult:
+    """Process one item with its own DB session; failures become an error result."""
+    chat_id: Optional[str] = None
+    db = SessionLocal()
+    try:
+        chat = await run_in_threadpool(ChatRepository.get_or_create_chat, db, item.chat_id, user_id)
+        chat_id = chat.id
+        reply = await chat_with_ai(
+            db=db,
+            chat_id=chat_id,
+            user_message=item.message,
+            user_id=user_id,
+            use_cache=item.use_cache,
+            user_tier=user_tier,
+        )
+        return ChatBatchItemResult(index=index, status_code=200, chat_id=chat_id, reply=reply)
+    except HTTPException as e:
+        return ChatBatchItemResult(index=index, status_code=e.status_code, chat_id=chat_id, error=str(e.detail))
+    except Exception:
+        logger.exception("Batch item %d failed", index)
+        return ChatBatchItemResult(index=index, status_code=500, chat_id=chat_id, error="Internal server error")
+    finally:
+        await run_in_threadpool(db.close)
+
+
+async def run_chat_batch(
+    user_id: str,
+    items: List[ChatRequest],
+    max_concurrency: int = BATCH_MAX_CONCURRENCY,
+    user_tier: Optional[str] = None,
+) -> List[ChatBatchItemResult]:
+    """
+    Run all items for user_id, at most max_concurrency at a time.
+    Items that name the same chat run one after another in request order (so each sees
+    the previous reply); items without a chat_id each get a new chat.
+    Returns one result per item, in request order. The caller charges the rate limit.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    results: List[Optional[ChatBatchItemResult]] = [None] * len(items)
+
+    # One sequential lane per chat_id; every item without a chat_id is its own lane
+    lanes: Dict[object, List[int]] = defaultdict(list)
+    for index, item in enumerate(items):
+        lanes[item.chat_id or ("new", index)].append(index)
+
+    async def run_lane(indexes: List[int]) -> None:
+        for index in indexes:
+            async with semaphore:
+                results[index] = await _run_item(index, user_id, items[index], user_tier)
+
+    await asyncio.gather(*(run_lane(indexes) for indexes in lanes.values()))
+    return results
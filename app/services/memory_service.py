@@ -1,9 +1,21 @@
 """
 Memory/Message service - now uses database via repository
 """
-from typing import List
+from typing import List, Optional
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.config import (
+    CONTEXT_TOKEN_BUDGET,
+    MESSAGE_WRITE_BEHIND_ENABLED,
+    RESPONSE_TOKEN_RESERVE,
+    SYSTEM_PROMPT,
+)
+from app.core.database import use_primary
+from app.core.tokens import message_tokens
+from app.repositories.chat_repository import ChatRepository
+from app.repositories.message_buffer import message_buffer
 from app.repositories.message_repository import MessageRepository
+from app.services.summary_service import summary_worker
 
 
 def add_message(db: Session, chat_id: str, role: str, content: str):
@@ -13,8 +25,61 @@ def add_message(db: Session, chat_id: str, role: str, content: str):
     return MessageRepository.add_message(db, chat_id, role, content)
 
 
-def get_conversation(db: Session, chat_id: str, limit: int = 50) -> List[dict]:
+def persist_turn(db: Session, chat_id: str, user_message: str, reply: str, title: Optional[str] = None):
     """
-    Get conversation messages formatted for AI API
+    Save a completed turn (user message, reply and optionally the first title) in one
+    transaction, so a failed provider call never leaves a user message without its reply.
     """
-    return MessageRepository.get_chat_messages_for_ai(db, chat_id, limit)
+    return MessageRepository.add_turn(db, chat_id, user_message, reply, title)
+
+
+async def save_turn(db: Session, chat_id: str, user_message: str, reply: str, title: Optional[str] = None) -> None:
+    """
+    Save a completed turn: through the write-behind buffer (batched with other requests'
+    turns) when MESSAGE_WRITE_BEHIND_ENABLED, otherwise in its own transaction.
+    """
+    if MESSAGE_WRITE_BEHIND_ENABLED:
+        await message_buffer.add_turn(chat_id, user_message, reply, title)
+    else:
+        await run_in_threadpool(persist_turn, db, chat_id, user_message, reply, title)
+
+
+def summary_message(summary: Optional[str]) -> Optional[dict]:
+    """The prompt message carrying a chat's rolling summary (None if there is none)."""
+    if not summary:
+        return None
+    return {"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"}
+
+
+def history_token_budget(summary: Optional[dict] = None) -> int:
+    """
+    Tokens available for conversation messages: CONTEXT_TOKEN_BUDGET minus the system prompt,
+    the summary message (if any) and the room reserved for the reply.
+    """
+    budget = CONTEXT_TOKEN_BUDGET - RESPONSE_TOKEN_RESERVE - message_tokens(SYSTEM_PROMPT)
+    if summary:
+        budget -= message_tokens(summary["content"])
+    return budget
+
+
+def get_conversation(db: Session, chat_id: str, pending: Optional[dict] = None) -> List[dict]:
+    """
+    Get conversation messages formatted for AI API: the chat's rolling summary (if any),
+    followed by the most recent messages that fit the token budget.
+    pending is a message not saved yet (the user message of the current turn); it is
+    appended last and its tokens come out of the budget.
+    Chats that just dropped unsummarized messages are queued for the summary worker.
+    Read from the primary: a lagging replica would drop the newest turns from the context.
+    """
+    with use_primary(db):
+        summary, through_id = ChatRepository.get_summary(db, chat_id)
+        summary_msg = summary_message(summary)
+        budget = history_token_budget(summary_msg)
+        if pending is not None:
+            budget -= message_tokens(pending["content"])
+        messages, dropped_through_id = MessageRepository.get_context_window(
+            db, chat_id, budget, after_id=through_id, always_include_newest=pending is None
+        )
+    if dropped_through_id is not None:
+        summary_worker.enqueue(chat_id)
+    return ([summary_msg] if summary_msg else []) + messages + ([pending] if pending is not None else [])
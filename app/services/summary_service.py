@@ -0,0 +1,115 @@
+"""
+Summary Service - keeps a rolling summary of long chats, off the request path.
+
+When messages fall out of a chat's context window, the chat is queued here; the worker
+folds those messages (oldest first) into Chat.summary, which memory_service prepends to
+the prompt. Each run only sends the newly dropped messages plus the previous summary.
+"""
+import logging
+import threading
+from typing import List, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import (
+    SUMMARY_DEBOUNCE_SECONDS,
+    SUMMARY_MAX_MESSAGES_PER_RUN,
+    SUMMARY_MAX_WORDS,
+    SUMMARY_POLL_INTERVAL_SECONDS,
+)
+from app.core.database import SessionLocal, use_primary
+from app.providers import get_provider
+from app.repositories.chat_repository import ChatRepository
+from app.repositories.message_repository import MessageRepository
+from app.services.background import BackgroundWorker
+
+logger = logging.getLogger("app.summaries")
+
+
+class SummaryWorker(BackgroundWorker):
+    """Folds messages that left the context window into each chat's rolling summary."""
+
+    name = "summary-worker"
+
+    def __init__(
+        self,
+        max_messages_per_run: int = SUMMARY_MAX_MESSAGES_PER_RUN,
+        max_words: int = SUMMARY_MAX_WORDS,
+        interval_seconds: float = SUMMARY_POLL_INTERVAL_SECONDS,
+        debounce_seconds: float = SUMMARY_DEBOUNCE_SECONDS,
+    ):
+        super().__init__(interval_seconds, debounce_seconds)
+        self.max_messages_per_run = max_messages_per_run
+        self.max_words = max_words
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def enqueue(self, chat_id: str) -> None:
+        """Queue a chat whose context window dropped unsummarized messages (thread-safe)."""
+        if not self.running:
+            return
+        with self._lock:
+            self._pending.add(chat_id)
+        self.notify()
+
+    def _take_pending(self) -> List[str]:
+        with self._lock:
+            chat_ids = list(self._pending)
+            self._pending.clear()
+        return chat_ids
+
+    def _load_work(self, chat_id: str):
+        """Return (summary, through_id, messages to fold) or None if the chat is up to date."""
+        from app.services.memory_service import history_token_budget, summary_message  # circular at import time
+
+        db = SessionLocal()
+        try:
+            with use_primary(db):  # the summary saved from this must build on the latest one
+                summary, through_id = ChatRepository.get_summary(db, chat_id)
+                budget = history_token_budget(summary_message(summary))
+                _, dropped_through_id = MessageRepository.get_context_window(
+                    db, chat_id, budget, after_id=through_id
+                )
+                if dropped_through_id is None:
+                    return None
+                messages = MessageRepository.get_messages_in_range(
+                    db, chat_id, through_id, dropped_through_id, self.max_messages_per_run
+                )
+            return summary, through_id, [(m.id, m.role, m.content) for m in messages]
+        finally:
+            db.close()
+
+    @staticmethod
+    def _save(chat_id: str, summary: str, through_id: int, previous_through_id) -> bool:
+        db = SessionLocal()
+        try:
+            return ChatRepository.update_summary(db, chat_id, summary, through_id, previous_through_id)
+        finally:
+            db.close()
+
+    async def summarize_chat(self, chat_id: str) -> bool:
+        """Fold the next batch of dropped messages into the chat's summary. Returns True if it changed."""
+        work = await run_in_threadpool(self._load_work, chat_id)
+        if work is None:
+            return False
+        summary, previous_through_id, messages = work
+        if not messages:
+            return False
+        new_summary = await get_provider().summarize_conversation(
+            summary,
+            [{"role": role, "content": content} for _, role, content in messages],
+            max_words=self.max_words,
+        )
+        return await run_in_threadpool(self._save, chat_id, new_summary, messages[-1][0], previous_through_id)
+
+    async def run_once(self) -> None:
+        for chat_id in self._take_pending():
+            try:
+                # A long backlog is folded a batch at a time until the chat is up to date
+                while await self.summarize_chat(chat_id):
+                    pass
+            except Exception:
+                logger.warning("Summarizing chat %s failed", chat_id, exc_info=True)
+
+
+summary_worker = SummaryWorker()
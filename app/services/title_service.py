@@ -0,0 +1,88 @@
+"""
+Title Service - generates chat titles in the background, off the request path.
+
+The worker picks up chats that have a user message but no title, asks the provider
+for all their titles in one batched call and saves them with ChatRepository.update_chat_title.
+"""
+import logging
+from typing import List, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import (
+    TITLE_BATCH_SIZE,
+    TITLE_DEBOUNCE_SECONDS,
+    TITLE_MAX_ATTEMPTS,
+    TITLE_POLL_INTERVAL_SECONDS,
+)
+from app.core.database import SessionLocal, use_primary
+from app.providers import get_provider
+from app.repositories.chat_repository import ChatRepository
+from app.services.background import BackgroundWorker
+
+logger = logging.getLogger("app.titles")
+
+
+class TitleWorker(BackgroundWorker):
+    """Batches untitled chats into one provider call per run."""
+
+    name = "title-worker"
+
+    def __init__(
+        self,
+        batch_size: int = TITLE_BATCH_SIZE,
+        max_attempts: int = TITLE_MAX_ATTEMPTS,
+        interval_seconds: float = TITLE_POLL_INTERVAL_SECONDS,
+        debounce_seconds: float = TITLE_DEBOUNCE_SECONDS,
+    ):
+        super().__init__(interval_seconds, debounce_seconds)
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+
+    def _load_batch(self) -> List[Tuple[str, str, str]]:
+        db = SessionLocal()
+        try:
+            with use_primary(db):  # a lagging replica would hand out chats that were just titled
+                return ChatRepository.get_untitled_chats(db, self.batch_size, max_attempts=self.max_attempts)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _save_titles(chats: List[Tuple[str, str, str]], titles: List[str]) -> None:
+        db = SessionLocal()
+        try:
+            for (chat_id, user_id, _), title in zip(chats, titles):
+                ChatRepository.update_chat_title(db, chat_id, user_id, title, only_if_untitled=True)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _record_failure(chats: List[Tuple[str, str, str]]) -> None:
+        """Count a failed attempt on each chat; chats that keep failing are skipped from then on."""
+        db = SessionLocal()
+        try:
+            ChatRepository.record_title_failures(db, [chat_id for chat_id, _, _ in chats])
+        finally:
+            db.close()
+
+    async def run_batch(self) -> int:
+        """Title one batch of chats. Returns the number of chats processed."""
+        chats = await run_in_threadpool(self._load_batch)
+        if not chats:
+            return 0
+        try:
+            titles = await get_provider().generate_chat_titles([message for _, _, message in chats])
+        except Exception:
+            logger.warning("Title generation failed for %d chats", len(chats), exc_info=True)
+            await run_in_threadpool(self._record_failure, chats)
+            return len(chats)
+        await run_in_threadpool(self._save_titles, chats, titles)
+        return len(chats)
+
+    async def run_once(self) -> None:
+        # Keep going while batches come back full (a backlog, e.g. after a restart)
+        while await self.run_batch() == self.batch_size:
+            pass
+
+
+title_worker = TitleWorker()
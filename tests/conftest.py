@@ -6,17 +6,29 @@ import os
 
 # Use a real file for tests so all connections share one DB (file in project root)
 os.environ.setdefault("DATABASE_URL", "sqlite:///./test_db.sqlite")
+# Never call the real AI API from tests
+os.environ.setdefault("AI_PROVIDER", "fake")
+# Titles are generated inline; tests drive the background workers explicitly
+os.environ.setdefault("TITLE_WORKER_ENABLED", "false")
+os.environ.setdefault("SUMMARY_WORKER_ENABLED", "false")
+# Cheap password hashes, computed in the threadpool (no process pool start-up per test run)
+os.environ.setdefault("PASSWORD_HASH_ROUNDS", "4")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import text
 
-from app.core.database import SessionLocal, get_db
+from app import providers
+from app.core.database import SessionLocal, get_db, init_db
+from app.core.principals import principal_cache
 from app.main import app
+from app.providers.fake_provider import FakeProvider
 
 
 def _clean_db():
     """Delete all data from tables so each test sees a clean DB."""
+    init_db()  # tables may not exist yet on a fresh test DB
     db = SessionLocal()
     try:
         db.execute(text("DELETE FROM messages"))
@@ -25,6 +37,7 @@ def _clean_db():
         db.commit()
     finally:
         db.close()
+    principal_cache.clear()
 
 
 @pytest.fixture(scope="function")
@@ -55,3 +68,35 @@ def auth_headers(client):
     assert r.status_code == 200
     token = r.json()["access_token"]
     return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def fake_provider(monkeypatch):
+    """
+    Install a fresh FakeProvider (no filler words, no latency) as the active provider.
+    Replies are "Echo: <last user message>"; titles are the first words of the message.
+    """
+    provider = FakeProvider(reply_tokens=0)
+    monkeypatch.setattr(providers, "_provider", provider)
+    return provider
+
+
+class CountingProvider(FakeProvider):
+    """
+    FakeProvider (no filler words) that counts upstream calls, for tests of provider wrappers.
+    Keyword arguments go to FakeProvider, e.g. latency_ms to keep concurrent calls in flight.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("reply_tokens", 0)
+        super().__init__(**kwargs)
+        self.calls = 0
+
+    async def _before_call(self):
+        self.calls += 1
+        await super()._before_call()
+
+
+async def collect(stream) -> str:
+    """Join the deltas of a streamed completion."""
+    return "".join([delta async for delta in stream])
@@ -0,0 +1,44 @@
+"""
+Tests: async engine/session and the Async* repositories.
+"""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.core.database import AsyncSessionLocal, async_database_url, dispose_async_engine
+from app.repositories.async_repositories import (
+    AsyncChatRepository,
+    AsyncMessageRepository,
+    AsyncUserRepository,
+)
+from app.repositories.chat_repository import ChatRepository
+
+
+def test_async_database_url():
+    assert async_database_url("sqlite:///./ai_chat.db") == "sqlite+aiosqlite:///./ai_chat.db"
+    assert async_database_url("postgresql://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert async_database_url("postgres://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+
+
+def test_async_repositories_round_trip(client: TestClient):
+    async def run():
+        try:
+            async with AsyncSessionLocal() as db:
+                user = await AsyncUserRepository.create_user(db, "async@example.com", "hashed")
+                chat = await AsyncChatRepository.create_chat(db, user.id, "Async chat")
+                await AsyncMessageRepository.add_message(db, chat.id, "user", "hello")
+            async with AsyncSessionLocal() as db:
+                found = await AsyncChatRepository.get_chat_by_id(db, chat.id, user.id)
+                messages = await AsyncMessageRepository.get_chat_messages(db, chat.id)
+                return found.title, [m.content for m in messages]
+        finally:
+            await dispose_async_engine()  # the engine's connections belong to this event loop
+
+    assert asyncio.run(run()) == ("Async chat", ["hello"])
+
+
+def test_async_repository_mirrors_sync_methods():
+    sync_methods = {name for name, value in vars(ChatRepository).items() if isinstance(value, staticmethod)}
+    async_methods = {name for name in vars(AsyncChatRepository) if not name.startswith("_")}
+    assert sync_methods == async_methods
+    assert all(asyncio.iscoroutinefunction(getattr(AsyncChatRepository, name)) for name in async_methods)
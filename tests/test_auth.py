@@ -1,9 +1,16 @@
 """
 API tests: auth (register, login).
 """
+import asyncio
+
 import pytest
 from fastapi.testclient import TestClient
 
+from app.core import hashing
+from app.core.database import SessionLocal
+from app.core.security import needs_rehash, verify_password
+from app.repositories.auth_repository import UserRepository
+
 
 def test_register_ok(client: TestClient):
     r = client.post(
@@ -62,3 +69,58 @@ def test_login_unknown_email(client: TestClient):
         json={"email": "nobody@example.com", "password": "any"},
     )
     assert r.status_code == 401
+
+
+def test_password_is_stored_as_bcrypt_hash(client: TestClient):
+    client.post("/auth/register", json={"email": "hash@example.com", "password": "secret456"})
+    db = SessionLocal()
+    try:
+        stored = UserRepository.get_by_email(db, "hash@example.com").hashed_password
+    finally:
+        db.close()
+    assert stored.startswith("$2b$04$")
+    assert verify_password("secret456", stored)
+    assert not verify_password("secret457", stored)
+
+
+def test_register_password_too_long(client: TestClient):
+    r = client.post("/auth/register", json={"email": "long@example.com", "password": "x" * 73})
+    assert r.status_code == 422
+    # 40 characters, but 80 bytes: over bcrypt's limit
+    r = client.post("/auth/register", json={"email": "long@example.com", "password": "é" * 40})
+    assert r.status_code == 400
+
+
+def test_legacy_plaintext_password_is_rehashed_on_login(client: TestClient):
+    db = SessionLocal()
+    try:
+        UserRepository.create_user(db, "legacy@example.com", "plain-secret")
+    finally:
+        db.close()
+    r = client.post("/auth/login", json={"email": "legacy@example.com", "password": "wrong"})
+    assert r.status_code == 401
+    r = client.post("/auth/login", json={"email": "legacy@example.com", "password": "plain-secret"})
+    assert r.status_code == 200
+    db = SessionLocal()
+    try:
+        stored = UserRepository.get_by_email(db, "legacy@example.com").hashed_password
+    finally:
+        db.close()
+    assert stored.startswith("$2b$") and not needs_rehash(stored)
+    r = client.post("/auth/login", json={"email": "legacy@example.com", "password": "plain-secret"})
+    assert r.status_code == 200
+
+
+def test_hashing_runs_in_process_pool(monkeypatch):
+    monkeypatch.setattr(hashing, "PASSWORD_HASH_WORKERS", 1)
+
+    async def run():
+        hashed = await hashing.hash_password_async("pool-secret")
+        return hashed, await hashing.verify_password_async("pool-secret", hashed)
+
+    try:
+        hashed, ok = asyncio.run(run())
+        assert hashing._pool is not None
+    finally:
+        hashing.shutdown_hashing()
+    assert ok and hashed.startswith("$2b$")
@@ -0,0 +1,73 @@
+"""
+API tests: batch chat endpoint (POST /chat/batch).
+"""
+from fastapi.testclient import TestClient
+
+from app.core.config import BATCH_MAX_ITEMS, RATE_LIMIT_BURST, RATE_LIMIT_PER_MINUTE
+from app.core.rate_limit import TokenBucketLimiter
+from app.services import ai_service
+
+
+def test_batch_returns_results_in_order(client: TestClient, auth_headers: dict, fake_provider):
+    chat_id = client.post("/chat", json={"message": "first"}, headers=auth_headers).json()["chat_id"]
+    items = [
+        {"message": "one", "chat_id": chat_id},
+        {"message": "standalone"},
+        {"message": "two", "chat_id": chat_id},
+    ]
+    r = client.post("/chat/batch", json={"items": items}, headers=auth_headers)
+    assert r.status_code == 200
+    data = r.json()
+    assert (data["succeeded"], data["failed"]) == (3, 0)
+    assert [res["reply"] for res in data["results"]] == ["Echo: one", "Echo: standalone", "Echo: two"]
+    assert [res["index"] for res in data["results"]] == [0, 1, 2]
+    assert data["results"][1]["chat_id"] != chat_id
+
+    # Items for the same chat ran in request order
+    messages = client.get(f"/chats/{chat_id}/messages", headers=auth_headers).json()
+    assert [m["content"] for m in messages if m["role"] == "user"] == ["first", "one", "two"]
+
+
+def test_batch_item_failures_do_not_abort_batch(client: TestClient, auth_headers: dict, fake_provider, monkeypatch):
+    original = fake_provider.generate_chat_completion
+
+    async def flaky(messages, **kwargs):
+        if messages[-1]["content"] == "bad":
+            raise RuntimeError("boom")
+        return await original(messages, **kwargs)
+
+    monkeypatch.setattr(fake_provider, "generate_chat_completion", flaky)
+    items = [{"message": "good"}, {"message": "bad"}, {"message": "also good"}]
+    data = client.post("/chat/batch", json={"items": items}, headers=auth_headers).json()
+    assert (data["succeeded"], data["failed"]) == (2, 1)
+    assert [res["status_code"] for res in data["results"]] == [200, 503, 200]
+    assert "boom" in data["results"][1]["error"]
+    assert data["results"][1]["reply"] is None
+
+
+def test_batch_is_charged_to_rate_limit_up_front(client: TestClient, auth_headers: dict, fake_provider, monkeypatch):
+    monkeypatch.setattr(ai_service, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(ai_service, "user_rate_limiter", TokenBucketLimiter(rate_per_second=0.01, burst=2))
+    items = [{"message": f"m{i}"} for i in range(3)]
+    r = client.post("/chat/batch", json={"items": items}, headers=auth_headers)
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) > 0
+    assert client.get("/chats", headers=auth_headers).json()["total"] == 0  # no item ran
+
+
+def test_max_size_batch_fits_default_rate_limit(client: TestClient, auth_headers: dict, fake_provider, monkeypatch):
+    monkeypatch.setattr(ai_service, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(
+        ai_service, "user_rate_limiter", TokenBucketLimiter(RATE_LIMIT_PER_MINUTE / 60, RATE_LIMIT_BURST)
+    )
+    assert BATCH_MAX_ITEMS <= RATE_LIMIT_BURST
+    items = [{"message": f"m{i}"} for i in range(BATCH_MAX_ITEMS)]
+    data = client.post("/chat/batch", json={"items": items}, headers=auth_headers).json()
+    assert (data["succeeded"], data["failed"]) == (BATCH_MAX_ITEMS, 0)
+    too_many = items + [{"message": "one more"}]
+    assert client.post("/chat/batch", json={"items": too_many}, headers=auth_headers).status_code == 422
+
+
+def test_batch_validation(client: TestClient, auth_headers: dict):
+    assert client.post("/chat/batch", json={"items": []}, headers=auth_headers).status_code == 422
+    assert client.post("/chat/batch", json={"items": [{"message": "x"}]}).status_code == 401
@@ -0,0 +1,74 @@
+"""
+Unit tests: TTLCache and the exact-match provider cache.
+"""
+import asyncio
+
+from app.core.cache import TTLCache
+from app.providers.cache import CachedProvider
+from tests.conftest import CountingProvider, collect
+
+
+MESSAGES = [{"role": "system", "content": "sys"}, {"role": "user", "content": "hi"}]
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_expires_entries():
+    now = [0.0]
+    cache = TTLCache(max_entries=10, ttl_seconds=5, clock=lambda: now[0])
+    cache.set("a", 1)
+    now[0] = 4.9
+    assert cache.get("a") == 1
+    now[0] = 5.0
+    assert cache.get("a") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cached_provider_serves_identical_requests_once():
+    inner = CountingProvider()
+    provider = CachedProvider(inner, TTLCache(max_entries=10, ttl_seconds=60))
+    first = asyncio.run(provider.generate_chat_completion(MESSAGES))
+    second = asyncio.run(provider.generate_chat_completion(list(MESSAGES)))
+    assert first.content == second.content == "Echo: hi"
+    assert inner.calls == 1
+    # Different temperature or model is a different request
+    asyncio.run(provider.generate_chat_completion(MESSAGES, temperature=0.2))
+    asyncio.run(provider.generate_chat_completion(MESSAGES, model="other"))
+    assert inner.calls == 3
+
+
+def test_cached_provider_bypass_and_stream():
+    inner = CountingProvider()
+    provider = CachedProvider(inner, TTLCache(max_entries=10, ttl_seconds=60))
+    asyncio.run(provider.generate_chat_completion(MESSAGES, use_cache=False))
+    assert len(provider.cache) == 0
+    assert asyncio.run(collect(provider.stream_chat_completion(MESSAGES))) == "Echo: hi"
+    assert asyncio.run(collect(provider.stream_chat_completion(MESSAGES))) == "Echo: hi"
+    assert asyncio.run(provider.generate_chat_completion(MESSAGES)).content == "Echo: hi"
+    assert inner.calls == 2
+
+
+def test_cached_provider_titles_only_generates_missing():
+    inner = CountingProvider()
+    provider = CachedProvider(inner, TTLCache(max_entries=10, ttl_seconds=60))
+    assert asyncio.run(provider.generate_chat_title("hello world")) == "Hello world"
+    seen = []
+    original = inner.generate_chat_titles
+
+    async def recording_titles(first_messages):
+        seen.append(first_messages)
+        return await original(first_messages)
+
+    inner.generate_chat_titles = recording_titles
+    titles = asyncio.run(provider.generate_chat_titles(["hello world", "other topic"]))
+    assert titles == ["Hello world", "Other topic"]
+    assert seen == [["other topic"]]
@@ -0,0 +1,82 @@
+"""
+API tests: chat messages (POST /chat, POST /chat/stream) – served by the fake provider.
+"""
+import json
+
+from fastapi.testclient import TestClient
+
+from app.providers import ProviderError
+
+
+def _parse_sse(body: str) -> list:
+    """Return [(event, data), ...] from an SSE response body."""
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_send_message_creates_chat(client: TestClient, auth_headers: dict, fake_provider):
+    r = client.post("/chat", json={"message": "hello"}, headers=auth_headers)
+    assert r.status_code == 200
+    data = r.json()
+    assert data["reply"] == "Echo: hello"
+    messages = client.get(f"/chats/{data['chat_id']}/messages", headers=auth_headers).json()
+    assert [(m["role"], m["content"]) for m in messages] == [
+        ("user", "hello"),
+        ("assistant", "Echo: hello"),
+    ]
+
+
+def test_send_message_provider_error_returns_503(client: TestClient, auth_headers: dict, fake_provider):
+    fake_provider.error_rate = 1.0
+    r = client.post("/chat", json={"message": "hello"}, headers=auth_headers)
+    assert r.status_code == 503
+    # Nothing of the failed turn is saved
+    chats = client.get("/chats", headers=auth_headers).json()["chats"]
+    assert [c["message_count"] for c in chats] == [0]
+
+
+def test_turn_is_saved_in_one_transaction(client: TestClient, auth_headers: dict, fake_provider):
+    from app.core.db_writer import get_db_writer
+
+    chat_id = client.post("/chat", json={"message": "first"}, headers=auth_headers).json()["chat_id"]
+    writer = get_db_writer()
+    transactions = writer.transactions
+    client.post("/chat", json={"message": "second", "chat_id": chat_id}, headers=auth_headers)
+    assert writer.transactions - transactions == 1
+    chat = client.get(f"/chats/{chat_id}", headers=auth_headers).json()
+    assert chat["message_count"] == 4
+    assert chat["last_message_preview"] == "Echo: second"
+
+
+def test_stream_message(client: TestClient, auth_headers: dict, fake_provider):
+    r = client.post("/chat/stream", json={"message": "hello there"}, headers=auth_headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(r.text)
+    assert events[0][0] == "start"
+    chat_id = events[0][1]["chat_id"]
+    assert [data["content"] for event, data in events if event == "delta"] == ["Echo:", " hello", " there"]
+    assert events[-1] == ("done", {"chat_id": chat_id})
+
+    messages = client.get(f"/chats/{chat_id}/messages", headers=auth_headers).json()
+    assert messages[-1]["role"] == "assistant"
+    assert messages[-1]["content"] == "Echo: hello there"
+    assert client.get(f"/chats/{chat_id}", headers=auth_headers).json()["title"] == "Hello there"
+
+
+def test_stream_message_provider_error(client: TestClient, auth_headers: dict, fake_provider, monkeypatch):
+    async def failing_stream(messages, **kwargs):
+        yield "partial"
+        raise ProviderError("upstream closed")
+
+    monkeypatch.setattr(fake_provider, "stream_chat_completion", failing_stream)
+    r = client.post("/chat/stream", json={"message": "hello"}, headers=auth_headers)
+    events = _parse_sse(r.text)
+    assert events[-1][0] == "error"
+    chat_id = events[0][1]["chat_id"]
+    # The turn is saved as a unit: no user message without its reply
+    messages = client.get(f"/chats/{chat_id}/messages", headers=auth_headers).json()
+    assert messages == []
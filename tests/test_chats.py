@@ -59,3 +59,87 @@ def test_delete_chat(client: TestClient, auth_headers: dict):
     assert r.status_code == 204
     get_r = client.get(f"/chats/{chat_id}", headers=auth_headers)
     assert get_r.status_code == 404
+
+
+def test_list_chats_total_and_counters(client: TestClient, auth_headers: dict, fake_provider):
+    for title in ("A", "B", "C"):
+        client.post("/chats", json={"title": title}, headers=auth_headers)
+    r = client.post("/chat", json={"message": "Hello   there\nfriend"}, headers=auth_headers)
+    chat_id = r.json()["chat_id"]
+
+    r = client.get("/chats", params={"limit": 2}, headers=auth_headers)
+    assert r.status_code == 200
+    assert len(r.json()["chats"]) == 2
+    assert r.json()["total"] == 4
+    newest = r.json()["chats"][0]
+    assert newest["id"] == chat_id
+    assert newest["message_count"] == 2
+    assert newest["last_message_preview"] == "Echo: Hello there friend"
+
+
+def test_delete_message_updates_chat_counters(client: TestClient, auth_headers: dict, fake_provider):
+    from app.core.database import SessionLocal
+    from app.repositories.message_repository import MessageRepository
+
+    chat_id = client.post("/chat", json={"message": "first"}, headers=auth_headers).json()["chat_id"]
+    db = SessionLocal()
+    try:
+        reply_id = MessageRepository.get_chat_messages(db, chat_id)[-1].id
+        assert MessageRepository.delete_message(db, chat_id, reply_id)
+        assert not MessageRepository.delete_message(db, chat_id, reply_id)
+    finally:
+        db.close()
+
+    chat = client.get(f"/chats/{chat_id}", headers=auth_headers).json()
+    assert chat["message_count"] == 1
+    assert chat["last_message_preview"] == "first"
+
+
+def test_list_chats_cursor_pagination(client: TestClient, auth_headers: dict):
+    for i in range(5):
+        client.post("/chats", json={"title": f"Chat {i}"}, headers=auth_headers)
+
+    first = client.get("/chats", params={"limit": 2}, headers=auth_headers).json()
+    assert [c["title"] for c in first["chats"]] == ["Chat 4", "Chat 3"]
+    assert first["after_cursor"] is None
+    second = client.get("/chats", params={"limit": 2, "before": first["before_cursor"]}, headers=auth_headers).json()
+    assert [c["title"] for c in second["chats"]] == ["Chat 2", "Chat 1"]
+    third = client.get("/chats", params={"limit": 2, "before": second["before_cursor"]}, headers=auth_headers).json()
+    assert [c["title"] for c in third["chats"]] == ["Chat 0"]
+    assert third["before_cursor"] is None
+    assert third["total"] == 5
+
+    back = client.get("/chats", params={"limit": 2, "after": third["after_cursor"]}, headers=auth_headers).json()
+    assert [c["title"] for c in back["chats"]] == ["Chat 2", "Chat 1"]
+
+
+def test_list_chats_invalid_cursor(client: TestClient, auth_headers: dict):
+    r = client.get("/chats", params={"before": "not-a-cursor"}, headers=auth_headers)
+    assert r.status_code == 400
+    r = client.get("/chats", params={"before": "x", "after": "y"}, headers=auth_headers)
+    assert r.status_code == 400
+
+
+def test_messages_page_backward_from_newest(client: TestClient, auth_headers: dict):
+    from app.core.database import SessionLocal
+    from app.repositories.message_repository import MessageRepository
+
+    chat_id = client.post("/chats", json={"title": "Long"}, headers=auth_headers).json()["id"]
+    db = SessionLocal()
+    try:
+        for i in range(7):
+            MessageRepository.add_message(db, chat_id, "user", f"m{i}")
+    finally:
+        db.close()
+
+    url = f"/chats/{chat_id}/messages"
+    r = client.get(url, params={"latest": True, "limit": 3}, headers=auth_headers)
+    assert [m["content"] for m in r.json()] == ["m4", "m5", "m6"]
+    assert "X-After-Cursor" not in r.headers
+    r = client.get(url, params={"before": r.headers["X-Before-Cursor"], "limit": 3}, headers=auth_headers)
+    assert [m["content"] for m in r.json()] == ["m1", "m2", "m3"]
+    older = client.get(url, params={"before": r.headers["X-Before-Cursor"], "limit": 3}, headers=auth_headers)
+    assert [m["content"] for m in older.json()] == ["m0"]
+    assert "X-Before-Cursor" not in older.headers
+    newer = client.get(url, params={"after": r.headers["X-After-Cursor"], "limit": 3}, headers=auth_headers)
+    assert [m["content"] for m in newer.json()] == ["m4", "m5", "m6"]
@@ -0,0 +1,48 @@
+"""
+Tests: token-budgeted context window assembly (newest messages first).
+"""
+from fastapi.testclient import TestClient
+
+from app.core.database import SessionLocal
+from app.core.tokens import count_tokens, message_tokens
+from app.repositories.message_repository import MessageRepository
+
+
+def test_count_tokens():
+    assert count_tokens("") == 0
+    assert count_tokens("hi there") == 2
+    assert count_tokens("Hello, world!") == 4  # two words plus two punctuation marks
+    assert count_tokens("a" * 40) == 8
+
+
+def test_token_count_stored_on_write(client: TestClient, auth_headers: dict):
+    chat_id = client.post("/chats", json={}, headers=auth_headers).json()["id"]
+    db = SessionLocal()
+    try:
+        message = MessageRepository.add_message(db, chat_id, "user", "Hello, world!")
+        assert message.token_count == 4
+    finally:
+        db.close()
+
+
+def test_context_keeps_newest_messages_within_budget(client: TestClient, auth_headers: dict):
+    chat_id = client.post("/chats", json={}, headers=auth_headers).json()["id"]
+    db = SessionLocal()
+    try:
+        for i in range(10):
+            MessageRepository.add_message(db, chat_id, "user" if i % 2 == 0 else "assistant", f"message {i}")
+        per_message = message_tokens("message 0")
+
+        messages = MessageRepository.get_chat_messages_for_ai(db, chat_id, token_budget=per_message * 3)
+        assert [m["content"] for m in messages] == ["message 7", "message 8", "message 9"]
+
+        everything = MessageRepository.get_chat_messages_for_ai(db, chat_id, token_budget=10_000)
+        assert len(everything) == 10
+        assert everything[0]["content"] == "message 0"
+
+        # The newest message is kept even if it alone is over budget
+        assert MessageRepository.get_chat_messages_for_ai(db, chat_id, token_budget=1) == [
+            {"role": "assistant", "content": "message 9"}
+        ]
+    finally:
+        db.close()
@@ -0,0 +1,121 @@
+"""
+Tests: SQLite production profile (pragmas) and the single-writer queue.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app.core.database import SessionLocal, engine
+from app.core.db_writer import get_db_writer
+from app.core.principals import Principal, principal_cache
+from app.repositories.auth_repository import UserRepository
+from app.repositories.chat_repository import ChatRepository
+from app.repositories.message_repository import MessageRepository
+
+
+def test_sqlite_connections_use_production_pragmas(client: TestClient):
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+
+
+def test_queued_writes_are_group_committed(client: TestClient):
+    writer = get_db_writer()
+    user = UserRepository.create_user(SessionLocal(), "writer@example.com", "hashed")
+    chat = ChatRepository.create_chat(SessionLocal(), user.id, "Group")
+    started, release = threading.Event(), threading.Event()
+
+    def blocker(db):
+        started.set()
+        release.wait(5)
+
+    transactions = writer.transactions
+    first = writer.submit(blocker)
+    started.wait(5)
+    queued = [writer.submit(MessageRepository.add_message, chat.id, "user", f"m{i}") for i in range(5)]
+    release.set()
+    first.result(5)
+    messages = [f.result(5) for f in queued]
+
+    # The five writes queued while the writer was busy shared one transaction
+    assert writer.transactions - transactions == 2
+    assert [m.content for m in messages] == [f"m{i}" for i in range(5)]
+    db = SessionLocal()
+    try:
+        assert MessageRepository.get_message_count(db, chat.id) == 5
+    finally:
+        db.close()
+
+
+def test_failed_write_does_not_roll_back_its_group(client: TestClient):
+    writer = get_db_writer()
+    release = threading.Event()
+    writer.submit(lambda db: release.wait(5))
+    ok = writer.submit(UserRepository.create_user, "a@example.com", "hashed")
+    duplicate = writer.submit(UserRepository.create_user, "a@example.com", "hashed")
+    other = writer.submit(UserRepository.create_user, "b@example.com", "hashed")
+    release.set()
+
+    assert ok.result(5).email == "a@example.com"
+    assert other.result(5).email == "b@example.com"
+    with pytest.raises(IntegrityError):
+        duplicate.result(5)
+    db = SessionLocal()
+    try:
+        assert db.execute(text("SELECT count(*) FROM users")).scalar() == 2
+    finally:
+        db.close()
+
+
+def test_logout_through_writer_is_not_undone_by_concurrent_cache_fill(client: TestClient, auth_headers: dict):
+    writer = get_db_writer()
+    user_id = client.get("/auth/me", headers=auth_headers).json()["id"]
+    release = threading.Event()
+
+    def concurrent_request(db):
+        # Runs after the token version was bumped but before the group commit, like a
+        # request that misses the principal cache in that window
+        principal_cache.get(user_id)  # cache miss; consumes the invalidations logged so far
+        reader = SessionLocal()
+        try:
+            principal_cache.set(Principal.from_user(UserRepository.get_by_id(reader, user_id)))
+        finally:
+            reader.close()
+
+    principal_cache.clear()
+    writer.submit(lambda db: release.wait(5))
+    logout = writer.submit(UserRepository.increment_token_version, user_id)
+    racer = writer.submit(concurrent_request)
+    release.set()
+    logout.result(5)
+    racer.result(5)
+
+    assert principal_cache.get(user_id) is None
+    assert client.get("/chats", headers=auth_headers).status_code == 401
+
+
+def test_concurrent_repository_writes(client: TestClient):
+    user = UserRepository.create_user(SessionLocal(), "busy@example.com", "hashed")
+    chat = ChatRepository.create_chat(SessionLocal(), user.id, None)
+
+    def add(i):
+        db = SessionLocal()
+        try:
+            return MessageRepository.add_message(db, chat.id, "user", f"message {i}").id
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        ids = list(pool.map(add, range(100)))
+
+    assert len(set(ids)) == 100
+    db = SessionLocal()
+    try:
+        assert MessageRepository.get_message_count(db, chat.id) == 100
+    finally:
+        db.close()
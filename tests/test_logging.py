@@ -0,0 +1,65 @@
+"""
+Tests: queue-based structured logging and sampling.
+"""
+import io
+import json
+import logging
+import random
+
+from app.core.logging import JsonFormatter, SamplingFilter, configure_logging, shutdown_logging
+
+
+def _record(name: str = "app.test", level: int = logging.INFO, **extra) -> logging.LogRecord:
+    record = logging.LogRecord(name, level, __file__, 1, "hello %s", ("world",), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    entry = json.loads(JsonFormatter().format(_record(path="/chat", status=200)))
+    assert entry["message"] == "hello world"
+    assert (entry["level"], entry["logger"]) == ("INFO", "app.test")
+    assert (entry["path"], entry["status"]) == ("/chat", 200)
+    assert "msg" not in entry and "args" not in entry
+
+
+def test_sampling_filter_keeps_a_fraction_of_info_lines():
+    sampler = SamplingFilter({"app.access": 0.1}, rng=random.Random(1))
+    kept = sum(sampler.filter(_record("app.access")) for _ in range(1000))
+    assert 50 < kept < 150
+    assert sampler.filter(_record("app.access", logging.WARNING))  # warnings are never sampled
+    assert all(sampler.filter(_record("app.other")) for _ in range(10))
+    assert not all(sampler.filter(_record("app.access.child")) for _ in range(50))
+
+
+def test_configure_logging_writes_json_on_background_thread():
+    stream = io.StringIO()
+    try:
+        configure_logging(level="INFO", fmt="json", logger_levels="app.noisy=ERROR", sample_rates="", stream=stream)
+        logging.getLogger("app.test").info("request %s", "done", extra={"duration_ms": 1.5})
+        logging.getLogger("app.noisy").warning("suppressed")
+        shutdown_logging()  # flushes the queue
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert [(line["message"], line["duration_ms"]) for line in lines] == [("request done", 1.5)]
+    finally:
+        logging.getLogger("app.noisy").setLevel(logging.NOTSET)
+        configure_logging()
+
+
+def test_queued_records_keep_the_message_as_logged():
+    stream = io.StringIO()
+    try:
+        configure_logging(level="INFO", fmt="json", logger_levels="", sample_rates="", stream=stream)
+        items = ["a"]
+        logging.getLogger("app.test").info("items %s", items)
+        items.append("b")  # mutated before the listener thread formats the record
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("app.test").exception("failed")
+        shutdown_logging()
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert lines[0]["message"] == "items ['a']"
+        assert lines[1]["message"] == "failed" and "ValueError: boom" in lines[1]["exc_info"]
+    finally:
+        configure_logging()
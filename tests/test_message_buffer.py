@@ -0,0 +1,98 @@
+"""
+Tests: write-behind message buffer (batched commits, durability modes, failure isolation).
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.database import SessionLocal
+from app.repositories.auth_repository import UserRepository
+from app.repositories.chat_repository import ChatRepository
+from app.repositories.message_buffer import MessageWriteBuffer
+from app.repositories.message_repository import MessageRepository
+from app.services import memory_service
+
+
+def _new_chat(title=None) -> str:
+    db = SessionLocal()
+    try:
+        user = UserRepository.get_by_email(db, "buffer@example.com") or UserRepository.create_user(
+            db, "buffer@example.com", "hashed"
+        )
+        return ChatRepository.create_chat(db, user.id, title).id
+    finally:
+        db.close()
+
+
+def _chat(chat_id: str):
+    db = SessionLocal()
+    try:
+        return ChatRepository.get_chat_by_id_any(db, chat_id), [
+            (m.role, m.content) for m in MessageRepository.get_chat_messages(db, chat_id)
+        ]
+    finally:
+        db.close()
+
+
+def test_concurrent_turns_share_flushes(client: TestClient):
+    buffer = MessageWriteBuffer(interval_ms=50, max_rows=1000, durability="flush")
+    chat_ids = [_new_chat() for _ in range(4)]
+
+    def turn(i):
+        asyncio.run(buffer.add_turn(chat_ids[i % 4], f"q{i}", f"a{i}", title=f"T{i}"))
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        list(pool.map(turn, range(20)))
+    buffer.stop()
+
+    assert buffer.rows == 40
+    assert buffer.flushes < 20
+    chat, messages = _chat(chat_ids[0])
+    assert chat.message_count == 10
+    assert len(messages) == 10
+    assert chat.title is not None
+
+
+def test_immediate_durability_returns_before_commit(client: TestClient):
+    chat_id = _new_chat("Kept")
+    buffer = MessageWriteBuffer(interval_ms=10_000, max_rows=1000, durability="immediate")
+    asyncio.run(buffer.add_turn(chat_id, "hello", "Echo: hello", title="Ignored"))
+    assert _chat(chat_id)[1] == []  # still buffered
+
+    buffer.stop()  # flushes what is queued
+    chat, messages = _chat(chat_id)
+    assert messages == [("user", "hello"), ("assistant", "Echo: hello")]
+    assert chat.title == "Kept"
+    assert chat.last_message_preview == "Echo: hello"
+
+
+def test_failed_write_only_fails_itself(client: TestClient):
+    chat_id = _new_chat()
+    buffer = MessageWriteBuffer(interval_ms=50, max_rows=1000)
+    now = datetime.utcnow()
+    good = buffer.submit([(chat_id, "user", "fine", now)])
+    bad = buffer.submit([(chat_id, "user", None, now)])  # content is NOT NULL
+    good.result(5)
+    with pytest.raises(Exception):
+        bad.result(5)
+    buffer.stop()
+    assert _chat(chat_id)[1] == [("user", "fine")]
+
+
+def test_chat_uses_buffer_when_enabled(client: TestClient, auth_headers: dict, fake_provider, monkeypatch):
+    buffer = MessageWriteBuffer(interval_ms=1, durability="flush")
+    monkeypatch.setattr(memory_service, "MESSAGE_WRITE_BEHIND_ENABLED", True)
+    monkeypatch.setattr(memory_service, "message_buffer", buffer)
+    r = client.post("/chat", json={"message": "hello"}, headers=auth_headers)
+    buffer.stop()
+    assert buffer.rows == 2
+    messages = client.get(f"/chats/{r.json()['chat_id']}/messages", headers=auth_headers).json()
+    assert [m["content"] for m in messages] == ["hello", "Echo: hello"]
+
+
+def test_unknown_durability_mode():
+    with pytest.raises(ValueError):
+        MessageWriteBuffer(durability="eventually")
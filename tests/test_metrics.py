@@ -0,0 +1,85 @@
+"""
+Tests: provider latency histograms and GET /metrics.
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import providers
+from app.core.metrics import Histogram, registry
+from app.providers import router as router_module
+from app.providers.fake_provider import FakeProvider
+from app.providers.instrumentation import InstrumentedProvider
+from app.providers.router import ModelRouter
+
+
+@pytest.fixture(autouse=True)
+def _clear_metrics():
+    registry.clear()
+    yield
+    registry.clear()
+
+
+def _count(name: str, **labels) -> int:
+    return registry.get(name).count(**labels)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo", ("model",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, model="m")
+    histogram.observe(0.5, model="m")
+    histogram.observe(5, model="m")
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{model="m",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{model="m",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{model="m",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{model="m"} 3' in lines
+    assert 'demo_seconds_sum{model="m"} 5.55' in lines
+
+
+def test_instrumented_completion_records_usage():
+    provider = InstrumentedProvider(FakeProvider(reply_tokens=0))
+    asyncio.run(provider.generate_chat_completion([{"role": "user", "content": "hi there"}]))
+    labels = {"model": provider.default_model, "operation": "completion", "outcome": "ok"}
+    assert _count("llm_request_duration_seconds", **labels) == 1
+    assert _count("llm_time_to_first_token_seconds", **labels) == 1
+    assert _count("llm_prompt_tokens", **labels) == 1
+    assert _count("llm_completion_tokens", **labels) == 1
+
+
+def test_instrumented_stream_and_errors():
+    provider = InstrumentedProvider(FakeProvider(reply_tokens=0))
+
+    async def run():
+        return [d async for d in provider.stream_chat_completion([{"role": "user", "content": "hello there"}])]
+
+    assert "".join(asyncio.run(run())) == "Echo: hello there"
+    stream = {"model": provider.default_model, "operation": "stream", "outcome": "ok"}
+    assert _count("llm_time_to_first_token_seconds", **stream) == 1
+    assert _count("llm_completion_tokens", **stream) == 1
+
+    provider.inner.error_rate = 1.0
+    with pytest.raises(Exception):
+        asyncio.run(provider.generate_chat_title("hello"))
+    errors = {"model": provider.default_model, "operation": "title", "outcome": "error"}
+    assert _count("llm_request_duration_seconds", **errors) == 1
+    assert _count("llm_time_to_first_token_seconds", **errors) == 0
+
+
+def test_metrics_endpoint(client: TestClient, auth_headers: dict, monkeypatch):
+    monkeypatch.setattr(providers, "_provider", InstrumentedProvider(FakeProvider(reply_tokens=0)))
+    assert client.post("/chat", json={"message": "hello"}, headers=auth_headers).status_code == 200
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    assert 'llm_request_duration_seconds_count{model="fake-model",operation="completion",outcome="ok"} 1' in r.text
+    assert 'llm_queue_wait_seconds_count{model="fake-model",outcome="dispatched"} 1' in r.text
+
+
+def test_queue_wait_is_labeled_with_the_routed_model(client: TestClient, auth_headers: dict, fake_provider, monkeypatch):
+    monkeypatch.setattr(router_module, "_router", ModelRouter(policy="tier", tier_models={"user": "tier-model"}))
+    assert client.post("/chat", json={"message": "hello"}, headers=auth_headers).status_code == 200
+    assert client.post("/chat/stream", json={"message": "hello"}, headers=auth_headers).status_code == 200
+    assert _count("llm_queue_wait_seconds", model="tier-model", outcome="dispatched") == 2
+    assert _count("llm_queue_wait_seconds", model="fake-model", outcome="dispatched") == 0
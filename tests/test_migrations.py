@@ -0,0 +1,63 @@
+"""
+Tests: versioned schema migrations (schema_version table).
+"""
+from sqlalchemy import create_engine, inspect
+
+from app.core.database import engine
+from app.core.migrations import LATEST_VERSION, current_version, migrate
+
+
+def test_new_database_is_created_at_latest_version(tmp_path):
+    target = create_engine(f"sqlite:///{tmp_path / 'new.sqlite'}")
+    assert current_version(target) is None
+
+    applied = migrate(target)
+
+    assert applied[-1] == LATEST_VERSION
+    assert current_version(target) == LATEST_VERSION
+    assert inspect(target).has_table("messages")
+    assert migrate(target) == []
+
+
+def test_startup_on_current_schema_runs_no_migrations(client):
+    assert current_version(engine) == LATEST_VERSION
+    assert migrate(engine) == []
+
+
+def test_legacy_database_is_upgraded_in_place(tmp_path):
+    target = create_engine(f"sqlite:///{tmp_path / 'legacy.sqlite'}")
+    with target.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE users (id VARCHAR PRIMARY KEY, email VARCHAR UNIQUE NOT NULL, "
+            "hashed_password VARCHAR NOT NULL, created_at DATETIME)"
+        )
+        conn.exec_driver_sql(
+            "CREATE TABLE chats (id VARCHAR PRIMARY KEY, user_id VARCHAR NOT NULL, title VARCHAR, "
+            "created_at DATETIME, updated_at DATETIME)"
+        )
+        conn.exec_driver_sql(
+            "CREATE TABLE messages (id INTEGER PRIMARY KEY, chat_id VARCHAR NOT NULL, role VARCHAR NOT NULL, "
+            "content TEXT NOT NULL, created_at DATETIME)"
+        )
+        conn.exec_driver_sql("INSERT INTO users (id, email, hashed_password) VALUES ('u1', 'old@example.com', 'x')")
+        conn.exec_driver_sql("INSERT INTO chats (id, user_id, title) VALUES ('c1', 'u1', 'Old chat')")
+        conn.exec_driver_sql("INSERT INTO messages (chat_id, role, content) VALUES ('c1', 'user', 'hello')")
+        conn.exec_driver_sql("INSERT INTO messages (chat_id, role, content) VALUES ('c1', 'assistant', 'hi\n  there')")
+        conn.exec_driver_sql("INSERT INTO chats (id, user_id, title) VALUES ('c2', 'u1', 'Long chat')")
+        conn.exec_driver_sql(f"INSERT INTO messages (chat_id, role, content) VALUES ('c2', 'user', '{'x' * 200}')")
+
+    applied = migrate(target)
+
+    assert applied == list(range(1, LATEST_VERSION + 1))
+    assert current_version(target) == LATEST_VERSION
+    with target.connect() as conn:
+        assert conn.exec_driver_sql("SELECT role FROM users").scalar() == "user"
+        count, preview = conn.exec_driver_sql(
+            "SELECT message_count, last_message_preview FROM chats WHERE id = 'c1'"
+        ).one()
+        long_preview = conn.exec_driver_sql("SELECT last_message_preview FROM chats WHERE id = 'c2'").scalar()
+    # Backfilled like new writes (message_preview): whitespace collapsed, long content cut with "…"
+    assert (count, preview) == (2, "hi there")
+    assert long_preview == "x" * 119 + "…"
+    indexes = {index["name"] for index in inspect(target).get_indexes("messages")}
+    assert "ix_messages_chat_id_created_at_id" in indexes
@@ -0,0 +1,92 @@
+"""
+Tests: authenticated-principal cache and its cross-worker invalidation.
+"""
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.core.cache import TTLCache
+from app.core.principals import InvalidationLog, Principal, PrincipalCache, principal_cache
+from app.repositories.async_repositories import AsyncUserRepository
+from app.repositories.auth_repository import UserRepository
+
+
+def _principal(user_id: str = "u1", role: str = "user") -> Principal:
+    return Principal(id=user_id, email="a@example.com", role=role, token_version="0", created_at=datetime.utcnow())
+
+
+def test_authenticated_requests_skip_user_lookup(client: TestClient, auth_headers: dict, monkeypatch):
+    calls = []
+    original = UserRepository.get_by_id
+
+    def counting_get_by_id(db, user_id):
+        calls.append(user_id)
+        return original(db, user_id)
+
+    monkeypatch.setattr(UserRepository, "get_by_id", staticmethod(counting_get_by_id))
+    for _ in range(3):
+        assert client.get("/auth/me", headers=auth_headers).status_code == 200
+    assert len(calls) == 1
+    assert client.get("/auth/me", headers=auth_headers).json()["email"] == "test@example.com"
+
+
+def test_logout_invalidates_cached_principal(client: TestClient, auth_headers: dict):
+    assert client.get("/chats", headers=auth_headers).status_code == 200
+    assert client.post("/auth/logout", headers=auth_headers).status_code == 200
+    assert client.get("/chats", headers=auth_headers).status_code == 401
+
+
+def test_role_change_invalidates_cached_principal(client: TestClient, auth_headers: dict):
+    assert client.get("/admin/users", headers=auth_headers).status_code == 403
+    assert client.post("/admin/bootstrap/users/test@example.com/make-admin").status_code == 200
+    assert client.get("/admin/users", headers=auth_headers).status_code == 200
+
+
+def test_principal_loaded_before_an_invalidation_is_not_cached(client: TestClient, auth_headers: dict, monkeypatch):
+    original = AsyncUserRepository.get_by_id
+    other_worker = PrincipalCache(TTLCache(100, 60), InvalidationLog(principal_cache.log.path))
+
+    async def get_by_id_then_logout(db, user_id):
+        user = await original(db, user_id)
+        other_worker.invalidate(user_id)  # a logout in another worker commits after this read...
+        principal_cache.get("someone-else")  # ...and a concurrent request here consumes it
+        return user
+
+    principal_cache.clear()
+    monkeypatch.setattr(AsyncUserRepository, "get_by_id", staticmethod(get_by_id_then_logout))
+    user_id = client.get("/auth/me", headers=auth_headers).json()["id"]
+    assert principal_cache.get(user_id) is None
+
+
+def test_invalidation_during_load_in_another_worker(tmp_path):
+    path = str(tmp_path / "invalidations")
+    worker_a = PrincipalCache(TTLCache(100, 60), InvalidationLog(path))
+    worker_b = PrincipalCache(TTLCache(100, 60), InvalidationLog(path))
+    assert worker_a.get("u1") is None
+    generation = worker_a.generation()
+    worker_b.invalidate("u1")  # committed while worker A was reading the old row
+    worker_a.set(_principal("u1"), generation=generation)
+    assert worker_a.get("u1") is None
+
+    generation = worker_a.generation()
+    worker_a.set(_principal("u1"), generation=generation)
+    assert worker_a.get("u1") is not None
+
+
+def test_invalidation_reaches_other_workers(tmp_path):
+    path = str(tmp_path / "invalidations")
+    worker_a = PrincipalCache(TTLCache(100, 60), InvalidationLog(path))
+    worker_b = PrincipalCache(TTLCache(100, 60), InvalidationLog(path))
+    for worker in (worker_a, worker_b):
+        worker.set(_principal("u1"))
+        worker.set(_principal("u2"))
+
+    worker_a.invalidate("u1")
+    assert worker_a.get("u1") is None
+    assert worker_b.get("u1") is None
+    assert worker_b.get("u2") is not None
+
+    # A replaced (rotated) invalidation file drops everything cached
+    worker_a.log.max_bytes = 0
+    worker_a.invalidate("u3")
+    assert worker_b.get("u2") is None
@@ -0,0 +1,37 @@
+"""
+Unit tests: provider selection and the deterministic fake provider.
+"""
+import asyncio
+
+import pytest
+
+from app.providers import ProviderError, create_provider
+from app.providers.fake_provider import FakeProvider
+from tests.conftest import collect
+
+
+def test_create_provider_unknown_name():
+    with pytest.raises(ValueError):
+        create_provider("nope")
+
+
+def test_fake_provider_is_deterministic():
+    messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "hi there"}]
+    first = asyncio.run(FakeProvider(reply_tokens=5).generate_chat_completion(messages))
+    second = asyncio.run(FakeProvider(reply_tokens=5).generate_chat_completion(messages))
+    assert first.content == second.content
+    assert first.content.startswith("Echo: hi there")
+    assert first.completion_tokens == 8
+
+
+def test_fake_provider_stream_matches_completion():
+    provider = FakeProvider(reply_tokens=5)
+    messages = [{"role": "user", "content": "stream me"}]
+    completion = asyncio.run(provider.generate_chat_completion(messages))
+    assert asyncio.run(collect(provider.stream_chat_completion(messages))) == completion.content
+
+
+def test_fake_provider_error_rate():
+    provider = FakeProvider(error_rate=1.0)
+    with pytest.raises(ProviderError):
+        asyncio.run(provider.generate_chat_completion([{"role": "user", "content": "x"}]))
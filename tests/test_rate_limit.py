@@ -0,0 +1,54 @@
+"""
+Tests: per-user token bucket and global concurrency cap on LLM calls.
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.exceptions import RateLimitExceededError
+from app.core.rate_limit import ConcurrencyLimiter, TokenBucketLimiter
+from app.services import ai_service
+
+
+def test_token_bucket_allows_burst_then_refills():
+    now = [0.0]
+    limiter = TokenBucketLimiter(rate_per_second=1, burst=2, clock=lambda: now[0])
+    assert limiter.acquire("u") == 0
+    assert limiter.acquire("u") == 0
+    assert limiter.acquire("u") == pytest.approx(1.0)
+    assert limiter.acquire("other") == 0  # buckets are per key
+    now[0] = 1.0
+    assert limiter.acquire("u") == 0
+
+
+def test_token_bucket_bounded_keys():
+    limiter = TokenBucketLimiter(rate_per_second=1, burst=1, max_keys=2)
+    for key in ("a", "b", "c"):
+        limiter.acquire(key)
+    assert len(limiter._buckets) == 2
+
+
+def test_concurrency_limiter_times_out_with_429():
+    limiter = ConcurrencyLimiter(max_concurrent=1, queue_timeout_seconds=0.05)
+
+    async def run():
+        async with limiter.slot():
+            with pytest.raises(RateLimitExceededError):
+                async with limiter.slot():
+                    pass
+        async with limiter.slot() as waited:
+            return waited
+
+    assert asyncio.run(run()) < 0.05
+
+
+def test_chat_rate_limited_returns_429(client: TestClient, auth_headers: dict, fake_provider, monkeypatch):
+    monkeypatch.setattr(ai_service, "user_rate_limiter", TokenBucketLimiter(rate_per_second=0.01, burst=1))
+    assert client.post("/chat", json={"message": "one"}, headers=auth_headers).status_code == 200
+    r = client.post("/chat", json={"message": "two"}, headers=auth_headers)
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) > 0
+    assert client.get("/chats", headers=auth_headers).json()["total"] == 1  # no chat created for the 429
+    r = client.post("/chat/stream", json={"message": "three"}, headers=auth_headers)
+    assert r.status_code == 429
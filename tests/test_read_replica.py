@@ -0,0 +1,143 @@
+"""
+Tests: read-replica routing (RoutingSession), read-your-writes and the SQLite replica sync.
+"""
+import asyncio
+import contextvars
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import database, db_writer
+from app.core.database import READ_BIND_KEY, RoutingSession, SessionLocal, set_request_user, use_primary
+from app.core.migrations import migrate
+from app.core.replica_sync import sync_replica
+from app.models.database import User
+from app.repositories.auth_repository import UserRepository
+from app.repositories.chat_repository import ChatRepository
+from app.repositories.message_repository import MessageRepository
+
+
+@pytest.fixture
+def databases(tmp_path):
+    urls = [f"sqlite:///{tmp_path / 'primary.sqlite'}", f"sqlite:///{tmp_path / 'replica.sqlite'}"]
+    primary, replica = (create_engine(url) for url in urls)
+    migrate(primary)
+    sync_replica(*urls)
+    yield urls, primary, replica
+    primary.dispose()
+    replica.dispose()
+
+
+def _session(primary, replica) -> RoutingSession:
+    return RoutingSession(bind=primary, info={READ_BIND_KEY: replica})
+
+
+def _add_user(db, email: str) -> None:
+    db.add(User(email=email, hashed_password="hashed"))
+    db.commit()
+
+
+def test_reads_go_to_replica_until_synced(databases):
+    urls, primary, replica = databases
+    with _session(primary, replica) as db:
+        _add_user(db, "replica@example.com")
+
+    with _session(primary, replica) as db:
+        assert UserRepository.get_by_email(db, "replica@example.com") is None  # replica lags
+        with use_primary(db):
+            assert UserRepository.get_by_email(db, "replica@example.com") is not None
+        assert UserRepository.get_by_email(db, "replica@example.com") is None
+
+    sync_replica(*urls)
+    with _session(primary, replica) as db:
+        assert UserRepository.get_by_email(db, "replica@example.com") is not None
+
+
+def test_session_reads_its_own_writes(databases):
+    _, primary, replica = databases
+    with _session(primary, replica) as db:
+        _add_user(db, "own@example.com")
+        assert UserRepository.get_by_email(db, "own@example.com") is not None
+
+
+def test_users_read_their_writes_in_later_sessions(databases):
+    _, primary, replica = databases
+
+    def as_user(user_id, fn):
+        def run():
+            set_request_user(user_id)
+            return fn()
+        return contextvars.copy_context().run(run)
+
+    def write():
+        with _session(primary, replica) as db:
+            _add_user(db, "ryw@example.com")
+
+    def read():
+        with _session(primary, replica) as db:
+            return UserRepository.get_by_email(db, "ryw@example.com")
+
+    as_user("writer", write)
+    assert as_user("writer", read) is not None  # within READ_YOUR_WRITES_SECONDS: primary
+    assert as_user("someone-else", read) is None  # other users read the (lagging) replica
+
+
+@pytest.fixture
+def lagging_replica(client, tmp_path, monkeypatch):
+    """Route the app's reads to a snapshot of the test database that is never synced again."""
+    replica_url = f"sqlite:///{tmp_path / 'app_replica.sqlite'}"
+    sync_replica(database.DATABASE_URL, replica_url)
+    replica = create_engine(replica_url, connect_args={"check_same_thread": False})
+    async_replica = create_async_engine(database.async_database_url(replica_url))
+    database.AsyncSessionLocal()  # builds the async session factory
+    monkeypatch.setitem(database.SessionLocal.kw["info"], READ_BIND_KEY, replica)
+    monkeypatch.setitem(database._async_sessionmaker.kw["info"], READ_BIND_KEY, async_replica.sync_engine)
+    monkeypatch.setattr(database, "READ_YOUR_WRITES_SECONDS", 0)  # the replica lags past the window
+    yield
+    replica.dispose()
+    asyncio.run(async_replica.dispose())
+
+
+def test_chat_turn_on_lagging_replica_keeps_its_chat(client, auth_headers, fake_provider, lagging_replica):
+    chat_id = client.post("/chat", json={"message": "first"}, headers=auth_headers).json()["chat_id"]
+    assert client.get(f"/chats/{chat_id}", headers=auth_headers).status_code == 404  # not on the replica yet
+
+    r = client.post("/chat", json={"message": "second", "chat_id": chat_id}, headers=auth_headers)
+
+    assert r.status_code == 200
+    assert r.json()["chat_id"] == chat_id
+    user_id = client.get("/auth/me", headers=auth_headers).json()["id"]
+    db = SessionLocal()
+    try:
+        with use_primary(db):
+            assert ChatRepository.count_user_chats(db, user_id) == 1
+            assert MessageRepository.get_message_count(db, chat_id) == 4
+    finally:
+        db.close()
+
+
+def test_writes_read_the_primary_without_the_writer_queue(databases, monkeypatch):
+    urls, primary, replica = databases
+    monkeypatch.setattr(db_writer, "get_db_writer", lambda: None)  # e.g. Postgres
+    with _session(primary, replica) as db:
+        _add_user(db, "logout@example.com")
+    sync_replica(*urls)
+    with _session(primary, replica) as db:
+        _add_user(db, "new@example.com")  # not on the replica yet
+
+    with _session(primary, replica) as db:
+        with use_primary(db):
+            user_id = UserRepository.get_by_email(db, "logout@example.com").id
+            new_user_id = UserRepository.get_by_email(db, "new@example.com").id
+    for _ in range(2):
+        with _session(primary, replica) as db:
+            UserRepository.increment_token_version(db, user_id)
+    with _session(primary, replica) as db:
+        assert UserRepository.update_role(db, new_user_id, "admin") is not None
+
+    with primary.connect() as conn:
+        versions = dict(conn.exec_driver_sql("SELECT email, token_version FROM users").all())
+        roles = dict(conn.exec_driver_sql("SELECT email, role FROM users").all())
+    assert versions["logout@example.com"] == "2"
+    assert roles["new@example.com"] == "admin"
@@ -0,0 +1,175 @@
+"""
+Unit tests: provider timeouts, retries, circuit breaker and hedged requests.
+"""
+import asyncio
+
+import pytest
+
+from app import providers
+from app.providers import ProviderError
+from app.providers.fake_provider import FakeProvider
+from app.providers.resilience import CircuitBreaker, CircuitOpenError, ResilientProvider
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+class FlakyProvider(FakeProvider):
+    """Fails the first `failures` calls, then behaves like FakeProvider."""
+
+    def __init__(self, failures: int = 0, latency_ms: float = 0):
+        super().__init__(reply_tokens=0, latency_ms=latency_ms)
+        self.failures = failures
+        self.calls = 0
+
+    async def _before_call(self):
+        self.calls += 1
+        await super()._before_call()
+        if self.calls <= self.failures:
+            raise ProviderError("flaky")
+
+
+def _resilient(inner, **kwargs) -> ResilientProvider:
+    options = dict(
+        timeout_seconds=1,
+        max_retries=2,
+        backoff_base_seconds=0,
+        backoff_max_seconds=0,
+        breaker=CircuitBreaker(failure_threshold=5, reset_timeout_seconds=30),
+    )
+    options.update(kwargs)
+    return ResilientProvider(inner, **options)
+
+
+def test_retries_until_success():
+    inner = FlakyProvider(failures=2)
+    completion = asyncio.run(_resilient(inner).generate_chat_completion(MESSAGES))
+    assert completion.content == "Echo: hi"
+    assert inner.calls == 3
+
+
+def test_gives_up_after_max_retries():
+    inner = FlakyProvider(failures=10)
+    with pytest.raises(ProviderError):
+        asyncio.run(_resilient(inner).generate_chat_completion(MESSAGES))
+    assert inner.calls == 3
+
+
+def test_timeout_per_attempt():
+    inner = FlakyProvider(latency_ms=200)
+    provider = _resilient(inner, timeout_seconds=0.05, max_retries=1)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(provider.generate_chat_completion(MESSAGES))
+    assert inner.calls == 2
+
+
+def test_circuit_breaker_opens_and_recovers():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_seconds=10, clock=lambda: now[0])
+    inner = FlakyProvider(failures=2)
+    provider = _resilient(inner, max_retries=0, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(ProviderError):
+            asyncio.run(provider.generate_chat_completion(MESSAGES))
+    with pytest.raises(CircuitOpenError) as excinfo:
+        asyncio.run(provider.generate_chat_completion(MESSAGES))
+    assert excinfo.value.retry_after == 10
+    assert inner.calls == 2  # failed fast, upstream not called
+
+    now[0] = 10  # half-open: one probe goes through and closes the circuit
+    assert asyncio.run(provider.generate_chat_completion(MESSAGES)).content == "Echo: hi"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_hedged_request_wins_when_primary_is_slow():
+    slow = FlakyProvider(latency_ms=500)
+    fast = FlakyProvider()
+    provider = _resilient(slow, hedge_percentile=50, hedge_min_samples=1, hedge_model="backup", hedge_provider=fast)
+    provider.latency.record(0.01)
+    completion = asyncio.run(provider.generate_chat_completion(MESSAGES))
+    assert completion.model == "backup"
+    assert fast.calls == 1
+
+
+def test_stream_retries_before_first_delta():
+    inner = FlakyProvider(failures=1)
+
+    async def collect():
+        return "".join([d async for d in _resilient(inner).stream_chat_completion(MESSAGES)])
+
+    assert asyncio.run(collect()) == "Echo: hi"
+    assert inner.calls == 2
+
+
+def test_circuit_open_maps_to_503_with_retry_after(client, auth_headers, fake_provider, monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=30)
+    breaker.record_failure()
+    monkeypatch.setattr(providers, "_provider", _resilient(fake_provider, breaker=breaker))
+    r = client.post("/chat", json={"message": "hello"}, headers=auth_headers)
+    assert r.status_code == 503
+    assert int(r.headers["Retry-After"]) >= 29
+
+
+class ClientError(Exception):
+    """A non-retryable upstream answer, like the SDK's BadRequestError."""
+
+    status_code = 400
+
+
+def test_cancelled_probe_reopens_breaker():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=10, clock=lambda: now[0])
+    breaker.record_failure()
+    now[0] = 10
+    provider = _resilient(FlakyProvider(latency_ms=500), breaker=breaker)
+
+    async def cancel_probe():
+        task = asyncio.ensure_future(provider.generate_chat_completion(MESSAGES))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_probe())
+    assert breaker.state == CircuitBreaker.OPEN
+
+    now[0] = 20  # the next probe is let through
+    provider = _resilient(FlakyProvider(), breaker=breaker)
+    assert asyncio.run(provider.generate_chat_completion(MESSAGES)).content == "Echo: hi"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_errors_do_not_trip_breaker():
+    class BadRequestProvider(FlakyProvider):
+        async def _before_call(self):
+            self.calls += 1
+            raise ClientError("bad request")
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=30)
+    inner = BadRequestProvider()
+    provider = _resilient(inner, breaker=breaker)
+    for _ in range(3):
+        with pytest.raises(ClientError):
+            asyncio.run(provider.generate_chat_completion(MESSAGES))
+    assert inner.calls == 3  # not retried, and the breaker stayed closed
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_stream_is_closed_when_first_delta_times_out():
+    closed = []
+
+    class SlowStreamProvider(FlakyProvider):
+        async def stream_chat_completion(self, messages, model=None, temperature=0.7, use_cache=True):
+            try:
+                await asyncio.sleep(1)
+                yield "late"
+            finally:
+                closed.append(True)
+
+    provider = _resilient(SlowStreamProvider(), timeout_seconds=0.05, max_retries=0)
+
+    async def collect():
+        return [d async for d in provider.stream_chat_completion(MESSAGES)]
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(collect())
+    assert closed == [True]
@@ -0,0 +1,84 @@
+"""
+Tests: per-request model routing (rules, tiers, latency-budget fallback).
+"""
+import logging
+
+from fastapi.testclient import TestClient
+
+from app import providers
+from app.providers import router as router_module
+from app.providers.cache import CachedProvider
+from app.providers.instrumentation import InstrumentedProvider
+from app.providers.router import ModelRouter, parse_tier_models
+from tests.conftest import CountingProvider
+
+
+def _messages(n: int, text: str = "hi") -> list:
+    return [{"role": "system", "content": "sys"}] + [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": text} for i in range(n)
+    ]
+
+
+def test_rules_policy_uses_prompt_size_and_conversation_length():
+    router = ModelRouter("fast", large_model="large", large_min_prompt_tokens=100, large_min_messages=5)
+    assert (router.route(_messages(1)).model, router.route(_messages(1)).reason) == ("fast", "default")
+    assert router.route(_messages(1, "word " * 200)).reason == "long_prompt"
+    decision = router.route(_messages(6))
+    assert (decision.model, decision.reason, decision.message_count) == ("large", "long_conversation", 6)
+    assert ModelRouter("fast").route(_messages(1, "word " * 5000)).model == "fast"  # no large model configured
+
+
+def test_tier_policy():
+    router = ModelRouter("fast", policy="tier", tier_models=parse_tier_models("admin=large, user = small"))
+    assert router.route(_messages(1), tier="admin").model == "large"
+    assert router.route(_messages(1), tier="user").model == "small"
+    assert router.route(_messages(1), tier="guest").model == "fast"
+
+
+def test_latency_budget_falls_back_and_probes():
+    router = ModelRouter(
+        "fast", policy="tier", tier_models={"admin": "large"},
+        latency_budget_seconds=1.0, latency_min_samples=3, probe_every=3,
+    )
+    decision = router.route(_messages(1), tier="admin")
+    for _ in range(3):
+        router.record(decision, 2.5)
+    routed = [router.route(_messages(1), tier="admin") for _ in range(3)]
+    assert [d.model for d in routed] == ["fast", "fast", "large"]
+    assert routed[0].reason == "tier:admin+over_latency_budget"
+    assert routed[2].reason == "tier:admin+latency_probe"
+
+    for _ in range(60):
+        router.record(decision, 0.2)  # preferred model is fast again
+    assert router.route(_messages(1), tier="admin").model == "large"
+
+
+def test_chat_uses_routed_model_and_logs(client: TestClient, auth_headers: dict, fake_provider, monkeypatch, caplog):
+    monkeypatch.setattr(router_module, "_router", ModelRouter(policy="tier", tier_models={"user": "tier-model"}))
+    seen = []
+    original = fake_provider.generate_chat_completion
+
+    async def spy(messages, model=None, **kwargs):
+        seen.append(model)
+        return await original(messages, model, **kwargs)
+
+    monkeypatch.setattr(fake_provider, "generate_chat_completion", spy)
+    with caplog.at_level(logging.INFO, logger="app.providers.router"):
+        assert client.post("/chat", json={"message": "hello"}, headers=auth_headers).status_code == 200
+    assert seen == ["tier-model"]
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("Routed to tier-model (tier:user)" in m for m in messages)
+    assert any("Route outcome model=tier-model" in m and "outcome=ok" in m for m in messages)
+
+
+def test_latency_budget_only_samples_upstream_calls(client: TestClient, auth_headers: dict, monkeypatch, caplog):
+    router = ModelRouter(policy="tier", tier_models={"user": "tier-model"})
+    monkeypatch.setattr(router_module, "_router", router)
+    cached = CachedProvider(InstrumentedProvider(CountingProvider(), metrics=False))
+    monkeypatch.setattr(providers, "_provider", cached)
+    with caplog.at_level(logging.INFO, logger="app.providers.router"):
+        for _ in range(2):  # the second chat is served from the completion cache
+            assert client.post("/chat", json={"message": "hello"}, headers=auth_headers).status_code == 200
+    assert len(router._latency["tier-model"]) == 1
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("Route outcome model=tier-model" in m and "upstream=none" in m for m in messages)
@@ -0,0 +1,130 @@
+"""
+Unit tests: near-duplicate (SimHash) cache for first-turn prompts.
+"""
+import asyncio
+
+from app.providers.similarity_cache import (
+    NearDuplicateCacheProvider,
+    SimHashIndex,
+    normalize,
+    prompt_fingerprint,
+    similarity,
+    simhash,
+)
+from tests.conftest import CountingProvider
+
+
+def _prompt(text: str) -> list:
+    return [{"role": "system", "content": "sys"}, {"role": "user", "content": text}]
+
+
+def _fingerprint(text: str) -> int:
+    return simhash(normalize(text))
+
+
+def test_normalize_drops_case_punctuation_and_filler():
+    assert normalize("Hi, PLEASE: what isn't the capital of France?? Thanks") == [
+        "what", "is", "not", "capital", "of", "france",
+    ]
+
+
+def test_normalize_keeps_words_that_carry_meaning():
+    assert normalize("Can you help me?") != normalize("Can I help you?")
+    assert normalize("Tell me about Sam's car") == ["tell", "me", "about", "sam", "s", "car"]
+
+
+def test_greetings_and_thanks_are_dropped_only_around_the_prompt():
+    assert normalize("Hey! Thank you, how do I say hello in Spanish? Thanks") == [
+        "how", "do", "i", "say", "hello", "in", "spanish",
+    ]
+    assert normalize("How do I say hello in Spanish?") != normalize("How do I say thanks in Spanish?")
+    assert normalize("Is hi a word? Thank you") == ["is", "hi", "word"]
+
+
+def test_similarity_separates_variants_from_different_questions():
+    base = _fingerprint("What is the capital of France?")
+    assert similarity(base, _fingerprint("hi, what is the capital of france")) == 1.0
+    assert similarity(base, _fingerprint("What is the capital of Spain?")) < 0.9
+    assert similarity(_fingerprint("Can you help me?"), _fingerprint("Can I help you?")) < 0.9
+    assert similarity(_fingerprint("Should I sell my car?"), _fingerprint("Should you sell my car?")) < 0.9
+
+
+def test_different_content_words_never_share_a_reply():
+    long_prompt = (
+        "How do I configure the firewall on my Ubuntu server so that only ports 22 and 443 "
+        "accept incoming connections from the office network"
+    )
+    pairs = [
+        ("How do I say hello in Spanish?", "How do I say thanks in Spanish?"),
+        ("Can you help me?", "Can I help you?"),
+        (long_prompt, long_prompt.replace("Ubuntu", "Debian")),
+        (long_prompt, long_prompt.replace("incoming", "outgoing")),
+    ]
+    for a, b in pairs:
+        assert prompt_fingerprint("m", 0.7, _prompt(a))[0] != prompt_fingerprint("m", 0.7, _prompt(b))[0]
+
+    inner = CountingProvider()
+    provider = NearDuplicateCacheProvider(inner, SimHashIndex(max_entries=10, ttl_seconds=60, threshold=0.9))
+
+    async def run():
+        for a, b in pairs:
+            await provider.generate_chat_completion(_prompt(a))
+            await provider.generate_chat_completion(_prompt(b))
+
+    asyncio.run(run())
+    assert inner.calls == len({prompt for pair in pairs for prompt in pair})  # no hits
+
+
+def test_index_matches_within_threshold_and_context():
+    index = SimHashIndex(max_entries=10, ttl_seconds=60, threshold=0.9)
+    index.set("ctx", 0b1111, "value")
+    assert index.get("ctx", 0b1111) == "value"
+    assert index.get("ctx", 0b1111 ^ (1 << 40) ^ (1 << 3)) == "value"  # 2 bits differ
+    assert index.get("ctx", 0b1111 ^ ((1 << 7) - 1) << 30) is None  # 7 bits differ
+    assert index.get("other", 0b1111) is None
+    assert (index.hits, index.misses) == (2, 2)
+
+
+def test_index_evicts_least_recently_used_and_expires():
+    now = [0.0]
+    index = SimHashIndex(max_entries=2, ttl_seconds=10, threshold=1.0, clock=lambda: now[0])
+    for fingerprint in (1, 2, 3):
+        index.set("ctx", fingerprint, fingerprint)
+    assert index.get("ctx", 1) is None
+    assert index.get("ctx", 3) == 3
+    now[0] = 11
+    assert index.get("ctx", 3) is None
+    assert len(index) == 1  # expired entry removed on lookup
+
+
+def test_only_single_turn_prompts_are_fingerprinted():
+    assert prompt_fingerprint("m", 0.7, _prompt("What is Python?")) is not None
+    multi_turn = _prompt("hi") + [{"role": "assistant", "content": "hello"}, {"role": "user", "content": "What?"}]
+    assert prompt_fingerprint("m", 0.7, multi_turn) is None
+    assert prompt_fingerprint("m", 0.7, _prompt("Hi, thanks!")) is None  # nothing left after filler words
+    # System prompt, model and temperature must match exactly
+    keys = {
+        prompt_fingerprint("m", 0.7, _prompt("What is Python?"))[0],
+        prompt_fingerprint("other", 0.7, _prompt("What is Python?"))[0],
+        prompt_fingerprint("m", 0.2, _prompt("What is Python?"))[0],
+        prompt_fingerprint("m", 0.7, [{"role": "system", "content": "x"}, {"role": "user", "content": "What is Python?"}])[0],
+    }
+    assert len(keys) == 4
+
+
+def test_provider_serves_near_duplicates():
+    inner = CountingProvider()
+    provider = NearDuplicateCacheProvider(inner, SimHashIndex(max_entries=10, ttl_seconds=60, threshold=0.9))
+
+    async def run():
+        first = await provider.generate_chat_completion(_prompt("How do I reset my password?"))
+        again = await provider.generate_chat_completion(_prompt("hey, how do I reset my password??"))
+        streamed = "".join([d async for d in provider.stream_chat_completion(_prompt("HOW DO I RESET MY PASSWORD"))])
+        await provider.generate_chat_completion(_prompt("How do I delete my account?"))
+        await provider.generate_chat_completion(_prompt("How do you reset my password?"))
+        await provider.generate_chat_completion(_prompt("How do I reset my password?"), use_cache=False)
+        return first, again, streamed
+
+    first, again, streamed = asyncio.run(run())
+    assert again.content == streamed == first.content
+    assert inner.calls == 4
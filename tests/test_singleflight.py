@@ -0,0 +1,102 @@
+"""
+Unit tests: single-flight coalescing of identical concurrent provider requests.
+"""
+import asyncio
+
+from app.providers import ProviderError
+from app.providers.singleflight import SingleFlightProvider
+from tests.conftest import CountingProvider, collect
+
+MESSAGES = [{"role": "user", "content": "same prompt"}]
+
+
+def _slow_provider(**kwargs) -> CountingProvider:
+    """CountingProvider slow enough for identical requests to overlap."""
+    return CountingProvider(latency_ms=20, tokens_per_second=500, **kwargs)
+
+
+def test_identical_concurrent_completions_share_one_call():
+    inner = _slow_provider()
+    provider = SingleFlightProvider(inner)
+
+    async def run():
+        return await asyncio.gather(*(provider.generate_chat_completion(MESSAGES) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert {r.content for r in results} == {"Echo: same prompt"}
+    assert inner.calls == 1
+    assert provider.in_flight == 0
+
+
+def test_different_or_uncached_requests_are_not_coalesced():
+    inner = _slow_provider()
+    provider = SingleFlightProvider(inner)
+
+    async def run():
+        await asyncio.gather(
+            provider.generate_chat_completion(MESSAGES),
+            provider.generate_chat_completion([{"role": "user", "content": "other"}]),
+            provider.generate_chat_completion(MESSAGES, use_cache=False),
+        )
+
+    asyncio.run(run())
+    assert inner.calls == 3
+
+
+def test_errors_reach_every_waiter():
+    provider = SingleFlightProvider(_slow_provider(error_rate=1.0))
+
+    async def run():
+        return await asyncio.gather(
+            *(provider.generate_chat_completion(MESSAGES) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ProviderError) for r in results)
+
+
+def test_identical_concurrent_streams_share_one_call():
+    inner = _slow_provider()
+    provider = SingleFlightProvider(inner)
+
+    async def run():
+        return await asyncio.gather(*(collect(provider.stream_chat_completion(MESSAGES)) for _ in range(4)))
+
+    assert asyncio.run(run()) == ["Echo: same prompt"] * 4
+    assert inner.calls == 1
+
+
+def test_stream_error_reaches_every_subscriber():
+    provider = SingleFlightProvider(_slow_provider(error_rate=1.0))
+
+    async def run():
+        return await asyncio.gather(
+            *(collect(provider.stream_chat_completion(MESSAGES)) for _ in range(2)), return_exceptions=True
+        )
+
+    assert all(isinstance(r, ProviderError) for r in asyncio.run(run()))
+
+
+def test_stream_is_cancelled_when_every_subscriber_leaves():
+    inner = CountingProvider(tokens_per_second=20, reply_tokens=100)  # about five seconds of stream
+    provider = SingleFlightProvider(inner)
+
+    async def run():
+        streams = [provider.stream_chat_completion(MESSAGES) for _ in range(2)]
+        for stream in streams:
+            await stream.__anext__()
+        pump = next(iter(provider._streams.values())).task
+        await streams[0].aclose()
+        await asyncio.sleep(0.01)
+        assert not pump.done()  # the other subscriber is still reading
+        await streams[1].aclose()
+        # An identical request right away starts a fresh upstream stream rather than joining
+        late = provider.stream_chat_completion(MESSAGES)
+        assert (await late.__anext__()).startswith("Echo")
+        await asyncio.wait_for(pump, timeout=1)
+        await late.aclose()
+        await asyncio.sleep(0.01)
+        assert provider.in_flight == 0
+
+    asyncio.run(run())
+    assert inner.calls == 2
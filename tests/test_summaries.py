@@ -0,0 +1,65 @@
+"""
+Tests: rolling summaries of messages that fell out of the context window.
+"""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.core.config import RESPONSE_TOKEN_RESERVE, SYSTEM_PROMPT
+from app.core.database import SessionLocal
+from app.core.tokens import message_tokens
+from app.repositories.chat_repository import ChatRepository
+from app.repositories.message_repository import MessageRepository
+from app.services import memory_service
+from app.services.summary_service import SummaryWorker
+
+
+def _fill_chat(client: TestClient, headers: dict, count: int) -> str:
+    chat_id = client.post("/chats", json={}, headers=headers).json()["id"]
+    db = SessionLocal()
+    try:
+        for i in range(count):
+            MessageRepository.add_message(db, chat_id, "user" if i % 2 == 0 else "assistant", f"message {i}")
+    finally:
+        db.close()
+    return chat_id
+
+
+def _conversation(chat_id: str) -> list:
+    db = SessionLocal()
+    try:
+        return memory_service.get_conversation(db, chat_id)
+    finally:
+        db.close()
+
+
+def test_summary_folds_dropped_messages(client: TestClient, auth_headers: dict, fake_provider, monkeypatch):
+    # Room for exactly three short messages
+    budget = RESPONSE_TOKEN_RESERVE + message_tokens(SYSTEM_PROMPT) + 3 * message_tokens("message 0")
+    monkeypatch.setattr(memory_service, "CONTEXT_TOKEN_BUDGET", budget)
+
+    async def short_summary(previous_summary, messages, max_words=250):
+        return "talked about " + ", ".join(m["content"] for m in messages)
+
+    fake_provider.summarize_conversation = short_summary
+    chat_id = _fill_chat(client, auth_headers, 6)
+    assert [m["content"] for m in _conversation(chat_id)][0] == "message 3"
+
+    assert asyncio.run(SummaryWorker().summarize_chat(chat_id)) is True
+
+    db = SessionLocal()
+    try:
+        summary, through_id = ChatRepository.get_summary(db, chat_id)
+    finally:
+        db.close()
+    assert summary == "talked about message 0, message 1, message 2"
+    conversation = _conversation(chat_id)
+    assert conversation[0]["role"] == "system"
+    assert summary in conversation[0]["content"]
+    assert conversation[-1]["content"] == "message 5"
+
+
+def test_summary_not_needed_for_short_chat(client: TestClient, auth_headers: dict, fake_provider):
+    chat_id = _fill_chat(client, auth_headers, 2)
+    assert asyncio.run(SummaryWorker().summarize_chat(chat_id)) is False
+    assert [m["content"] for m in _conversation(chat_id)] == ["message 0", "message 1"]
@@ -0,0 +1,58 @@
+"""
+Tests: background chat-title worker (batched title generation).
+"""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.core.database import SessionLocal
+from app.repositories.message_repository import MessageRepository
+from app.services.title_service import TitleWorker
+
+
+def _chat_with_message(client: TestClient, headers: dict, message: str, title=None) -> str:
+    chat_id = client.post("/chats", json={"title": title}, headers=headers).json()["id"]
+    # Add the message directly so the inline (worker-disabled) title path does not run
+    db = SessionLocal()
+    try:
+        MessageRepository.add_message(db, chat_id, "user", message)
+    finally:
+        db.close()
+    return chat_id
+
+
+def test_worker_titles_untitled_chats_in_batches(client: TestClient, auth_headers: dict, fake_provider):
+    calls = []
+    original = fake_provider.generate_chat_titles
+
+    async def counting_titles(first_messages):
+        calls.append(len(first_messages))
+        return await original(first_messages)
+
+    fake_provider.generate_chat_titles = counting_titles
+    ids = [_chat_with_message(client, auth_headers, f"question number {i}") for i in range(3)]
+    empty_chat = client.post("/chats", json={}, headers=auth_headers).json()["id"]
+
+    asyncio.run(TitleWorker(batch_size=2).run_once())
+
+    assert calls == [2, 1]
+    for i, chat_id in enumerate(ids):
+        assert client.get(f"/chats/{chat_id}", headers=auth_headers).json()["title"] == f"Question number {i}"
+    assert client.get(f"/chats/{empty_chat}", headers=auth_headers).json()["title"] is None
+
+
+def test_worker_keeps_existing_title(client: TestClient, auth_headers: dict, fake_provider):
+    chat_id = _chat_with_message(client, auth_headers, "some message", title="Mine")
+    asyncio.run(TitleWorker().run_once())
+    assert client.get(f"/chats/{chat_id}", headers=auth_headers).json()["title"] == "Mine"
+
+
+def test_worker_gives_up_after_max_attempts(client: TestClient, auth_headers: dict, fake_provider):
+    fake_provider.error_rate = 1.0
+    chat_id = _chat_with_message(client, auth_headers, "failing message")
+    worker = TitleWorker(max_attempts=2)
+    assert asyncio.run(worker.run_batch()) == 1
+    assert asyncio.run(worker.run_batch()) == 1
+    assert asyncio.run(worker.run_batch()) == 0
+    assert asyncio.run(TitleWorker(max_attempts=2).run_batch()) == 0  # also after a restart
+    assert client.get(f"/chats/{chat_id}", headers=auth_headers).json()["title"] is None